@@ -90,6 +90,48 @@ router.get("/:id/status", async (req: Request, res: Response) => {
 	return res.status(200).json(data);
 });
 
+/* --------------------------------- Events --------------------------------- */
+// The worker publishes every progress transition on `job:<id>:events`.
+// One pattern subscription (on its own connection) fans out to all SSE clients.
+const events = redis.duplicate();
+const listeners = new Map<string, Set<Response>>();
+
+events
+	.psubscribe("job:*:events")
+	.catch((err) => console.warn("⚠️ Redis events subscribe warning:", err));
+
+events.on("pmessage", (_pattern: string, channel: string, message: string) => {
+	const id = channel.slice("job:".length, -":events".length);
+	for (const client of listeners.get(id) ?? []) {
+		client.write(`data: ${message}\n\n`);
+	}
+});
+
+/**
+ * GET /:id/events
+ * Server-Sent Events stream of progress updates for one job,
+ * so clients can subscribe instead of polling GET /:id/status.
+ */
+router.get("/:id/events", (req: Request, res: Response) => {
+	const id = req.params.id as string;
+
+	res.writeHead(200, {
+		"Content-Type": "text/event-stream",
+		"Cache-Control": "no-cache",
+		Connection: "keep-alive",
+	});
+	res.flushHeaders();
+
+	const clients = listeners.get(id) ?? new Set<Response>();
+	listeners.set(id, clients);
+	clients.add(res);
+
+	req.on("close", () => {
+		clients.delete(res);
+		if (clients.size === 0) listeners.delete(id);
+	});
+});
+
 /* --------------------------------- Create --------------------------------- */
 /**
  * POST /
@@ -114,7 +156,14 @@ router.post("/", validate(JobAdSchema), async (req: Request, res: Response) => {
 	// Fire-and-forget to Kafka (await to surface errors)
 	await producer.send({
 		topic: "job.created",
-		messages: [{ key: url, value: JSON.stringify(newJob) }],
+		// a user is waiting on this one: the worker serves it before bulk imports
+		messages: [
+			{
+				key: url,
+				value: JSON.stringify(newJob),
+				headers: { "x-priority": "interactive" },
+			},
+		],
 	});
 
 	return res.status(201).json(newJob);
@@ -0,0 +1,78 @@
+
+from datetime import date, timedelta
+from typing import Dict, List
+import random
+import uuid
+
+
+TITLES = ["Software Engineer", "Backend Developer", "Full Stack Developer", "Data Engineer",
+          "DevOps Engineer", "Frontend Developer", "Platform Engineer", "Integration Engineer"]
+COMPANIES = ["Topsort", "IntegraDev", "Acme Cloud", "Blue Harbour", "Northwind", "Kite Labs", "Quokka Tech"]
+SKILLS = ["Python", "Java", "TypeScript", "React", "Node.js", "Next.js", "Express", "MongoDB", "MySQL",
+          "PostgreSQL", "Redis", "Kafka", "Docker", "Kubernetes", "AWS", "GCP", "Terraform", "CI/CD",
+          "Git", "REST APIs", "GraphQL", "Linux", "Nginx", "Pytest", "JUnit"]
+DUTIES = ["Design and build {s} services", "Own the {s} integration end-to-end",
+          "Maintain CI/CD pipelines for {s} workloads", "Review code and mentor engineers on {s}",
+          "Improve performance of the {s} data layer", "Work with product to scope {s} features"]
+REQUIREMENTS = ["{n}+ years of experience with {s}", "Proven experience shipping {s} in production",
+                "Familiarity with {s} and cloud tooling", "Strong knowledge of {s}"]
+BOILERPLATE = """About {company}
+{company} is a fast-growing company with hubs in 5 countries. We believe in clean technology and happy customers.
+What it's like to work at {company}
+We move fast, give candid feedback and celebrate wins together.
+Benefits
+• Flexible PTO and floating holidays
+• 401K matching and comprehensive health cover
+• Hybrid work and a device of your choice
+Employer questions
+Your application will include the following questions:
+• How many years' experience do you have as a software developer?
+• Which of the following statements best describes your right to work in Australia?"""
+
+
+def job_ad(rng:random.Random) -> Dict:
+  title = rng.choice(TITLES)
+  company = rng.choice(COMPANIES)
+  skills = rng.sample(SKILLS, 6)
+  lines = [
+    title,
+    "About the Role:",
+    f"We are looking for a {title} to join {company} and build reliable products with {skills[0]} and {skills[1]}.",
+    "You will:",
+  ]
+  lines += ["• " + d.format(s=rng.choice(skills)) for d in rng.sample(DUTIES, 4)]
+  lines.append("Requirements")
+  lines += ["• " + r.format(s=rng.choice(skills), n=rng.randint(1, 6)) for r in rng.sample(REQUIREMENTS, 3)]
+  lines.append("• Bachelor's degree in Computer Science or related field")
+  lines.append(BOILERPLATE.format(company=company))
+
+  salary = rng.randrange(70, 180, 5) * 1000
+  opened = date(2025, 1, 1) + timedelta(days=rng.randint(0, 300))
+  return {
+    "companyName": company,
+    "recruiterName": rng.choice(["Jane Doe", "Sam Lee", "Alex Kim", ""]),
+    "jobTitle": title,
+    "jobDescription": "\n".join(lines),
+    "salaryStart": salary,
+    "salaryEnd": salary + 20000,
+    "openDate": opened.isoformat(),
+    "closeDate": (opened + timedelta(days=30)).isoformat(),
+  }
+
+
+def generate(n:int, duplicate_ratio:float=0.0, seed:int=7) -> List[Dict]:
+  """
+  `n` synthetic job messages, shaped like the API's `job.created` events.
+  `duplicate_ratio` of them re-use an earlier ad's content under a new id/url,
+  like a replayed topic or the same ad posted twice.
+  """
+  rng = random.Random(seed)
+  jobs: List[Dict] = []
+  for i in range(n):
+    if jobs and rng.random() < duplicate_ratio:
+      ad = {k: v for k, v in rng.choice(jobs).items() if k not in ("id", "url")}
+    else:
+      ad = job_ad(rng)
+    jid = str(uuid.UUID(int=rng.getrandbits(128)))
+    jobs.append({"id": jid, "url": f"https://jobs.example.com/{i}-{jid[:8]}", **ad})
+  return jobs
@@ -0,0 +1,97 @@
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+import functools
+import threading
+import time
+
+
+class StageStats:
+  """Thread-safe call counts and latency samples, keyed by stage name."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._samples: Dict[str, List[float]] = defaultdict(list)
+
+  def record(self, name:str, seconds:float) -> None:
+    with self._lock:
+      self._samples[name].append(seconds)
+
+  def count(self, name:str) -> int:
+    with self._lock:
+      return len(self._samples.get(name, ()))
+
+  def timed(self, name:str, fn:Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+      start = time.perf_counter()
+      try:
+        return fn(*args, **kwargs)
+      finally:
+        self.record(name, time.perf_counter() - start)
+    return wrapper
+
+  def summary(self) -> Dict[str, Dict[str, float]]:
+    with self._lock:
+      snapshot = {k: sorted(v) for k, v in self._samples.items()}
+    out = {}
+    for name, samples in sorted(snapshot.items()):
+      out[name] = {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(_pct(samples, 50) * 1000, 3),
+        "p95_ms": round(_pct(samples, 95) * 1000, 3),
+        "p99_ms": round(_pct(samples, 99) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+      }
+    return out
+
+
+def _pct(sorted_samples:List[float], pct:float) -> float:
+  idx = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples) + 0.5) - 1))
+  return sorted_samples[idx]
+
+
+class CountingProxy:
+  """
+  Wraps a client object and times every call to a method in `counted`
+  (one round trip each). Methods listed in `children` return objects that are
+  wrapped in turn, e.g. MongoClient -> Database -> Collection, or Redis -> Pipeline.
+  """
+
+  def __init__(self, target:Any, stats:StageStats, prefix:str, counted:set,
+               children:Optional[Dict[str, tuple]]=None):
+    self._target = target
+    self._stats = stats
+    self._prefix = prefix
+    self._counted = counted
+    self._children = children or {}
+
+  def __getattr__(self, name:str):
+    attr = getattr(self._target, name)
+    if name in self._children:
+      prefix, counted, children = self._children[name]
+      if callable(attr):
+        return lambda *a, **kw: CountingProxy(attr(*a, **kw), self._stats, prefix, counted, children)
+      return CountingProxy(attr, self._stats, prefix, counted, children)
+    if name in self._counted and callable(attr):
+      return self._stats.timed(f"{self._prefix}.{name}", attr)
+    return attr
+
+  def __getitem__(self, key):
+    return self._target[key]
+
+
+MONGO_OPS = {"command", "bulk_write", "update_one", "update_many", "insert_one", "insert_many",
+             "find_one", "find", "aggregate", "count_documents", "create_index", "delete_one"}
+REDIS_OPS = {"ping", "get", "set", "hset", "hgetall", "expire", "publish", "delete", "incr"}
+
+
+def counting_mongo(client:Any, stats:StageStats) -> CountingProxy:
+  coll = ("mongo", MONGO_OPS, {})
+  db = ("mongo", MONGO_OPS, {"get_collection": coll})
+  return CountingProxy(client, stats, "mongo", set(), {"get_database": db, "admin": db})
+
+
+def counting_redis(client:Any, stats:StageStats) -> CountingProxy:
+  return CountingProxy(client, stats, "redis", REDIS_OPS, {"pipeline": ("redis.pipeline", {"execute"}, {})})
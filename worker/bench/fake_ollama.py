@@ -0,0 +1,133 @@
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+import json
+import re
+import threading
+import time
+
+from helper.embeddings.embedder import HashingEmbedder
+from helper.text.cleaner import estimate_tokens
+
+
+_AD = re.compile(r'<ad id="([^"]+)">\n(.*?)\n</ad>', re.S)
+_SINGLE = re.compile(r"Input \(raw job ad\):\n(.*?)\n\s*Extraction scope:", re.S)
+_BULLET = re.compile(r"^\s*[•\-*]\s*")
+
+
+def _extract(ad:str) -> Dict[str, Any]:
+  """A plausible six-field answer built from the ad text itself."""
+  lines = [l.strip() for l in ad.strip().splitlines() if l.strip()]
+  bullets = [_BULLET.sub("", l) for l in lines if _BULLET.match(l)]
+  words = {w.strip(",.()") for l in lines for w in l.split()}
+  return {
+    "job_title": lines[0] if lines else "",
+    "summary": next((l for l in lines[1:] if len(l.split()) > 8 and not _BULLET.match(l)), ""),
+    "responsibilities": [b for b in bullets if not re.search(r"experience|years|knowledge|degree", b, re.I)],
+    "requirements": [b for b in bullets if re.search(r"experience|years|knowledge|familiarity|proven", b, re.I)],
+    "technical_skills": sorted(w for w in words if w[:1].isupper() and any(c.isupper() for c in w[1:]) or w in ("Python", "Java", "Docker", "Kafka", "Redis", "Git", "Linux")),
+    "qualifications": [b for b in bullets if "degree" in b.lower()],
+  }
+
+
+class FakeOllama:
+  """
+  Local HTTP stand-in for Ollama's /api/generate (and /api/embed, with hashed vectors).
+
+  Answers are built from the prompt, so the worker's parsing and validation run
+  for real. Each call sleeps `latency_ms` + prompt tokens / `prefill_tokens_per_s`
+  + answer tokens / `tokens_per_s`, so GPU cost can be dialled in.
+  """
+
+  def __init__(self, latency_ms:float=50, tokens_per_s:float=400, prefill_tokens_per_s:float=4000):
+    self.latency = latency_ms / 1000
+    self.tokens_per_s = tokens_per_s
+    self.prefill_tokens_per_s = prefill_tokens_per_s
+
+    self.requests = 0
+    self.prompt_tokens = 0
+    self.completion_tokens = 0
+    self._lock = threading.Lock()
+    self._server: Any = None
+    self._thread: Any = None
+
+
+  def answer(self, prompt:str) -> str:
+    ads = _AD.findall(prompt)
+    if ads:
+      return json.dumps({"results": [{"id": jid, "response": _extract(text)} for jid, text in ads]})
+    m = _SINGLE.search(prompt)
+    return json.dumps({"response": _extract(m.group(1) if m else "")})
+
+
+  def _handler(self):
+    fake = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def log_message(self, *_):
+        return
+
+      def do_GET(self):
+        if self.path == "/api/tags":
+          self._json({"models": [{"name": "llama3.1:8b"}]})
+        else:
+          self.send_error(404)
+
+      def do_POST(self):
+        if self.path not in ("/api/generate", "/api/embed"):
+          return self.send_error(404)
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path == "/api/embed":
+          return self._json({"embeddings": HashingEmbedder(dim=64).embed(payload.get("input") or []).tolist()})
+        prompt = payload.get("prompt", "")
+        text = fake.answer(prompt)
+        p_tok, c_tok = estimate_tokens(prompt), estimate_tokens(text)
+        with fake._lock:
+          fake.requests += 1
+          fake.prompt_tokens += p_tok
+          fake.completion_tokens += c_tok
+
+        time.sleep(fake.latency + p_tok / fake.prefill_tokens_per_s)
+        if not payload.get("stream"):
+          time.sleep(c_tok / fake.tokens_per_s)
+          return self._json({"response": text, "done": True, "prompt_eval_count": p_tok, "eval_count": c_tok})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for chunk in _chunks(text, 16):
+          time.sleep(estimate_tokens(chunk) / fake.tokens_per_s)
+          try:
+            self.wfile.write((json.dumps({"response": chunk, "done": False}) + "\n").encode())
+            self.wfile.flush()
+          except (BrokenPipeError, ConnectionResetError):
+            return  # client stopped the generation early
+        self.wfile.write((json.dumps({"response": "", "done": True, "prompt_eval_count": p_tok, "eval_count": c_tok}) + "\n").encode())
+
+      def _json(self, body):
+        raw = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    return Handler
+
+
+  def start(self, host:str="127.0.0.1", port:int=0) -> str:
+    self._server = ThreadingHTTPServer((host, port), self._handler())
+    self._server.daemon_threads = True
+    self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+    self._thread.start()
+    return f"http://{host}:{self._server.server_address[1]}"
+
+
+  def stop(self) -> None:
+    if self._server is not None:
+      self._server.shutdown()
+      self._server.server_close()
+
+
+def _chunks(text:str, size:int) -> List[str]:
+  return [text[i:i + size] for i in range(0, len(text), size)]
@@ -0,0 +1,132 @@
+
+from collections import deque, namedtuple
+from typing import Deque, Dict, List
+import threading
+import time
+import json
+import zlib
+
+from database.job_record import JobRecord, encode_value
+from kafkaClass.offsets import OffsetTracker
+from kafkaClass.retry import RetryRouter, DelayScheduler
+
+
+TopicPartition = namedtuple("TopicPartition", ["topic", "partition"])
+Record = namedtuple("Record", ["topic", "partition", "offset", "key", "value", "headers"], defaults=((),))
+
+
+class MemoryConsumer:
+  """The slice of KafkaConsumer that main.process() uses, served from memory. Values are decoded on poll."""
+
+  def __init__(self, queues:Dict[TopicPartition, Deque[Record]], max_poll_records:int=500,
+               value_deserializer=JobRecord.decode):
+    self._queues = queues
+    self.value_deserializer = value_deserializer
+    self._paused: set = set()
+    self.max_poll_records = max_poll_records
+    self.polls = 0
+    self.polled_records = 0
+
+  def assignment(self):
+    return set(self._queues)
+
+  def paused(self):
+    return set(self._paused)
+
+  def pause(self, *tps):
+    self._paused.update(tps)
+
+  def resume(self, *tps):
+    self._paused.difference_update(tps)
+
+  def poll(self, timeout_ms:int=0):
+    self.polls += 1
+    out: Dict[TopicPartition, List[Record]] = {}
+    budget = self.max_poll_records
+    for tp, q in list(self._queues.items()):
+      if tp in self._paused or not q or budget <= 0:
+        continue
+      take = [q.popleft() for _ in range(min(budget, len(q)))]
+      out[tp] = [r._replace(value=self.value_deserializer(r.value)) for r in take]
+      budget -= len(take)
+    if not out:
+      # mimic a broker long-poll without burning CPU
+      time.sleep(min(timeout_ms, 20) / 1000)
+    self.polled_records += self.max_poll_records - budget
+    return out
+
+  def close(self):
+    return
+
+
+class MemoryKafkaClient:
+  """
+  Stand-in for KafkaClient: jobs are spread over `partitions` by URL, like the
+  API's keyed produce, and commits go through the same OffsetTracker.
+  """
+
+  def __init__(self, jobs:List[dict], topic:str="job.created", partitions:int=3,
+               max_poll_records:int=500, commit_every:int=100, commit_interval_ms:int=5000):
+    queues: Dict[TopicPartition, Deque[Record]] = {TopicPartition(topic, p): deque() for p in range(partitions)}
+    for job in jobs:
+      tp = TopicPartition(topic, zlib.crc32(job["url"].encode()) % partitions)
+      q = queues[tp]
+      q.append(Record(topic, tp.partition, len(q), job["url"].encode(), json.dumps(job).encode("utf-8")))
+
+    self.total = len(jobs)
+    self.tracker = OffsetTracker(every_n=commit_every, interval_ms=commit_interval_ms)
+    self.consumer = MemoryConsumer(queues, max_poll_records=max_poll_records)
+    self.commits = 0
+    self._acked = 0
+    self._lock = threading.Lock()
+    self.retry = RetryRouter(self)
+    self.scheduler = DelayScheduler(self.consumer)
+    self.dead_letters: List[Record] = []
+    self._produced: Dict[TopicPartition, int] = {}
+
+  def run(self):
+    return self.consumer
+
+  def ready(self):
+    return True
+
+  def subscribe(self):
+    return
+
+  def track(self, msg):
+    self.tracker.track(TopicPartition(msg.topic, msg.partition), msg.offset)
+
+  def ack(self, msg):
+    self.tracker.ack(TopicPartition(msg.topic, msg.partition), msg.offset)
+    with self._lock:
+      self._acked += 1
+
+  @property
+  def acked(self) -> int:
+    with self._lock:
+      return self._acked
+
+  def produce(self, topic, value, key=None, headers=None):
+    """Retry records land on partition 0 of their topic; dead letters are only kept."""
+    tp = TopicPartition(topic, 0)
+    with self._lock:
+      offset = self._produced.get(tp, 0)
+      self._produced[tp] = offset + 1
+      record = Record(topic, 0, offset, key, encode_value(value), tuple(headers or ()))
+      if topic not in self.retry.topics:
+        self.dead_letters.append(record)
+        return
+      self.consumer._queues.setdefault(tp, deque()).append(record)
+      self.total += 1
+
+  def lag(self):
+    return {tp: len(q) for tp, q in self.consumer._queues.items()}
+
+  def commit(self, force:bool=False):
+    offsets = self.tracker.due(force=force)
+    if offsets:
+      self.commits += 1
+      self.tracker.mark_committed(offsets)
+
+  def close(self):
+    self.commit(force=True)
@@ -0,0 +1,144 @@
+
+"""
+Offline throughput benchmark for the worker.
+
+Runs the real main.process() loop (pool, offset tracking, bulk Mongo writer,
+Redis progress, cleaner, batching extractor) against local stand-ins:
+an in-memory Kafka source, a fake Ollama HTTP server, mongomock and fakeredis.
+
+    python -m bench.run --jobs 200 --concurrency 8 --latency-ms 50 --out bench.json
+
+Prints one JSON report: throughput, per-stage p50/p95/p99, and Mongo/Redis round trips.
+"""
+from typing import Any, Dict
+import argparse
+import contextlib
+import json
+import platform
+import sys
+import threading
+import time
+
+try:
+  import mongomock # type: ignore
+  import fakeredis # type: ignore
+except ImportError as e:
+  sys.exit(f"bench needs its extra dependencies: pip install -r bench/requirements.txt ({e})")
+
+import main
+from database.mongo import MongoDB
+from database.redis_publisher import RedisPublisher
+from function.job_analyser import JobAnalyser
+from helper.ai.cache import ResponseCache
+from helper.ai.extract_keywords import SkillExtractor
+from config.settings import MONGO_DB, MONGO_COLL
+
+from .corpus import generate
+from .counting import StageStats, counting_mongo, counting_redis
+from .fake_ollama import FakeOllama
+from .memory_kafka import MemoryKafkaClient
+
+
+def parse_args(argv=None):
+  ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  ap.add_argument("--jobs", type=int, default=200, help="synthetic job ads to replay")
+  ap.add_argument("--duplicates", type=float, default=0.0, help="share of ads that repeat an earlier ad")
+  ap.add_argument("--seed", type=int, default=7)
+  ap.add_argument("--partitions", type=int, default=3)
+  ap.add_argument("--max-poll-records", type=int, default=500)
+  ap.add_argument("--concurrency", type=int, default=main.WORKER_CONCURRENCY, help="worker pool size")
+  ap.add_argument("--max-pending", type=int, default=None, help="pause partitions above this (default 2x concurrency)")
+  ap.add_argument("--batch-size", type=int, default=None, help="ads per LLM request")
+  ap.add_argument("--latency-ms", type=float, default=50, help="fake Ollama fixed latency per request")
+  ap.add_argument("--tokens-per-s", type=float, default=400, help="fake Ollama generation rate")
+  ap.add_argument("--prefill-tokens-per-s", type=float, default=4000, help="fake Ollama prompt processing rate")
+  ap.add_argument("--timeout", type=float, default=600, help="give up after this many seconds")
+  ap.add_argument("--out", help="also write the report to this file")
+  return ap.parse_args(argv)
+
+
+def run(args) -> Dict[str, Any]:
+  jobs = generate(args.jobs, duplicate_ratio=args.duplicates, seed=args.seed)
+  stats = StageStats()
+
+  ollama = FakeOllama(latency_ms=args.latency_ms, tokens_per_s=args.tokens_per_s,
+                      prefill_tokens_per_s=args.prefill_tokens_per_s)
+  url = ollama.start()
+
+  mongo_client = mongomock.MongoClient()
+  redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+  extractor = SkillExtractor(host=url, cache=ResponseCache())
+  extractor._generate = stats.timed("llm.request", extractor._generate)
+  analyser_kwargs = {"batch_size": args.batch_size} if args.batch_size else {}
+  analyser = JobAnalyser(extractor=extractor, **analyser_kwargs)
+  analyser._run_batch = stats.timed("llm.batch", analyser._run_batch)
+
+  kafka = MemoryKafkaClient(jobs, partitions=args.partitions, max_poll_records=args.max_poll_records)
+  main.setup(
+    kafka_client=kafka,
+    mongo=MongoDB(client=counting_mongo(mongo_client, stats)),
+    redis_publisher=RedisPublisher(client=counting_redis(redis_client, stats)),
+    job_analyser=analyser,
+    metrics_port=0,
+  )
+  main.WORKER_CONCURRENCY = args.concurrency
+  main.WORKER_MAX_PENDING = args.max_pending or args.concurrency * 2
+  main.handle_job = stats.timed("job.end_to_end", main.handle_job)
+  main.stop = False
+
+  def stop_when_done():
+    deadline = time.monotonic() + args.timeout
+    while kafka.acked < kafka.total and time.monotonic() < deadline:
+      time.sleep(0.01)
+    main.stop = True
+
+  watcher = threading.Thread(target=stop_when_done, daemon=True)
+  started = time.perf_counter()
+  watcher.start()
+  main.process()
+  elapsed = time.perf_counter() - started
+  ollama.stop()
+
+  coll = mongo_client.get_database(MONGO_DB).get_collection(MONGO_COLL)
+  stages = stats.summary()
+  round_trips = {name: s["count"] for name, s in stages.items() if name.startswith(("mongo", "redis"))}
+
+  return {
+    "benchmark": "worker.process",
+    "python": platform.python_version(),
+    "config": {k: v for k, v in vars(args).items() if k != "out"},
+    "jobs": args.jobs,
+    "acked": kafka.acked,
+    "completed": coll.count_documents({"status": "Complete"}),
+    "failed": coll.count_documents({"status": "failed"}),
+    "deduplicated": coll.count_documents({"duplicateOf": {"$exists": True}}),
+    "elapsed_s": round(elapsed, 3),
+    "throughput_jobs_per_s": round(kafka.acked / elapsed, 3) if elapsed else None,
+    "stages": stages,
+    "round_trips": round_trips,
+    "round_trips_per_job": {k: round(v / max(args.jobs, 1), 3) for k, v in round_trips.items()},
+    "kafka": {"polls": kafka.consumer.polls, "commits": kafka.commits},
+    "llm": {
+      "requests": ollama.requests,
+      "prompt_tokens": ollama.prompt_tokens,
+      "completion_tokens": ollama.completion_tokens,
+      "cache": extractor.cache.stats() if extractor.cache else None,
+    },
+  }
+
+
+def main_cli(argv=None):
+  args = parse_args(argv)
+  # the pipeline logs with print(); keep stdout for the report
+  with contextlib.redirect_stdout(sys.stderr):
+    report = run(args)
+  text = json.dumps(report, indent=2)
+  if args.out:
+    with open(args.out, "w") as f:
+      f.write(text + "\n")
+  print(text)
+
+
+if __name__ == "__main__":
+  main_cli()
@@ -0,0 +1,288 @@
+"""
+Bulk import of historical job ads, without going through the HTTP API.
+
+Streams JSONL or CSV files (optionally .gz / .bz2 / .xz) record by record,
+validates each one as a JobRecord, skips URLs that Mongo already has or that
+appeared earlier in the import, and either
+
+  --to kafka   produces to job.created in large batches (priority "bulk", so
+               API submissions still go first), for the worker to analyse; or
+  --to mongo   bulk-upserts the raw ads straight into the jobs collection
+               (status "Imported", no analysis).
+
+Progress is checkpointed after every durable batch; run the same command again
+to resume where it stopped. The batch in flight at a crash is sent again: Mongo
+skips the URLs that already landed, but Kafka gets them a second time, and the
+worker analyses those jobs again. Only the URL set grows with the data; records
+are never held beyond one batch.
+
+    python bulk_import.py ads-2024.jsonl.gz
+    python bulk_import.py export.csv --to mongo --batch 5000 --rejects bad.jsonl
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+import argparse
+import bz2
+import csv
+import gzip
+import io
+import itertools
+import json
+import lzma
+import os
+import sys
+import time
+import uuid
+
+from config.settings import KAFKA_BROKERS, KAFKA_TOPIC, MONGO_URI, MONGO_DB, MONGO_COLL
+from database.job_record import InvalidRecord, JobRecord, encode_value
+from kafkaClass.retry import H_PRIORITY
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl", ".csv": "csv"}
+NUMERIC = ("salaryStart", "salaryEnd")
+# Imported ads get stable ids, so a re-run produces the same job id for the same URL
+ID_NAMESPACE = uuid.UUID("6f1c7f4e-3b9a-4c55-9d56-1f0c2d7a8e10")
+PROGRESS_EVERY = 5.0  # seconds between progress lines
+
+
+def open_text(path:str) -> io.TextIOBase:
+    _, ext = os.path.splitext(path.lower())
+    opener = OPENERS.get(ext, open)
+    return opener(path, "rt", encoding="utf-8", newline="")
+
+
+def detect_format(path:str) -> str:
+    name = path.lower()
+    for ext in OPENERS:
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    fmt = FORMATS.get(os.path.splitext(name)[1])
+    if fmt is None:
+        raise SystemExit(f"cannot tell the format of {path}: use --format jsonl|csv")
+    return fmt
+
+
+def read_rows(path:str, fmt:str) -> Iterator[Dict[str, Any]]:
+    """One dict per record, in file order. A broken JSONL line yields {"__error__": ...}."""
+    with open_text(path) as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield _from_csv(row)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield {"__error__": f"not JSON: {e}", "__raw__": line.rstrip("\n")}
+                continue
+            yield row if isinstance(row, dict) else {"__error__": "not an object", "__raw__": line.rstrip("\n")}
+
+
+def _from_csv(row:Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """CSV has only strings: empty cells are missing, salaries are numbers."""
+    out: Dict[str, Any] = {k: v for k, v in row.items() if k and v not in (None, "")}
+    for name in NUMERIC:
+        if name in out:
+            try:
+                out[name] = float(out[name])
+            except ValueError:
+                pass  # left as text, so validation reports it
+    return out
+
+
+def to_record(row:Dict[str, Any]):
+    """JobRecord, or InvalidRecord with the reason."""
+    if "__error__" in row:
+        return InvalidRecord(str(row.get("__raw__", "")).encode("utf-8"), row["__error__"])
+    if not row.get("id") and isinstance(row.get("url"), str):
+        row = {**row, "id": str(uuid.uuid5(ID_NAMESPACE, row["url"]))}
+    try:
+        return JobRecord.from_dict(row)
+    except (TypeError, ValueError) as e:
+        return InvalidRecord(json.dumps(row, default=str).encode("utf-8"), str(e))
+
+
+def known_urls(coll) -> Set[str]:
+    """Every URL the jobs collection already holds (served by the unique url index)."""
+    return {doc["url"] for doc in coll.find({}, {"url": 1, "_id": 0}).batch_size(10000) if doc.get("url")}
+
+
+def batches(items:Iterable[Any], size:int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Checkpoint:
+    """Records consumed from one input file, persisted atomically after each batch."""
+
+    def __init__(self, path:str, source:str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.consumed = 0
+        self.stats: Dict[str, int] = {}
+        self.done = False
+
+    def load(self) -> "Checkpoint":
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self
+        if data.get("source") != self.source:
+            raise SystemExit(f"{self.path} belongs to {data.get('source')}; pass --checkpoint or --restart")
+        self.consumed = int(data.get("consumed", 0))
+        self.stats = dict(data.get("stats") or {})
+        self.done = bool(data.get("done"))
+        return self
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.source, "consumed": self.consumed, "stats": self.stats, "done": self.done,
+                       "updatedAt": datetime.now(timezone.utc).isoformat()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class KafkaSink:
+    """Produces a batch and returns once every record is acknowledged by the brokers."""
+
+    def __init__(self, topic:str=KAFKA_TOPIC, brokers:str=KAFKA_BROKERS):
+        from kafka import KafkaProducer # type: ignore
+        self.topic = topic
+        self.producer = KafkaProducer(bootstrap_servers=brokers, acks="all", linger_ms=50,
+                                      batch_size=512 * 1024, compression_type="gzip",
+                                      value_serializer=encode_value)
+
+    def write(self, records:List[JobRecord]) -> int:
+        headers = [(H_PRIORITY, b"bulk")]
+        futures = [self.producer.send(self.topic, value=r, key=r.url.encode("utf-8"), headers=headers) for r in records]
+        self.producer.flush()
+        for fut in futures:
+            fut.get(timeout=0)  # raises if any record was not accepted
+        return len(records)
+
+    def close(self) -> None:
+        self.producer.close()
+
+
+class MongoSink:
+    """Inserts the raw ads with one unordered bulk upsert per batch; existing URLs are left alone."""
+
+    def __init__(self, coll):
+        self.coll = coll
+
+    def write(self, records:List[JobRecord]) -> int:
+        from pymongo import UpdateOne
+        now = datetime.now(timezone.utc)
+        ops = [UpdateOne({"url": r.url}, {"$setOnInsert": {**r.to_bson(), "status": "Imported", "processedAt": now}},
+                         upsert=True) for r in records]
+        result = self.coll.bulk_write(ops, ordered=False)
+        return result.upserted_count
+
+    def close(self) -> None:
+        return
+
+
+def run(source:str, sink, seen:Set[str], checkpoint:Checkpoint, fmt:str, batch:int=1000,
+        rejects:Optional[io.TextIOBase]=None, out=sys.stderr) -> Dict[str, int]:
+    stats = {"read": 0, "written": 0, "duplicate": 0, "invalid": 0, **checkpoint.stats}
+    rows = itertools.islice(read_rows(source, fmt), checkpoint.consumed, None)
+    started = time.monotonic()
+    next_report = started + PROGRESS_EVERY
+    fresh = 0  # records read in this run, for the rate
+
+    for chunk in batches(rows, batch):
+        accepted: List[JobRecord] = []
+        for row in chunk:
+            record = to_record(row)
+            if isinstance(record, InvalidRecord):
+                stats["invalid"] += 1
+                if rejects is not None:
+                    rejects.write(json.dumps({"error": record.error, "raw": record.raw.decode("utf-8", "replace")}) + "\n")
+                continue
+            if record.url in seen:
+                stats["duplicate"] += 1
+                continue
+            seen.add(record.url)
+            accepted.append(record)
+
+        if accepted:
+            stats["written"] += sink.write(accepted)
+        if rejects is not None:
+            rejects.flush()
+        stats["read"] += len(chunk)
+        fresh += len(chunk)
+        # Only now is the batch durable. A crash before this line repeats it on resume: --to mongo skips the
+        # URLs that landed (they are in `seen`), --to kafka produces them again (the topic is not checked)
+        checkpoint.consumed += len(chunk)
+        checkpoint.stats = dict(stats)
+        checkpoint.save()
+
+        if time.monotonic() >= next_report:
+            next_report += PROGRESS_EVERY
+            print(_progress(stats, fresh, time.monotonic() - started), file=out)
+
+    checkpoint.done = True
+    checkpoint.save()
+    print(_progress(stats, fresh, time.monotonic() - started), file=out)
+    return stats
+
+
+def _progress(stats:Dict[str, int], fresh:int, elapsed:float) -> str:
+    rate = fresh / max(elapsed, 1e-9)
+    return (f"[import] {stats['read']:,} read, {stats['written']:,} written, {stats['duplicate']:,} duplicate, "
+            f"{stats['invalid']:,} invalid ({rate:,.0f} records/s)")
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("source", help="JSONL or CSV file, optionally .gz/.bz2/.xz")
+    ap.add_argument("--to", choices=("kafka", "mongo"), default="kafka")
+    ap.add_argument("--format", choices=("jsonl", "csv"), help="default: from the file extension")
+    ap.add_argument("--batch", type=int, default=1000, help="records per produce / bulk write and per checkpoint")
+    ap.add_argument("--topic", default=KAFKA_TOPIC)
+    ap.add_argument("--checkpoint", help="default: <source>.checkpoint.json")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    ap.add_argument("--rejects", help="append invalid records here as JSONL")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fmt = args.format or detect_format(args.source)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.source}.checkpoint.json", args.source)
+    if not args.restart:
+        checkpoint.load()
+    if checkpoint.done:
+        print(f"✅ {args.source} was already imported ({checkpoint.stats}); use --restart to import it again")
+        return
+    if checkpoint.consumed:
+        print(f"[import] resuming after record {checkpoint.consumed:,}")
+
+    from pymongo import MongoClient
+    coll = MongoClient(MONGO_URI).get_database(MONGO_DB).get_collection(MONGO_COLL)
+    seen = known_urls(coll)
+    print(f"[import] {len(seen):,} URL(s) already stored")
+
+    sink = KafkaSink(topic=args.topic) if args.to == "kafka" else MongoSink(coll)
+    rejects = open(args.rejects, "a", encoding="utf-8") if args.rejects else None
+    try:
+        stats = run(args.source, sink, seen, checkpoint, fmt, batch=args.batch, rejects=rejects)
+    finally:
+        sink.close()
+        if rejects is not None:
+            rejects.close()
+    print(f"✅ imported {stats['written']:,} job(s) from {args.source} into {args.to}")
+
+
+if __name__ == "__main__":
+    main()
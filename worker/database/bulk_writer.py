@@ -0,0 +1,193 @@
+
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import threading
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from metrics.instruments import MONGO_WRITE_SECONDS, MONGO_WRITE_OPS
+from .job_record import JobRecord
+
+
+class BulkWriteFailed(Exception):
+  """A queued write for one job could not be applied."""
+
+  def __init__(self, job_id:str, error:Any):
+    super().__init__(f"write for job {job_id} failed: {error}")
+    self.job_id = job_id
+    self.error = error
+
+
+class _PendingUpdate:
+  __slots__ = ("set", "set_on_insert", "upsert", "futures")
+
+  def __init__(self):
+    self.set: Dict[str, Any] = {}
+    self.set_on_insert: Dict[str, Any] = {}
+    self.upsert = False
+    self.futures: List[Future] = []
+
+  def merge(self, set_fields:Dict[str, Any], set_on_insert:Optional[Dict[str, Any]], upsert:bool) -> None:
+    # Later $set wins; a field may not appear in both $set and $setOnInsert
+    for k, v in set_fields.items():
+      self.set[k] = v
+      self.set_on_insert.pop(k, None)
+    for k, v in (set_on_insert or {}).items():
+      if k not in self.set:
+        self.set_on_insert.setdefault(k, v)
+    self.upsert = self.upsert or upsert
+
+  def to_op(self, job_id:str) -> UpdateOne:
+    update: Dict[str, Any] = {}
+    if self.set:
+      update["$set"] = self.set
+    if self.set_on_insert:
+      update["$setOnInsert"] = self.set_on_insert
+    return UpdateOne({"id": job_id}, update, upsert=self.upsert)
+
+
+class BulkMongoWriter:
+  """
+  Buffers job writes and sends them as unordered `bulk_write` batches.
+
+  All updates queued for the same job id before a flush are merged into a single
+  UpdateOne, so `save_job` + `set_status("In progress")` + `set_status("Complete")`
+  cost one operation when they land in the same window. A flush happens once
+  `max_ops` jobs are buffered or `flush_interval_ms` has passed.
+
+  Every call returns a Future resolved with the write result, or failed with
+  BulkWriteFailed, so callers can tell which job did not persist.
+  """
+
+  def __init__(self, coll, max_ops:int=500, flush_interval_ms:int=200):
+    self._coll = coll
+    self.max_ops = max_ops
+    self.flush_interval = flush_interval_ms / 1000
+
+    self._lock = threading.Lock()
+    self._wakeup = threading.Condition(self._lock)
+    self._flush_lock = threading.Lock()
+    self._buffer: Dict[str, _PendingUpdate] = {}
+    self._closed = False
+
+    self._thread = threading.Thread(target=self._loop, name="mongo-bulk", daemon=True)
+    self._thread.start()
+
+
+  def update(self, job_id:str, set_fields:Dict[str, Any], set_on_insert:Optional[Dict[str, Any]]=None,
+             upsert:bool=True) -> Future:
+    fut: Future = Future()
+    with self._lock:
+      if self._closed:
+        raise RuntimeError("BulkMongoWriter is closed")
+      pending = self._buffer.get(job_id)
+      if pending is None:
+        pending = self._buffer[job_id] = _PendingUpdate()
+      pending.merge(set_fields, set_on_insert, upsert)
+      pending.futures.append(fut)
+      if len(self._buffer) >= self.max_ops:
+        self._wakeup.notify()
+    return fut
+
+
+  def save_job(self, payload:JobRecord) -> Future:
+    return self.update(payload.id, payload.to_bson(), {"processedAt": datetime.now(timezone.utc)})
+
+
+  def set_status(self, jobId:str, status:str="In progress") -> Future:
+    return self.update(jobId, {"status": status})
+
+
+  def _loop(self) -> None:
+    while True:
+      with self._lock:
+        if not self._closed and len(self._buffer) < self.max_ops:
+          self._wakeup.wait(self.flush_interval)
+        closed = self._closed
+      self.flush()
+      if closed:
+        return
+
+
+  def flush(self) -> None:
+    # One flush at a time keeps writes for a job id in the order they were queued
+    with self._flush_lock:
+      with self._lock:
+        batch = self._buffer
+        self._buffer = {}
+      if not batch:
+        return
+
+      ids = list(batch.keys())
+      ops = [batch[jid].to_op(jid) for jid in ids]
+      errors: Dict[int, Any] = {}
+      upserted: Dict[int, Any] = {}
+
+      MONGO_WRITE_OPS.inc(len(ops), op="bulk_write")
+      started = time.perf_counter()
+      try:
+        res = self._coll.bulk_write(ops, ordered=False)
+        upserted = res.upserted_ids or {}
+      except BulkWriteError as e:
+        upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+        for err in e.details.get("writeErrors", []):
+          errors[err["index"]] = err
+      except Exception as e:
+        MONGO_WRITE_SECONDS.observe(time.perf_counter() - started, op="bulk_write")
+        # Whole batch failed (network, auth, ...): every job in it failed.
+        # Never let it escape: the flusher thread must survive to resolve later batches.
+        for jid in ids:
+          self._resolve(batch[jid], exc=BulkWriteFailed(jid, e))
+        return
+      MONGO_WRITE_SECONDS.observe(time.perf_counter() - started, op="bulk_write")
+
+      for i, jid in enumerate(ids):
+        pending = batch[jid]
+        err = errors.get(i)
+        if err is None:
+          self._resolve(pending, result={"ok": True, "id": jid, "upserted": i in upserted})
+        elif err.get("code") == 11000:
+          self._retry_duplicate(jid, pending)
+        else:
+          self._resolve(pending, exc=BulkWriteFailed(jid, err.get("errmsg", err)))
+
+
+  def _retry_duplicate(self, jid:str, pending:_PendingUpdate) -> None:
+    # In rare race cases, two writers can upsert the same URL at once.
+    # We handle by doing a second update without upsert.
+    MONGO_WRITE_OPS.inc(op="update_one")
+    try:
+      res = self._coll.update_one({"id": jid}, {"$set": pending.set})
+      if res.matched_count == 0:
+        # the upsert collided with another job's document and this one does not exist: nothing was written
+        self._resolve(pending, exc=BulkWriteFailed(jid, "duplicate key, and no document with this id to update"))
+        return
+      self._resolve(pending, result={
+        "ok": True,
+        "id": jid,
+        "upserted": False,
+        "matched_count": res.matched_count,
+        "note": "duplicate race handled",
+      })
+    except PyMongoError as e:
+      self._resolve(pending, exc=BulkWriteFailed(jid, e))
+
+
+  @staticmethod
+  def _resolve(pending:_PendingUpdate, result:Any=None, exc:Optional[BaseException]=None) -> None:
+    for fut in pending.futures:
+      if exc is not None:
+        fut.set_exception(exc)
+      else:
+        fut.set_result(result)
+
+
+  def close(self) -> None:
+    """Flush what is buffered and stop the background flusher."""
+    with self._lock:
+      self._closed = True
+      self._wakeup.notify()
+    self._thread.join()
@@ -0,0 +1,154 @@
+"""
+The job message as the API produces it to `job.created`, decoded once at the
+Kafka edge.
+
+`JobRecord.decode` turns message bytes into a validated, slotted record, or an
+`InvalidRecord` that keeps the raw bytes for the dead-letter topic. Decoding
+never raises, so a malformed message cannot stall its partition.
+"""
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict, NamedTuple, Optional, Union
+import json
+
+
+class InvalidRecord(NamedTuple):
+  raw: bytes
+  error: str
+  id: Optional[str] = None  # when the payload got far enough to name its job
+
+
+class JobRecord:
+  """
+  Mirrors the API's JobAdSchema (server/src/schema) plus the `id` it assigns.
+  Dates become UTC datetimes, since BSON has no plain date.
+  """
+
+  __slots__ = ("id", "url", "companyName", "recruiterName", "jobTitle", "jobDescription",
+               "salaryStart", "salaryEnd", "openDate", "closeDate")
+
+  def __init__(self, id:str, url:str, jobTitle:str, jobDescription:str,
+               companyName:Optional[str]=None, recruiterName:Optional[str]=None,
+               salaryStart:Optional[Union[int, float]]=None, salaryEnd:Optional[Union[int, float]]=None,
+               openDate:Optional[datetime]=None, closeDate:Optional[datetime]=None):
+    self.id = id
+    self.url = url
+    self.companyName = companyName
+    self.recruiterName = recruiterName
+    self.jobTitle = jobTitle
+    self.jobDescription = jobDescription
+    self.salaryStart = salaryStart
+    self.salaryEnd = salaryEnd
+    self.openDate = openDate
+    self.closeDate = closeDate
+
+
+  @classmethod
+  def decode(cls, raw:bytes) -> Union["JobRecord", InvalidRecord]:
+    """Kafka value_deserializer: bytes -> JobRecord, or InvalidRecord explaining why not."""
+    try:
+      data = json.loads(raw)
+    except ValueError as e:
+      return InvalidRecord(raw, f"not JSON: {e}")
+    if not isinstance(data, dict):
+      return InvalidRecord(raw, f"expected an object, got {type(data).__name__}")
+    try:
+      return cls.from_dict(data)
+    except (TypeError, ValueError) as e:
+      jid = data.get("id")
+      return InvalidRecord(raw, str(e), jid if isinstance(jid, str) and jid else None)
+
+
+  @classmethod
+  def from_dict(cls, data:Dict[str, Any]) -> "JobRecord":
+    """Validate a decoded payload. Raises ValueError naming the first bad field."""
+    record = cls(
+      id=_text(data, "id"),
+      url=_text(data, "url"),
+      jobTitle=_text(data, "jobTitle"),
+      jobDescription=_text(data, "jobDescription"),
+      companyName=_text(data, "companyName", required=False),
+      recruiterName=_text(data, "recruiterName", required=False),
+      salaryStart=_salary(data, "salaryStart"),
+      salaryEnd=_salary(data, "salaryEnd"),
+      openDate=_date(data, "openDate"),
+      closeDate=_date(data, "closeDate"),
+    )
+    if record.salaryStart is not None and record.salaryEnd is not None and record.salaryStart > record.salaryEnd:
+      raise ValueError("salaryEnd must be larger than salaryStart")
+    if record.openDate is not None and record.closeDate is not None and record.openDate > record.closeDate:
+      raise ValueError("closeDate must be on/after openDate")
+    return record
+
+
+  def to_bson(self) -> Dict[str, Any]:
+    """The stored job fields, built straight from the slots."""
+    return {name: getattr(self, name) for name in self.__slots__}
+
+
+  def to_json(self) -> bytes:
+    """Message bytes again (retry and dead-letter topics); decode(to_json()) round-trips."""
+    doc = self.to_bson()
+    for name in ("openDate", "closeDate"):
+      if doc[name] is not None:
+        doc[name] = doc[name].isoformat().replace("+00:00", "Z")
+    return json.dumps(doc).encode("utf-8")
+
+
+  # Read like the Mongo document it becomes, for code shared with stored jobs
+  def get(self, name:str, default:Any=None) -> Any:
+    value = getattr(self, name, None) if name in self.__slots__ else None
+    return default if value is None else value
+
+  def __getitem__(self, name:str) -> Any:
+    if name not in self.__slots__:
+      raise KeyError(name)
+    return getattr(self, name)
+
+
+  def __eq__(self, other:object) -> bool:
+    return isinstance(other, JobRecord) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+  def __repr__(self) -> str:
+    return f"JobRecord(id={self.id!r}, url={self.url!r})"
+
+
+def encode_value(value:Any) -> bytes:
+  """Kafka value_serializer for anything the worker re-produces."""
+  if isinstance(value, JobRecord):
+    return value.to_json()
+  if isinstance(value, InvalidRecord):
+    return value.raw  # dead letters keep the bytes exactly as they arrived
+  return json.dumps(value).encode("utf-8")
+
+
+def _text(data:Dict[str, Any], name:str, required:bool=True) -> Optional[str]:
+  value = data.get(name)
+  if value is None and not required:
+    return None
+  if not isinstance(value, str) or (required and not value.strip()):
+    raise ValueError(f"{name}: expected a non-empty string, got {value!r:.80}")
+  return value
+
+
+def _salary(data:Dict[str, Any], name:str) -> Optional[Union[int, float]]:
+  value = data.get(name)
+  if value is None:
+    return None
+  if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+    raise ValueError(f"{name}: expected a non-negative number, got {value!r:.80}")
+  return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def _date(data:Dict[str, Any], name:str) -> Optional[datetime]:
+  value = data.get(name)
+  if value is None:
+    return None
+  if not isinstance(value, str):
+    raise ValueError(f"{name}: expected an ISO date, got {value!r:.80}")
+  try:
+    if len(value) == 10:
+      return datetime.combine(date.fromisoformat(value), time(), timezone.utc)
+    parsed = datetime.fromisoformat(value)
+  except ValueError:
+    raise ValueError(f"{name}: expected an ISO date, got {value!r:.80}") from None
+  return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed.astimezone(timezone.utc)
@@ -0,0 +1,169 @@
+"""
+Index migrations for the worker's collections. Run once per deploy, not on every boot:
+
+    python -m database.migrations            # create missing indexes
+    python -m database.migrations --status   # list missing indexes, exit 1 if any
+    python -m database.migrations --check    # explain the hot queries, exit 1 on a COLLSCAN
+
+Indexes are declared below; creating one that exists is a no-op, so running
+this again is always safe. HOT_QUERIES lists the filters the worker and the API
+run on every request; --check fails the deploy if one of them is not served by
+an index.
+"""
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import sys
+
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from config.settings import MONGO_URI, MONGO_DB, MONGO_COLL, MONGO_ROLLUP_COLL
+
+
+class IndexSpec(NamedTuple):
+  collection: str
+  keys: List[Tuple[str, Any]]
+  options: Dict[str, Any] = {}
+
+  @property
+  def name(self) -> str:
+    # pymongo's default name, so indexes created before this module are recognised
+    return self.options.get("name") or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+INDEXES: List[IndexSpec] = [
+  # one document per ad URL; the API rejects duplicates on it too
+  IndexSpec(MONGO_COLL, [("url", ASCENDING)], {"unique": True}),
+  # every worker write and the API's GET/PATCH/DELETE /:id filter on the job id
+  IndexSpec(MONGO_COLL, [("id", ASCENDING)], {"unique": True}),
+  # queue views: jobs in one status, newest first
+  IndexSpec(MONGO_COLL, [("status", ASCENDING), ("processedAt", DESCENDING)]),
+  # search: ad text, and the skills the analysis matched
+  IndexSpec(MONGO_COLL, [("jobTitle", TEXT), ("companyName", TEXT), ("jobDescription", TEXT)],
+            {"name": "job_search", "weights": {"jobTitle": 10, "companyName": 5, "jobDescription": 1}}),
+  IndexSpec(MONGO_COLL, [("analysis.skills.matched", ASCENDING)]),
+  # near-duplicate lookup (exact hash, then SimHash LSH bands)
+  IndexSpec(MONGO_COLL, [("fingerprint.hash", ASCENDING)]),
+  IndexSpec(MONGO_COLL, [("fingerprint.bands", ASCENDING)]),
+  # dashboard trend queries: one dimension, a range of keys (days)
+  IndexSpec(MONGO_ROLLUP_COLL, [("dim", ASCENDING), ("key", ASCENDING)]),
+]
+
+
+class HotQuery(NamedTuple):
+  name: str
+  collection: str
+  filter: Dict[str, Any]
+  sort: Optional[List[Tuple[str, Any]]] = None
+
+
+HOT_QUERIES: List[HotQuery] = [
+  HotQuery("job by id", MONGO_COLL, {"id": "00000000-0000-0000-0000-000000000000"}),
+  HotQuery("job by url", MONGO_COLL, {"url": "https://example.com/job"}),
+  HotQuery("list newest", MONGO_COLL, {}, [("_id", DESCENDING)]),
+  HotQuery("queue view", MONGO_COLL, {"status": "In progress"}, [("processedAt", DESCENDING)]),
+  HotQuery("near duplicate", MONGO_COLL,
+           {"status": "Complete", "$or": [{"fingerprint.hash": "0"}, {"fingerprint.bands": {"$in": ["0:0"]}}]}),
+  HotQuery("search text", MONGO_COLL, {"$text": {"$search": "python"}}),
+  HotQuery("search skill", MONGO_COLL, {"analysis.skills.matched": "Python"}),
+  HotQuery("skill trend", MONGO_ROLLUP_COLL, {"dim": "day", "key": {"$gte": "2025-01-01"}}),
+]
+
+
+def missing_indexes(db, specs:List[IndexSpec]=INDEXES) -> List[IndexSpec]:
+  existing: Dict[str, set] = {}
+  for spec in specs:
+    if spec.collection not in existing:
+      existing[spec.collection] = set(db.get_collection(spec.collection).index_information())
+  return [spec for spec in specs if spec.name not in existing[spec.collection]]
+
+
+def migrate(db, specs:List[IndexSpec]=INDEXES) -> Tuple[List[str], Dict[str, str]]:
+  """
+  Create every declared index that does not exist yet. Returns (created names,
+  {name: error}); one failing index (e.g. duplicate ids under a unique index)
+  does not stop the others.
+  """
+  created, failed = [], {}
+  for spec in missing_indexes(db, specs):
+    name = f"{spec.collection}.{spec.name}"
+    try:
+      db.get_collection(spec.collection).create_index(spec.keys, **{**spec.options, "name": spec.name})
+      created.append(name)
+    except OperationFailure as e:
+      failed[name] = str(e)
+  return created, failed
+
+
+def _stages(plan:Any) -> Iterator[Dict[str, Any]]:
+  """Every stage of an explain plan, whatever the server version nests them in."""
+  if isinstance(plan, dict):
+    if "stage" in plan:
+      yield plan
+    for value in plan.values():
+      yield from _stages(value)
+  elif isinstance(plan, list):
+    for value in plan:
+      yield from _stages(value)
+
+
+def plan_of(db, query:HotQuery) -> Tuple[str, List[str]]:
+  """(winning plan summary, indexes used) of `query`."""
+  cursor = db.get_collection(query.collection).find(query.filter).limit(20)
+  if query.sort:
+    cursor = cursor.sort(query.sort)
+  winning = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+  stages = list(_stages(winning))
+  names = [s["stage"] for s in stages]
+  indexes = sorted({s["indexName"] for s in stages if s.get("indexName")})
+  return " > ".join(dict.fromkeys(names)), indexes
+
+
+def check_plans(db, queries:List[HotQuery]=HOT_QUERIES) -> List[Tuple[HotQuery, str, List[str]]]:
+  """Explain every hot query; returns those that scan a whole collection, with their plans."""
+  slow = []
+  for query in queries:
+    try:
+      plan, indexes = plan_of(db, query)
+    except OperationFailure as e:
+      # e.g. $text without its index
+      slow.append((query, f"error: {e}", []))
+      continue
+    print(f"  {query.name:<15} {plan}" + (f"  [{', '.join(indexes)}]" if indexes else ""))
+    if "COLLSCAN" in plan:
+      slow.append((query, plan, indexes))
+  return slow
+
+
+def main(argv=None):
+  ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  ap.add_argument("--status", action="store_true", help="only report missing indexes")
+  ap.add_argument("--check", action="store_true", help="explain the hot queries; exit 1 if one is a COLLSCAN")
+  args = ap.parse_args(argv)
+
+  db = MongoClient(MONGO_URI).get_database(MONGO_DB)
+  if args.check:
+    slow = check_plans(db)
+    for query, plan, _ in slow:
+      print(f"❌ {query.name} on {query.collection} is not served by an index: {plan}")
+    print(f"{len(HOT_QUERIES) - len(slow)}/{len(HOT_QUERIES)} hot queries use an index")
+    sys.exit(1 if slow else 0)
+
+  if args.status:
+    missing = missing_indexes(db)
+    for spec in missing:
+      print(f"missing: {spec.collection}.{spec.name}")
+    print(f"{len(missing)} missing index(es)")
+    sys.exit(1 if missing else 0)
+
+  created, failed = migrate(db)
+  for name in created:
+    print(f"✅ created {name}")
+  for name, error in failed.items():
+    print(f"❌ {name}: {error}")
+  print(f"{len(created)} index(es) created, {len(failed)} failed, "
+        f"{len(INDEXES) - len(created) - len(failed)} already present")
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+  main()
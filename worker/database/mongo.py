@@ -1,27 +1,22 @@
 
-from datetime import datetime, date, timezone
-from typing import TypedDict, Optional
+from datetime import datetime, timezone
+from typing import Optional, Any, Dict
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient
 from pymongo.errors import DuplicateKeyError, PyMongoError
-from config.settings import MONGO_URI, MONGO_DB, MONGO_COLL
+from config.settings import MONGO_URI, MONGO_DB, MONGO_COLL, MONGO_BULK_MAX_OPS, MONGO_BULK_FLUSH_MS
+from config.settings import MONGO_ROLLUP_COLL, ROLLUP_FLUSH_MS
 
+from .bulk_writer import BulkMongoWriter
+from .job_record import JobRecord
+from .rollups import RollupWriter
+from . import migrations
+from helper.text.fingerprint import Fingerprint
 
-class JobPayLoad(TypedDict):
-   id: str 
-   url: str
-   companyName: str
-   recruiterName: str
-   jobTitle: str
-   jobDescription: str
-   salaryStart: Optional[int]
-   salaryEnd: Optional[int]
-   openDate: Optional[date]
-   closeDate: Optional[date]
 
 class MongoDB:
-  def __init__(self):
-    self.__client = None
+  def __init__(self, client:Optional[MongoClient]=None):
+    self.__client = client
     self.__db = None
     self.__coll = None
     self._connect_db()
@@ -30,17 +25,75 @@ class MongoDB:
     if self.__coll is not None:
       return
 
-    self.__client = MongoClient(URI)
+    if self.__client is None:
+      # fail fast: startup retries the whole connect
+      self.__client = MongoClient(URI, serverSelectionTimeoutMS=5000)
     try:
         self.__client.admin.command("ping")
         print("✅ Connected to MongoDB!")
     except Exception as e:
         print("❌ Connection failed:", e)
+        raise
 
     self.__db = self.__client.get_database(DATABASE)
     self.__coll = self.__db.get_collection(COLLECTION)
+    # Indexes are created by `python -m database.migrations` at deploy time, not on every boot
 
-    self.__coll.create_index([("url", ASCENDING)], unique = True, background = True)
+
+  def ping(self) -> bool:
+    try:
+      self.__client.admin.command("ping")
+      return True
+    except Exception:
+      return False
+
+
+  def missing_indexes(self) -> list[str]:
+    """Declared indexes that the migration step has not created yet."""
+    if self.__db is None:
+      raise Exception("Database is not exist!")
+    return [f"{spec.collection}.{spec.name}" for spec in migrations.missing_indexes(self.__db)]
+
+
+  def bulk_writer(self, max_ops:int=MONGO_BULK_MAX_OPS, flush_interval_ms:int=MONGO_BULK_FLUSH_MS) -> BulkMongoWriter:
+    """Buffered writer over the jobs collection; see BulkMongoWriter."""
+    if self.__coll is None:
+      raise Exception("Collection is not exist!")
+    return BulkMongoWriter(self.__coll, max_ops=max_ops, flush_interval_ms=flush_interval_ms)
+
+
+  def rollup_writer(self, flush_interval_ms:int=ROLLUP_FLUSH_MS) -> RollupWriter:
+    """Skill-demand counters for the dashboard; see database/rollups.py."""
+    if self.__db is None or self.__coll is None:
+      raise Exception("Collection is not exist!")
+    return RollupWriter(self.__coll, self.__db.get_collection(MONGO_ROLLUP_COLL), flush_interval_ms=flush_interval_ms)
+
+
+  def find_duplicate(self, fp:Fingerprint, max_distance:int=3, exclude:Optional[str]=None) -> Optional[Dict[str, Any]]:
+    """
+    An analysed job whose text is the same as, or within `max_distance` SimHash
+    bits of, `fp`. Exact hash matches win, then the closest signature.
+    Returns {"id", "analysis", "distance"} with `id` being the first analysed copy.
+    """
+    if self.__coll is None:
+      raise Exception("Collection is not exist!")
+
+    query: Dict[str, Any] = {
+      "status": "Complete",
+      "$or": [{"fingerprint.hash": fp.hash}, {"fingerprint.bands": {"$in": fp.bands}}],
+    }
+    if exclude is not None:
+      query["id"] = {"$ne": exclude}
+
+    best = None
+    for doc in self.__coll.find(query, {"id": 1, "duplicateOf": 1, "analysis": 1, "fingerprint": 1}).limit(50):
+      stored = doc.get("fingerprint") or {}
+      dist = 0 if stored.get("hash") == fp.hash else fp.distance(stored)
+      if dist <= max_distance and doc.get("analysis") is not None and (best is None or dist < best["distance"]):
+        best = {"id": doc.get("duplicateOf") or doc["id"], "analysis": doc["analysis"], "distance": dist}
+        if dist == 0:
+          break
+    return best
 
   
   def set_status(self, jobId:str, status:str="In progress"):
@@ -48,20 +101,18 @@ class MongoDB:
       if self.__coll is None:
           raise Exception("Collection is not exist!")
       
-      res = self.__coll.update_one(
+      self.__coll.update_one(
           {"id": jobId},
           {"$set": {"status": status}},
           upsert=True
       )
 
-      print(res.raw_result)
-
     except Exception as e:
        print(f"Error: {e}")
 
 
-  def save_job(self, payload: JobPayLoad):
-    doc = dict(payload)
+  def save_job(self, payload: JobRecord):
+    doc = payload.to_bson()
     
 
     try:
@@ -73,15 +124,13 @@ class MongoDB:
          {"$set": doc, "$setOnInsert": {"processedAt": datetime.now(timezone.utc)}},
          upsert=True
       )
-
-      print({
+      return {
         "ok": True,
         "upserted": res.upserted_id is not None,
         "id": doc["id"],
         "matched_count": res.matched_count,
         "modified_count": res.modified_count,
-      })
-    
+      }
 
     except DuplicateKeyError:
         # In rare race cases, two writers can upsert the same URL at once.
@@ -90,14 +139,14 @@ class MongoDB:
             raise Exception("Collection is not existed!")
         
         res2 = self.__coll.update_one({"id": doc["id"]}, {"$set": doc})
-        print({
+        return {
             "ok": True,
             "upserted": False,
             "matched_count": res2.matched_count,
             "modified_count": res2.modified_count,
             "id": doc["id"],
             "note": "duplicate race handled",
-        })
+        }
     except PyMongoError as e:
         # Any other DB failure
         print( {"ok": False, "error": str(e), "id": doc.get("id")})
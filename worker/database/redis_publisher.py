@@ -1,46 +1,142 @@
 import redis # type: ignore
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import json
+import threading
+
+from config.settings import STATUS_FLUSH_MS, REDIS_URI
 
 
 STATUS_TTL = 7 * 24 * 3600  # 7 days
+STATUS_CHANNEL = "job.status"   # every transition, for server-side listeners
+
+
+def events_channel(jid) -> str:
+  """Per-job pub/sub channel clients subscribe to instead of polling `job:<id>`."""
+  return f"job:{jid}:events"
+
+
 class RedisPublisher:
-  def __init__(self):
-    self.__client = None
-    self._connect()
+  def __init__(self, flush_interval_ms:int=STATUS_FLUSH_MS, client=None, uri:str=REDIS_URI, required:bool=False):
+    self.__client = client
+    self._connect(uri, required)
+
+    # Transitions from every in-flight job, flushed together in one pipeline
+    self._flush_interval = flush_interval_ms / 1000
+    self._lock = threading.Lock()
+    self._wakeup = threading.Event()
+    self._fields: Dict[str, Dict[str, Any]] = {}
+    self._events: List[Tuple[str, str]] = []
+    self._closed = False
+    self._thread = None
+    if self.__client is not None:
+      self._thread = threading.Thread(target=self._loop, name="redis-status", daemon=True)
+      self._thread.start()
 
 
-  def _connect(self):
+  def _connect(self, uri:str, required:bool):
     try:
-      self.__client = redis.Redis(host="localhost", port=6379, decode_responses=True,  password="admin")
+      if self.__client is None:
+        self.__client = redis.Redis.from_url(uri, decode_responses=True, socket_connect_timeout=5)
       self.__client.ping()
       print("✅ Connected to Redis")
     except Exception as e:
+        if required:
+          raise
         print("[worker] Redis not ready (continuing):", e)
         self.__client = None
 
 
+  @staticmethod
+  def _payload(jid, status:str, progress:Optional[int]=None, stage:Optional[str]=None, result:Any=None) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+      "id": jid,
+      "status": status,
+      "updatedAt": datetime.now().isoformat()
+    }
+    if progress is not None:
+      payload["progress"] = progress
+    if stage is not None:
+      payload["stage"] = stage
+    if result is not None:
+      # the API JSON-parses `result` when reading the hash
+      payload["result"] = json.dumps(result, default=str)
+    return payload
+
+
+  def publish_progress(self, jid, status:str, progress:Optional[int]=None, stage:Optional[str]=None, result:Any=None) -> bool:
+    """
+    Queue a progress transition for job `jid`.
+
+    The `job:<id>` hash keeps the latest fields, and every transition is published
+    on `job:<id>:events` and `job.status`. Transitions from all jobs are written by
+    one pipelined round trip per flush interval.
+    """
+    if not self.__client:
+      return False
+
+    payload = self._payload(jid, status, progress, stage, result)
+    message = json.dumps(payload)
+    with self._lock:
+      self._fields.setdefault(str(jid), {}).update(payload)
+      self._events.append((str(jid), message))
+    return True
+
+
+  def _loop(self):
+    while not self._closed:
+      self._wakeup.wait(self._flush_interval)
+      self._wakeup.clear()
+      self.flush()
+
+
+  def flush(self):
+    with self._lock:
+      fields, events = self._fields, self._events
+      self._fields, self._events = {}, []
+    if not fields or not self.__client:
+      return
+
+    try:
+      pipe = self.__client.pipeline(transaction=False)
+      for jid, mapping in fields.items():
+        key = f"job:{jid}"
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, STATUS_TTL)
+      for jid, message in events:
+        pipe.publish(events_channel(jid), message)
+        pipe.publish(STATUS_CHANNEL, message)
+      pipe.execute()
+    except Exception as e:
+      print(f"error: {e}")
+
+
   def set_status(self, jid, status:str = "In progress"):
     if not self.__client:
       return False
     
     key = f"job:{jid}"
     try:
-      payload: Dict[str, Any] ={
-        "id": jid,
-        "status": status,
-        "updatedAt": datetime.now().isoformat()
-      }
+      payload = self._payload(jid, status)
 
       pipe = self.__client.pipeline()
       pipe.hset(key, mapping=payload)
       pipe.expire(key, STATUS_TTL)
+      pipe.publish(events_channel(jid), json.dumps(payload))
       pipe.execute()
 
     except Exception as e:
       print(f"error: {e}")
 
 
+  def close(self):
+    self._closed = True
+    self._wakeup.set()
+    if self._thread is not None:
+      self._thread.join()
+    self.flush()
+
+
 if __name__ == "__main__":
   r = RedisPublisher()
   r.set_status("1231")
\ No newline at end of file
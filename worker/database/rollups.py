@@ -0,0 +1,212 @@
+"""
+Pre-aggregated skill demand for the dashboard.
+
+One small document per bucket, counting analysed jobs and the skills they ask for:
+
+    {_id: "day:2025-03-01",      dim: "day",     key: "2025-03-01", jobs: 12, skills: {python: 7, react: 3}}
+    {_id: "company:topsort",     dim: "company", key: "topsort",    name: "Topsort", jobs: 4, skills: {...}}
+    {_id: "salary:100k-120k",    dim: "salary",  key: "100k-120k",  jobs: 9, skills: {...}}
+
+Skills are canonical ids (helper.skills.matcher.canonical_id), so "Node.js" and
+"NodeJS" count once. Reposts linked by duplicateOf are not counted.
+
+    python -m database.rollups --backfill    # rebuild every bucket from the jobs collection
+
+Run the backfill with the workers stopped: increments they flush while it runs
+go to the collection it replaces, and are lost.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import threading
+
+from pymongo import MongoClient, UpdateOne
+
+from config.settings import MONGO_URI, MONGO_DB, MONGO_COLL, MONGO_ROLLUP_COLL, ROLLUP_FLUSH_MS
+from .migrations import INDEXES
+from helper.skills.matcher import canonical_id
+
+
+SALARY_BAND = 20000
+
+
+def job_skills(analysis:Dict[str, Any]) -> List[str]:
+  """Canonical ids of every technical skill the analysis found, matched or missing."""
+  skills = analysis.get("skills") or {}
+  names = list(skills.get("matched") or []) + list(skills.get("missing") or [])
+  return sorted({cid for cid in (canonical_id(str(n)) for n in names) if cid})
+
+
+def _day(job:Dict[str, Any]) -> str:
+  """The ad's open date, else the day it was processed."""
+  for value in (job.get("openDate"), job.get("processedAt")):
+    if isinstance(value, datetime):
+      return value.astimezone(timezone.utc).date().isoformat() if value.tzinfo else value.date().isoformat()
+    if isinstance(value, date):
+      return value.isoformat()
+    if isinstance(value, str) and len(value) >= 10:
+      try:
+        return date.fromisoformat(value[:10]).isoformat()
+      except ValueError:
+        pass
+  return datetime.now(timezone.utc).date().isoformat()
+
+
+def _salary_band(job:Dict[str, Any]) -> str:
+  start, end = job.get("salaryStart"), job.get("salaryEnd")
+  values = [v for v in (start, end) if isinstance(v, (int, float)) and v > 0]
+  if not values:
+    return "unknown"
+  low = int(sum(values) / len(values)) // SALARY_BAND * SALARY_BAND
+  return f"{low // 1000}k-{(low + SALARY_BAND) // 1000}k"
+
+
+def buckets(job:Dict[str, Any]) -> List[Tuple[str, str, str, Optional[str]]]:
+  """(_id, dim, key, display name) of every bucket a job counts in."""
+  out = [(f"day:{_day(job)}", "day", _day(job), None)]
+  company = (job.get("companyName") or "").strip()
+  if company:
+    key = " ".join(company.lower().split())
+    out.append((f"company:{key}", "company", key, company))
+  band = _salary_band(job)
+  out.append((f"salary:{band}", "salary", band, None))
+  return out
+
+
+class RollupIncrements:
+  """$inc amounts per bucket, merged over many jobs so each bucket costs one upsert."""
+
+  def __init__(self):
+    self.inc: Dict[str, Counter] = defaultdict(Counter)
+    self.meta: Dict[str, Dict[str, Any]] = {}
+
+  def add(self, job:Dict[str, Any], analysis:Dict[str, Any]) -> None:
+    skills = job_skills(analysis)
+    for _id, dim, key, name in buckets(job):
+      counter = self.inc[_id]
+      counter["jobs"] += 1
+      for cid in skills:
+        counter[f"skills.{cid}"] += 1
+      meta = self.meta.setdefault(_id, {"dim": dim, "key": key})
+      if name:
+        meta["name"] = name
+
+  def __len__(self) -> int:
+    return len(self.inc)
+
+  def ops(self) -> List[UpdateOne]:
+    return [UpdateOne({"_id": _id}, {"$inc": dict(counter), "$set": self.meta[_id]}, upsert=True)
+            for _id, counter in self.inc.items()]
+
+
+class RollupWriter:
+  """
+  Counts completed jobs into the rollup buckets, flushed every `flush_interval_ms`.
+
+  A job is counted once: its document is marked `rolledUp` on flush, and jobs
+  already marked (a redelivered record) are skipped.
+  """
+
+  def __init__(self, jobs_coll, rollup_coll, flush_interval_ms:int=ROLLUP_FLUSH_MS):
+    self._jobs = jobs_coll
+    self._rollups = rollup_coll
+    self.flush_interval = flush_interval_ms / 1000
+
+    self._lock = threading.Lock()
+    self._flush_lock = threading.Lock()
+    self._pending: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._loop, name="mongo-rollups", daemon=True)
+    self._thread.start()
+
+
+  def add(self, job:Dict[str, Any], analysis:Dict[str, Any]) -> None:
+    with self._lock:
+      self._pending[job["id"]] = (job, analysis)
+
+
+  def _loop(self) -> None:
+    while not self._stop.wait(self.flush_interval):
+      self.flush()
+
+
+  def flush(self) -> None:
+    with self._flush_lock:
+      with self._lock:
+        pending, self._pending = self._pending, {}
+      if not pending:
+        return
+      try:
+        counted = {d["id"] for d in self._jobs.find({"id": {"$in": list(pending)}, "rolledUp": True}, {"id": 1})}
+        increments = RollupIncrements()
+        for jid, (job, analysis) in pending.items():
+          if jid not in counted:
+            increments.add(job, analysis)
+        if not len(increments):
+          return
+        self._rollups.bulk_write(increments.ops(), ordered=False)
+        self._jobs.update_many({"id": {"$in": [jid for jid in pending if jid not in counted]}},
+                               {"$set": {"rolledUp": True}})
+      except Exception as e:
+        # Dashboard counters only: never let this reach a job. The backfill repairs gaps.
+        print(f"[rollups] {len(pending)} job(s) not counted: {e}")
+
+
+  def close(self) -> None:
+    self._stop.set()
+    self._thread.join()
+    self.flush()
+
+
+def backfill(db, jobs_coll:str=MONGO_COLL, rollup_coll:str=MONGO_ROLLUP_COLL, batch:int=1000) -> int:
+  """
+  Rebuild every bucket from the analysed jobs. The new buckets are written to a
+  side collection, indexed like the live one (database.migrations), and swapped
+  in with one rename, so readers never see a half rebuilt view or a collection
+  scan. Workers must be stopped: the rename drops whatever they counted meanwhile.
+  Returns the number of jobs counted.
+  """
+  jobs = db.get_collection(jobs_coll)
+  staging = db.get_collection(f"{rollup_coll}_rebuild")
+  staging.drop()
+  for spec in INDEXES:
+    if spec.collection == rollup_coll:
+      staging.create_index(spec.keys, **{**spec.options, "name": spec.name})
+
+  fields = {"id": 1, "companyName": 1, "salaryStart": 1, "salaryEnd": 1, "openDate": 1, "processedAt": 1,
+            "analysis.skills": 1}
+  query = {"status": "Complete", "duplicateOf": {"$exists": False}}
+  counted: List[str] = []
+  increments = RollupIncrements()
+  for doc in jobs.find(query, fields).batch_size(batch):
+    increments.add(doc, doc.get("analysis") or {})
+    counted.append(doc["id"])
+
+  ops = increments.ops()
+  for i in range(0, len(ops), batch):
+    staging.bulk_write(ops[i:i + batch], ordered=False)
+  if ops:
+    staging.rename(rollup_coll, dropTarget=True)
+  else:
+    db.get_collection(rollup_coll).delete_many({})
+  for i in range(0, len(counted), batch):
+    jobs.update_many({"id": {"$in": counted[i:i + batch]}}, {"$set": {"rolledUp": True}})
+  return len(counted)
+
+
+def main(argv=None):
+  ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  ap.add_argument("--backfill", action="store_true",
+                  help="rebuild all rollups from the jobs collection (stop the workers first)")
+  args = ap.parse_args(argv)
+  if not args.backfill:
+    ap.print_help()
+    return
+  db = MongoClient(MONGO_URI).get_database(MONGO_DB)
+  n = backfill(db)
+  print(f"✅ rebuilt {MONGO_ROLLUP_COLL} from {n} job(s)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,202 @@
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import itertools
+import queue
+import threading
+import time
+
+from database.job_record import JobRecord
+from helper.ai.extract_keywords import SkillExtractor
+from helper.ai.scheduler import INTERACTIVE, NORMAL, llm_priority
+from helper.ai.stream_json import OffSchema
+from helper.embeddings.embedder import make_embedder
+from helper.embeddings.index import EmbeddingStore
+from config.settings import AI_BATCH_SIZE, AI_BATCH_LINGER_MS, AI_BATCH_PARALLEL
+from config.settings import EMBED_ENABLED, EMBED_BACKEND, EMBED_DIR
+
+_STOP = float("inf")  # sorts after every lane: close() lets queued jobs finish
+
+OnField = Callable[[str, Any], None]
+Batch = List[Tuple[JobRecord, Future, Optional[OnField]]]
+
+
+class JobAnalyser:
+  """
+  Extraction pipeline for jobs handed over by the worker pool.
+
+  `analyse()` blocks the calling pool thread until its job is done. Jobs that
+  arrive within `linger_ms` of each other (typically records from one poll) are
+  grouped, up to `batch_size`, into one SkillExtractor._process_batch call, so a
+  backlog is drained with several ads per generation. At most `parallel`
+  batches are sent to the LLM at once.
+
+  Waiting jobs are taken most urgent lane first (helper.ai.scheduler). An
+  interactive job is sent on its own without lingering (one arriving while a
+  batch lingers ends the linger and goes next), and with an `on_field`
+  callback its generation is streamed: the callback sees each of the six fields
+  as soon as the model completes it.
+
+  With an EmbeddingStore, every finished batch is embedded (cleaned ad plus its
+  responsibilities) on a side thread, after the jobs were handed back. Ads are
+  cleaned once, for the prompt and the embedding alike.
+  """
+
+  def __init__(self, extractor:Optional[SkillExtractor]=None, batch_size:int=AI_BATCH_SIZE,
+               linger_ms:int=AI_BATCH_LINGER_MS, parallel:int=AI_BATCH_PARALLEL,
+               embeddings:Optional[EmbeddingStore]=None):
+    self.extractor = extractor if extractor is not None else SkillExtractor()
+    self.batch_size = batch_size
+    self.linger = linger_ms / 1000
+    if embeddings is None and EMBED_ENABLED:
+      embeddings = EmbeddingStore(EMBED_DIR, make_embedder(EMBED_BACKEND))
+    self.embeddings = embeddings
+    self._embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed") if embeddings else None
+
+    self._queue: "queue.PriorityQueue[Tuple[float, int, Optional[JobRecord], Optional[Future], Optional[OnField]]]" = queue.PriorityQueue()
+    self._seq = itertools.count()
+    # a batch is only formed once it can be sent, so jobs wait in the priority queue, not the executor's
+    self._slots = threading.Semaphore(parallel)
+    self._executor = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="llm")
+    self._thread = threading.Thread(target=self._loop, name="llm-batcher", daemon=True)
+    self._thread.start()
+
+
+  def submit(self, job:JobRecord, priority:int=NORMAL, on_field:Optional[OnField]=None) -> Future:
+    fut: Future = Future()
+    self._queue.put((priority, next(self._seq), job, fut, on_field))
+    return fut
+
+
+  def analyse(self, job:JobRecord, priority:int=NORMAL, on_field:Optional[OnField]=None) -> Dict[str, Any]:
+    return self.submit(job, priority, on_field).result()
+
+
+  def _loop(self) -> None:
+    while True:
+      self._slots.acquire()
+      priority, _, job, fut, on_field = self._queue.get()
+      if job is None:
+        return
+      batch: Batch = [(job, fut, on_field)]
+      deadline = time.monotonic() + self.linger
+      # a user is waiting on an interactive job: it goes alone, so it can stream
+      while priority != INTERACTIVE and len(batch) < self.batch_size:
+        remaining = deadline - time.monotonic()
+        try:
+          item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+        except queue.Empty:
+          break
+        if item[2] is None or item[0] < priority:
+          # the stop marker waits until this batch is out; a more urgent job is not
+          # folded into it, but sent next in its own lane
+          self._queue.put(item)
+          break
+        batch.append((item[2], item[3], item[4]))
+      self._executor.submit(self._run_batch, batch, priority)
+
+
+  def _run_batch(self, batch:Batch, priority:int=NORMAL) -> None:
+    try:
+      with llm_priority(priority):
+        self._extract(batch)
+    finally:
+      self._slots.release()
+
+
+  def _extract(self, batch:Batch) -> None:
+    articles = {job.id: self.extractor._clean(self._article(job)) for job, _, _ in batch}
+    try:
+      if len(batch) == 1:
+        job, _, on_field = batch[0]
+        results, errors = {job.id: self._extract_one(articles[job.id], on_field)}, {}
+      else:
+        results, errors = self.extractor._process_batch(articles, cleaned=True)
+    except Exception as e:
+      results, errors = {}, {job.id: e for job, _, _ in batch}
+
+    finished: Dict[str, Any] = {}
+    for job, fut, _ in batch:
+      jid = job.id
+      if jid in results:
+        try:
+          finished[jid] = self._finish(job, results[jid])
+        except Exception as e:
+          fut.set_exception(e)
+      else:
+        fut.set_exception(errors.get(jid) or RuntimeError(f"no extraction for job {jid}"))
+    try:
+      self._rank(finished)
+    except Exception as e:
+      print(f"[rank] responsibilities not scored: {e}")
+    for job, fut, _ in batch:
+      if job.id in finished:
+        fut.set_result(finished[job.id])
+
+    if self._embed_executor is not None and results:
+      done = [(job.id, articles[job.id], results[job.id]) for job, _, _ in batch if job.id in results]
+      self._embed_executor.submit(self._embed, done)
+
+
+  def _extract_one(self, article:str, on_field:Optional[OnField]) -> Dict[str, Any]:
+    """One cleaned ad; streamed field by field when someone listens and the backend can stream."""
+    if on_field is not None and self.extractor.can_stream:
+      try:
+        return self.extractor._process_article(article, stream=True, on_field=on_field, cleaned=True)
+      except OffSchema as e:
+        # the streamed JSON left the schema; the repairing parser may still save a plain answer
+        print(f"[stream] {e}; generating again without streaming")
+    return self.extractor._process_article(article, cleaned=True)
+
+
+  def _embed(self, done:List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    assert self.embeddings is not None
+    try:
+      self.embeddings.add_jobs([
+        (jid, article, list((extraction.get("response") or {}).get("responsibilities") or []))
+        for jid, article, extraction in done
+      ])
+    except Exception as e:
+      # Search data only: a failed embedding never fails the job
+      print(f"[embed] {len(done)} job(s) not indexed: {e}")
+
+
+  @staticmethod
+  def _article(job:JobRecord) -> str:
+    return f"{job.jobTitle}\n{job.jobDescription}".strip()
+
+
+  def _finish(self, job:JobRecord, extraction:Dict[str, Any]) -> Dict[str, Any]:
+    response = extraction.get("response") or {}
+    return {
+      "response": response,
+      "skills": self.extractor._filter_skills(skill_set=response.get("technical_skills") or []),
+      # LLM-free matches straight from the description, as a cross-check
+      "prefilter": self.extractor._prefilter_skills(job.jobDescription),
+    }
+
+
+  def _rank(self, finished:Dict[str, Dict[str, Any]]) -> None:
+    """Score the responsibilities of every finished job of the batch in one pass."""
+    if not finished:
+      return
+    jids = list(finished)
+    rankings = self.extractor._score_responsibilities([
+      (list(finished[jid]["response"].get("responsibilities") or []),
+       list(finished[jid]["skills"]["missing"]))
+      for jid in jids
+    ])
+    for jid, ranking in zip(jids, rankings):
+      finished[jid]["responsibilities"] = ranking["Responsibilities"]
+
+
+  def ready(self) -> bool:
+    return self.extractor.ready()
+
+
+  def close(self) -> None:
+    self._queue.put((_STOP, next(self._seq), None, None, None))
+    self._thread.join()
+    self._executor.shutdown(wait=True)
+    if self._embed_executor is not None:
+      self._embed_executor.shutdown(wait=True)
@@ -0,0 +1,125 @@
+
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import time
+
+import aiohttp # type: ignore
+
+from .cache import ResponseCache
+from .client import BaseAiClient, RETRY_STATUSES, NUM_CTX
+from .scheduler import Endpoint, EndpointPool
+from config.settings import AI_MAX_CONCURRENCY, AI_RETRIES, AI_BACKOFF
+from metrics.instruments import LLM_FAILOVERS
+
+
+class AsyncAiClient(BaseAiClient):
+  """
+  asyncio counterpart of AiClient.
+
+  `_generate` takes the same arguments and returns the same string, but is a
+  coroutine. Many extraction calls can be awaited together; at most
+  `max_concurrency` are sent at once, over one pooled keep-alive connector.
+
+  Several comma-separated hosts are balanced and failed over like AiClient's,
+  through an EndpointPool. The rest of the LlmScheduler does not apply here: its
+  lanes and token budget block threads, so there is no priority, no token rate
+  limit and no single-flight for async generations.
+  """
+
+  def __init__(self, model:str="mistral", host:str="http://localhost:11434", timeout:int=300,
+               cache:Optional[ResponseCache]=None, max_concurrency:int=AI_MAX_CONCURRENCY,
+               retries:int=AI_RETRIES, backoff:float=AI_BACKOFF):
+    super().__init__(model=model, host=host, timeout=timeout, cache=cache)
+    self.max_concurrency = max_concurrency
+    self.retries = retries
+    self.backoff = backoff
+    # Created lazily: both must belong to the running event loop
+    self._session: Optional[aiohttp.ClientSession] = None
+    self._semaphore: Optional[asyncio.Semaphore] = None
+    self.pool = EndpointPool(self.hosts, health_interval=0)
+
+
+  def _ensure_session(self) -> aiohttp.ClientSession:
+    if self._session is None or self._session.closed:
+      connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+      self._session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=self.timeout),
+      )
+      self._semaphore = asyncio.Semaphore(self.max_concurrency)
+    return self._session
+
+
+  async def _generate(self, prompt:str, temperature:float = 0.05 , top_p:float = 0.95, max_tokens:int | None = None, num_ctx:int = NUM_CTX) -> str:
+    payload = self._build_payload(prompt, temperature=temperature, top_p=top_p, max_tokens=max_tokens, num_ctx=num_ctx)
+
+    key, cached = self._cached(payload)
+    if cached is not None:
+      return cached
+
+    started = time.perf_counter()
+    tried: Tuple[Endpoint, ...] = ()
+    last: Optional[Exception] = None
+    while True:
+      endpoint = self.pool.acquire(skip=tried)
+      if endpoint is None:
+        assert last is not None
+        raise last  # every host failed
+      try:
+        data = await self._post(endpoint.host, payload)
+      except (aiohttp.ClientConnectionError, aiohttp.ClientResponseError) as e:
+        failover = _failover_error(e)
+        self.pool.release(endpoint, ok=not failover)
+        if not failover:
+          raise
+        last, tried = e, tried + (endpoint,)
+        LLM_FAILOVERS.inc(host=endpoint.host)
+        print(f"[llm] {endpoint.host} failed ({type(e).__name__}); marked down")
+        continue
+      except BaseException:
+        self.pool.release(endpoint, ok=True)
+        raise
+      self.pool.release(endpoint, ok=True)
+      break
+
+    self._observe(started, data)
+    result = data.get("response")
+    self._remember(key, result)
+    return result
+
+
+  async def _post(self, host:str, payload:Dict[str, Any]) -> Dict[str, Any]:
+    """One host, with its own retries and backoff on connection errors and 5xx."""
+    session = self._ensure_session()
+    assert self._semaphore is not None
+    attempt = 0
+    while True:
+      try:
+        async with self._semaphore:
+          async with session.post(f"{host}/api/generate", json=payload) as response:
+            if response.status in RETRY_STATUSES and attempt < self.retries:
+              raise _Retryable(f"HTTP {response.status}")
+            response.raise_for_status()
+            return await response.json()
+      except (_Retryable, aiohttp.ClientConnectionError) as e:
+        # Read timeouts are not retried: the generation may still be running
+        if isinstance(e, aiohttp.ServerTimeoutError) or attempt >= self.retries:
+          raise
+        await asyncio.sleep(self.backoff * (2 ** attempt))
+        attempt += 1
+
+
+  async def close(self) -> None:
+    if self._session is not None and not self._session.closed:
+      await self._session.close()
+
+
+class _Retryable(Exception):
+  pass
+
+
+def _failover_error(e:Exception) -> bool:
+  """Worth another host: it is down or keeps answering 5xx. Read timeouts are not."""
+  if isinstance(e, aiohttp.ClientResponseError):
+    return e.status >= 500
+  return isinstance(e, aiohttp.ClientConnectionError) and not isinstance(e, aiohttp.ServerTimeoutError)
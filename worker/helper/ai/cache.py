@@ -0,0 +1,106 @@
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import threading
+
+from config.settings import AI_CACHE_SIZE, AI_CACHE_TTL
+from metrics.instruments import LLM_CACHE
+
+
+class ResponseCache:
+  """
+  Content-addressed cache for LLM generations.
+
+  The key is a sha256 over the model, prompt and generation options, so the same
+  ad re-analysed with the same settings maps to the same entry.
+  Two tiers:
+  - an in-process LRU of `max_entries` responses;
+  - an optional Redis client shared by every worker, entries expire after `ttl` seconds.
+  Redis problems are treated as misses, never as failures.
+  """
+
+  PREFIX = "llm:"
+
+  def __init__(self, max_entries:int=AI_CACHE_SIZE, redis_client:Any=None, ttl:int=AI_CACHE_TTL):
+    self.max_entries = max_entries
+    self.ttl = ttl
+    self._redis = redis_client
+    self._lru: "OrderedDict[str, str]" = OrderedDict()
+    self._lock = threading.Lock()
+
+    self.hits = 0
+    self.redis_hits = 0
+    self.misses = 0
+
+
+  @staticmethod
+  def key(payload:Dict[str, Any]) -> str:
+    material = {
+      "model": payload.get("model"),
+      "prompt": payload.get("prompt"),
+      "format": payload.get("format"),
+      "options": payload.get("options") or {},
+    }
+    raw = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+  def get(self, key:str) -> Optional[str]:
+    with self._lock:
+      value = self._lru.get(key)
+      if value is not None:
+        self._lru.move_to_end(key)
+        self.hits += 1
+        LLM_CACHE.inc(result="hit")
+        return value
+
+    if self._redis is not None:
+      try:
+        value = self._redis.get(self.PREFIX + key)
+      except Exception as e:
+        print(f"[cache] redis get failed: {e}")
+        value = None
+      if value is not None:
+        if isinstance(value, bytes):
+          value = value.decode("utf-8")
+        self._remember(key, value)
+        with self._lock:
+          self.redis_hits += 1
+        LLM_CACHE.inc(result="redis_hit")
+        return value
+
+    with self._lock:
+      self.misses += 1
+    LLM_CACHE.inc(result="miss")
+    return None
+
+
+  def put(self, key:str, value:str) -> None:
+    if value is None:
+      return
+    self._remember(key, value)
+    if self._redis is not None:
+      try:
+        self._redis.set(self.PREFIX + key, value, ex=self.ttl)
+      except Exception as e:
+        print(f"[cache] redis set failed: {e}")
+
+
+  def _remember(self, key:str, value:str) -> None:
+    with self._lock:
+      self._lru[key] = value
+      self._lru.move_to_end(key)
+      while len(self._lru) > self.max_entries:
+        self._lru.popitem(last=False)
+
+
+  def stats(self) -> Dict[str, int]:
+    with self._lock:
+      return {
+        "hits": self.hits,
+        "redis_hits": self.redis_hits,
+        "misses": self.misses,
+        "entries": len(self._lru),
+      }
@@ -1,16 +1,35 @@
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import time
 
+from .cache import ResponseCache
+from .scheduler import EndpointPool, LlmScheduler
+from .stream_json import IncrementalJsonParser, OffSchema, SchemaWatcher
+from helper.text.cleaner import estimate_tokens
+from config.settings import AI_POOL_SIZE, AI_RETRIES, AI_BACKOFF
+from metrics.instruments import LLM_SECONDS, LLM_PROMPT_TOKENS, LLM_COMPLETION_TOKENS
 
-class AiClient:
-  def __init__(self, model:str="mistral", host:str="http://localhost:11434", timeout:int=300):
+NUM_CTX = 8192  # context window requested from Ollama
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class BaseAiClient:
+  """Payload building and caching shared by the sync and async clients."""
+
+  def __init__(self, model:str="mistral", host:str="http://localhost:11434", timeout:int=300,
+               cache:Optional[ResponseCache]=None):
     self.model = model
-    self._url = f"{host.rstrip('/')}/api/generate"
+    # "http://gpu1:11434,http://gpu2:11434" spreads generations over both
+    self.hosts = [h.strip().rstrip('/') for h in host.split(",") if h.strip()]
     self.timeout = timeout
+    self.cache = cache
 
-  def _generate(self, prompt:str, temperature:float = 0.05 , top_p:float = 0.95, max_tokens:int | None = None) -> str:
+  def _build_payload(self, prompt:str, temperature:float = 0.05 , top_p:float = 0.95, max_tokens:int | None = None, num_ctx:int = NUM_CTX) -> Dict[str, Any]:
     payload: Dict[str, Any] = {
       "model": self.model,
       "prompt": prompt,
@@ -20,20 +39,154 @@ class AiClient:
         "temperature": temperature,
         "top_p": top_p,
         # "top_k":1,
-        "num_ctx": 8192,
+        "num_ctx": num_ctx,
         "repeat_penalty":1.05,
-        "num_ctx": 8192
       }
     }
 
     if max_tokens is not None:
       payload["options"]["num_predict"] = max_tokens
 
-    response=requests.post(self._url, json=payload, timeout=self.timeout)
+    return payload
+
+  def _cached(self, payload:Dict[str, Any]) -> tuple[Optional[str], Optional[str]]:
+    """Return (cache key, cached response); both None when caching is off."""
+    if self.cache is None:
+      return None, None
+    key = ResponseCache.key(payload)
+    return key, self.cache.get(key)
+
+  def _remember(self, key:Optional[str], result:Optional[str]) -> None:
+    if key is not None and self.cache is not None:
+      self.cache.put(key, result)
+
+  def _observe(self, started:float, data:Dict[str, Any], mode:str="generate") -> None:
+    """Record latency and Ollama's token counts (present on the final, done message)."""
+    LLM_SECONDS.observe(time.perf_counter() - started, model=self.model, mode=mode)
+    LLM_PROMPT_TOKENS.inc(data.get("prompt_eval_count") or 0, model=self.model)
+    LLM_COMPLETION_TOKENS.inc(data.get("eval_count") or 0, model=self.model)
+
+  @staticmethod
+  def _tokens_used(data:Dict[str, Any]) -> Optional[int]:
+    if "prompt_eval_count" not in data and "eval_count" not in data:
+      return None
+    return (data.get("prompt_eval_count") or 0) + (data.get("eval_count") or 0)
+
+
+class AiClient(BaseAiClient):
+  """
+  Blocking Ollama client. Every generation goes through an LlmScheduler:
+  identical prompts in flight are sent once, urgent lanes go first, the token
+  budget is enforced and the load is spread over `host`'s endpoints.
+  """
+
+  def __init__(self, model:str="mistral", host:str="http://localhost:11434", timeout:int=300,
+               cache:Optional[ResponseCache]=None, pool_size:int=AI_POOL_SIZE,
+               retries:int=AI_RETRIES, backoff:float=AI_BACKOFF, scheduler:Optional[LlmScheduler]=None):
+    super().__init__(model=model, host=host, timeout=timeout, cache=cache)
+
+    # One keep-alive session per client; connection and 5xx failures are retried
+    # with exponential backoff. Read timeouts are not: the generation may still be running.
+    retry = Retry(
+      total=retries,
+      connect=retries,
+      read=0,
+      status=retries,
+      backoff_factor=backoff,
+      status_forcelist=RETRY_STATUSES,
+      allowed_methods=frozenset(["POST"]),
+      raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=len(self.hosts), pool_maxsize=pool_size, max_retries=retry)
+    self._session = requests.Session()
+    self._session.mount("http://", adapter)
+    self._session.mount("https://", adapter)
+    self.scheduler = scheduler if scheduler is not None else LlmScheduler(EndpointPool(self.hosts, session=self._session))
+
+  def _schedule(self, key:Optional[str], payload:Dict[str, Any], call) -> str:
+    cost = estimate_tokens(payload["prompt"]) + (payload["options"].get("num_predict") or 0)
+    # The cache key ignores "stream", but a streamed call is never shared: each caller has its own watcher
+    flight = None if payload.get("stream") else key or ResponseCache.key(payload)
+    return self.scheduler.run(flight, cost, call)
+
+  def _generate(self, prompt:str, temperature:float = 0.05 , top_p:float = 0.95, max_tokens:int | None = None, num_ctx:int = NUM_CTX) -> str:
+    payload = self._build_payload(prompt, temperature=temperature, top_p=top_p, max_tokens=max_tokens, num_ctx=num_ctx)
+
+    key, cached = self._cached(payload)
+    if cached is not None:
+      return cached
+    return self._schedule(key, payload, lambda host: self._post(host, payload, key))
+
+  def _post(self, host:str, payload:Dict[str, Any], key:Optional[str]) -> tuple[str, Optional[int]]:
+    started = time.perf_counter()
+    response=self._session.post(f"{host}/api/generate", json=payload, timeout=self.timeout)
     response.raise_for_status()
     data = response.json()
+    self._observe(started, data)
+
+    result = data.get("response")
+    self._remember(key, result)
+    return result, self._tokens_used(data)
+
+  def _generate_stream(self, prompt:str, temperature:float = 0.05 , top_p:float = 0.95, max_tokens:int | None = None,
+                       num_ctx:int = NUM_CTX, watcher:Optional[SchemaWatcher] = None) -> str:
+    """
+    Same contract as `_generate`, but consumes Ollama's NDJSON token stream.
+
+    Tokens are fed to an incremental JSON parser; `watcher` sees each field as
+    soon as it completes. The request is cut short (and Ollama stops generating)
+    once the watcher's schema is satisfied, or raises OffSchema as soon as the
+    output stops being the JSON we asked for.
+    """
+    payload = self._build_payload(prompt, temperature=temperature, top_p=top_p, max_tokens=max_tokens, num_ctx=num_ctx)
+
+    key, cached = self._cached(payload)
+    if cached is not None:
+      return cached
+    payload["stream"] = True
+    return self._schedule(key, payload, lambda host: self._post_stream(host, payload, key, watcher))
+
+  def _post_stream(self, host:str, payload:Dict[str, Any], key:Optional[str],
+                   watcher:Optional[SchemaWatcher]) -> tuple[str, Optional[int]]:
+    parser = IncrementalJsonParser()
+    result: Optional[str] = None
+    data: Dict[str, Any] = {}
+    started = time.perf_counter()
+
+    # Closing the response drops the connection, which cancels the generation
+    with self._session.post(f"{host}/api/generate", json=payload, timeout=self.timeout, stream=True) as response:
+      response.raise_for_status()
+      for line in response.iter_lines():
+        if not line:
+          continue
+        data = json.loads(line)
+        if data.get("error"):
+          raise RuntimeError(f"ollama: {data['error']}")
+
+        for path, value in parser.feed(data.get("response", "")):
+          if watcher is not None and watcher.observe(path, value):
+            result = parser.text if parser.done else watcher.as_json()
+            break
+        if result is not None or data.get("done"):
+          break
+    # an early stop has no done message, so no token counts: only latency is recorded
+    self._observe(started, data if data.get("done") else {}, mode="stream")
+
+    if result is None:
+      if not parser.done:
+        raise OffSchema("stream ended before the JSON was complete")
+      result = parser.text.strip()
+
+    self._remember(key, result)
+    return result, self._tokens_used(data) if data.get("done") else None
+
+  def ready(self) -> bool:
+    """At least one host answers /api/tags; one quick request each, no retries."""
+    return self.scheduler.pool.check()
 
-    return data.get("response")
+  def close(self) -> None:
+    self.scheduler.close()
+    self._session.close()
 
 
 
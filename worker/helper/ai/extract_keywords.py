@@ -1,10 +1,56 @@
 
+from typing import Optional, Any, Callable
 from .client import AiClient
+from .cache import ResponseCache
+from .stream_json import SchemaWatcher
+from .repair import RepairError, coerce_response, loads_tolerant, parse_response
+from helper.skills.matcher import SkillIndex
+from helper.skills.scorer import ResponsibilityScorer
+from helper.text.cleaner import AdCleaner, estimate_tokens
+from metrics.instruments import PROMPT_TOKENS_SAVED
+from .client import NUM_CTX
+from config.settings import AI_HOST
+import inspect
 import json
 
+# The six fields _process_article asks for, with their JSON types
+ARTICLE_SCHEMA = {
+  "job_title": str,
+  "summary": str,
+  "responsibilities": list,
+  "requirements": list,
+  "technical_skills": list,
+  "qualifications": list,
+}
+
+# Shared by the single-ad and batch prompts
+FIELD_RULES = """    Field definitions (use these to classify text):
+
+    - job_title = explicit role name text. If only a generic heading is present, return "".
+    - summary = short descriptive sentences about the role that explain its purpose and scope (what and why). Limited to one to three sentences, normally appearing before any bullet lists. If none are present, return "".
+    - responsibilities = list of action-oriented duties or tasks describing what the role performs or delivers. Must be phrased as actions. If none are present, return [].
+    - requirements = list all personal qualities, behaviours, and experience expectations. Must include any item containing the terms: “experience”, “years”, “familiarity”, “knowledge”, “proven” . If none, return [].
+    - technical_skills = list of concrete technical knowledge items such as tools, programming abilities, platforms, databases, frameworks, protocols, or formats. return single word or a single canonical tool name; split conjunctions/compounds into separate items. Must not include soft skills, behaviours, or personal traits. If none are present, return [].
+    - qualifications = list of formal academic credentials or official certifications/licences only. Exclude any item containing the terms "Experience", "Familiarity", or "Knowledge". If none are present, return [].    
+
+    Formatting rules:
+    - Preserve original wording (no paraphrasing).
+    - If a section is missing, use "" for text fields and [] for list fields.
+    - Do NOT include company promo/culture/perks/apply/links/emails/phone numbers.
+    - Prefer specific technologies over vague groupings when both appear.
+"""
+
+# Batch planning: a packed prompt must fit num_ctx together with its answer.
+# Extraction copies most of an ad back out, so the answer is budgeted as a share of the ad.
+OUTPUT_RATIO = 0.8
+OUTPUT_OVERHEAD = 60  # tokens of JSON scaffolding per ad in the answer
+
 class SkillExtractor(AiClient) :
-  def __init__(self):
-    super().__init__(model="llama3.1:8b")
+  def __init__(self, cache:Optional[ResponseCache]=None, llm:Any=None, host:str=AI_HOST):
+    # Extraction runs at temperature 0, so repeated ads are answered from the cache
+    super().__init__(model="llama3.1:8b", host=host, cache=cache if cache is not None else ResponseCache())
+    # Backend for generations: this client, or anything with the same _generate contract (e.g. AsyncAiClient)
+    self.llm = llm if llm is not None else self
     self.__SKILLS= [
     "Java","Python","JavaScript","TypeScript","SQL",
     "React","NextJS","NodeJS", "Node.js", "next.js", "react.js","Express","Redux","Tailwind","FramerMotion",
@@ -18,9 +64,191 @@ class SkillExtractor(AiClient) :
     "Git","GitHub",
     "JUnit","Pytest",
     "Agile","SEO"]
+    # Built once: aliases ("Node.js"/"NodeJS"/"node") collapse to one canonical id
+    self.__index = SkillIndex(self.__SKILLS)
+    # Drops perks/culture/company/questions sections before they reach the prompt
+    self.__cleaner = AdCleaner()
+    # Responsibilities are ranked locally; the LLM only rewords the top ones
+    self.__scorer = ResponsibilityScorer(self.__SKILLS)
+
+
+  @property
+  def skills(self) -> list[str]:
+    return list(self.__SKILLS)
+
+  def _require_blocking(self, method:str) -> None:
+    """The blocking extraction paths cannot drive a coroutine backend such as AsyncAiClient."""
+    if inspect.iscoroutinefunction(getattr(self.llm, "_generate", None)):
+      raise TypeError(f"async backend: {method} needs a blocking client (only _aprocess_article is async)")
+
+  @property
+  def can_stream(self) -> bool:
+    """_process_article(stream=True) needs a backend with _generate_stream (not AsyncAiClient)."""
+    return callable(getattr(self.llm, "_generate_stream", None))
+
+  def _process_article(self, article:str, stream:bool=False, on_field:Optional[Callable[[str, Any], None]]=None,
+                       cleaned:bool=False):
+    """`cleaned`: `article` already went through _clean, so it is prompted as is."""
+    if stream:
+      # on_field(name, value) fires as each of the six fields completes
+      watcher = SchemaWatcher("response", ARTICLE_SCHEMA, on_field=on_field)
+      clean_article = self.llm._generate_stream(self._article_prompt(article, cleaned), temperature=0, watcher=watcher)
+      return self._parse_article(clean_article)
+
+    clean_article = self.llm._generate(self._article_prompt(article, cleaned), temperature=0)
+    if inspect.isawaitable(clean_article):
+      clean_article.close()
+      raise TypeError("async backend: use `await _aprocess_article(...)`")
+    return self._parse_article(clean_article)
 
+  async def _aprocess_article(self, article:str, cleaned:bool=False):
+    clean_article = self.llm._generate(self._article_prompt(article, cleaned), temperature=0)
+    if inspect.isawaitable(clean_article):
+      clean_article = await clean_article
+    return self._parse_article(clean_article)
+
+  def _parse_article(self, clean_article:str):
+    # Tolerant parse + schema coercion; bullets, whitespace and duplicates are fixed here, not by the model
+    return parse_response(clean_article)
+
+  def _clean(self, article:str) -> str:
+    """The ad without its boilerplate sections, as it goes into a prompt (counted in PROMPT_TOKENS_SAVED)."""
+    cleaned = self.__cleaner.clean(article)
+    if not cleaned.text:
+      return article
+    PROMPT_TOKENS_SAVED.inc(cleaned.tokens_saved)
+    return cleaned.text
+
+  @staticmethod
+  def _coerce_response(response:Any, cut_off:bool=False) -> Optional[dict]:
+    """
+    `response` forced to the six fields, or None when it is not a complete answer:
+    beyond repair, missing a field, or `cut_off` (the generation stopped inside it).
+    """
+    if cut_off:
+      return None
+    try:
+      response, issues = coerce_response(response)
+    except RepairError:
+      return None
+    if any(issue.startswith("missing:") for issue in issues):
+      return None
+    return response
+
+  def _plan_batches(self, ads:dict[str, str], num_ctx:int=NUM_CTX, max_batch:int=8) -> list[list[str]]:
+    """
+    Group ad ids so each packed prompt plus its expected answer fits `num_ctx`.
+    Ads too large to share a window end up alone in their batch.
+    """
+    budget = num_ctx - estimate_tokens(self._batch_prompt({}))
+    batches: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for jid, text in ads.items():
+      need = int(estimate_tokens(text) * (1 + OUTPUT_RATIO)) + OUTPUT_OVERHEAD
+      if current and (used + need > budget or len(current) >= max_batch):
+        batches.append(current)
+        current, used = [], 0
+      current.append(jid)
+      used += need
+    if current:
+      batches.append(current)
+    return batches
+
+  def _process_batch(self, articles:dict[str, str], num_ctx:int=NUM_CTX, max_batch:int=8,
+                     cleaned:bool=False) -> tuple[dict[str, Any], dict[str, Exception]]:
+    """
+    Extract several ads with as few generations as possible.
+
+    Ads are cleaned, packed into prompts that fit `num_ctx`, and answered as one
+    array keyed by job id. Entries are repaired to the schema where possible;
+    those that are absent, incomplete (a field missing, or cut off by a truncated
+    answer) or beyond repair are retried one by one with `_process_article`.
+    Returns ({job id: result}, {job id: error}); results have the `_process_article` shape.
+    `cleaned`: the ads already went through _clean.
+    """
+    self._require_blocking("_process_batch")
+    ads = articles if cleaned else {jid: self._clean(text) for jid, text in articles.items()}
+    results: dict[str, Any] = {}
+    errors: dict[str, Exception] = {}
+
+    for batch in self._plan_batches(ads, num_ctx=num_ctx, max_batch=max_batch):
+      if len(batch) == 1:
+        continue
+      try:
+        raw = self.llm._generate(self._batch_prompt({jid: ads[jid] for jid in batch}), temperature=0, num_ctx=num_ctx)
+        answer, issues = loads_tolerant(raw)
+        entries = answer.get("results", []) if isinstance(answer, dict) else answer
+      except Exception as e:
+        print(f"[batch] {len(batch)} ads failed together, retrying one by one: {e}")
+        continue
+      entries = entries if isinstance(entries, list) else []
+      # A truncated answer was closed by the repair: its last entry is where the generation stopped
+      cut_off = len(entries) - 1 if "truncated" in issues else -1
+      wanted = set(batch)
+      for n, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+          continue
+        jid = str(entry.get("id"))
+        if jid in wanted and jid not in results:
+          response = self._coerce_response(entry.get("response"), cut_off=n == cut_off)
+          if response is not None:
+            results[jid] = {"response": response}
+
+    # Singles and whatever the batch answer got wrong
+    for jid in articles:
+      if jid in results:
+        continue
+      try:
+        results[jid] = self._process_article(ads[jid], cleaned=True)
+      except Exception as e:
+        errors[jid] = e
+
+    return results, errors
+
+  def _batch_prompt(self, ads:dict[str, str]) -> str:
+    packed = "\n\n".join(f'<ad id="{jid}">\n{text}\n</ad>' for jid, text in ads.items())
+
+    PROMPT=f"""
+    You are a text cleaner for job advertisements.
+    Your task: for EACH job ad below, extract ONLY the job-specific content and output STRICT JSON.
+
+    Input (job ads, each wrapped in <ad id="...">):
+    {packed}
+
+{FIELD_RULES}
+    Output:
+    - Return ONLY a single JSON object (no code fences, no commentary).
+    - "results" holds exactly one entry per input ad, with "id" copied from its <ad id="...">.
+    - Keys and types must EXACTLY match this schema:
+    {{
+      "results": [
+        {{
+          "id": "",
+          "response": {{
+            "job_title": "",
+            "summary": "",
+            "responsibilities": [],
+            "requirements": [],
+            "technical_skills": [],
+            "qualifications": []
+          }}
+        }}
+      ]
+    }}
+
+    Validation constraints:
+    - Every "response" MUST have all six keys.
+    - responsibilities/requirements/technical_skills/qualifications MUST be arrays (even if empty).
+    - summary and job_title MUST be strings.
+    - Never mix content between ads; never invent content.
+    """
+    return PROMPT
+
+  def _article_prompt(self, article:str, cleaned:bool=False) -> str:
+    if not cleaned:
+      article = self._clean(article)
 
-  def _process_article(self, article:str):
     PROMPT=f"""
     You are a text cleaner for job advertisements.
     Your task: extract ONLY the job-specific content and output STRICT JSON.
@@ -33,24 +261,7 @@ class SkillExtractor(AiClient) :
     - KEEP everything from there through responsibilities/requirements/skills/qualifications.
     - STOP when you reach sections about perks/benefits, culture, company info, apply instructions, employer questions, salary, contact info, location-only blocks, or links.
 
-    Field definitions (use these to classify text):
-
-    - job_title = explicit role name text. If only a generic heading is present, return "".
-    - summary = short descriptive sentences about the role that explain its purpose and scope (what and why). Limited to one to three sentences, normally appearing before any bullet lists. If none are present, return "".
-    - responsibilities = list of action-oriented duties or tasks describing what the role performs or delivers. Must be phrased as actions. If none are present, return [].
-    - requirements = list all personal qualities, behaviours, and experience expectations. Must include any item containing the terms: “experience”, “years”, “familiarity”, “knowledge”, “proven” . If none, return [].
-    - technical_skills = list of concrete technical knowledge items such as tools, programming abilities, platforms, databases, frameworks, protocols, or formats. return single word or a single canonical tool name; split conjunctions/compounds into separate items. Must not include soft skills, behaviours, or personal traits. If none are present, return [].
-    - qualifications = list of formal academic credentials or official certifications/licences only. Exclude any item containing the terms "Experience", "Familiarity", or "Knowledge". If none are present, return [].    
-
-    Formatting rules:
-    - Remove leading bullet symbols from items (e.g., "•", "-", "–", "—", "●", "○", "·", "*").
-    - Preserve original wording (no paraphrasing), apart from removing bullet symbols and surrounding whitespace.
-    - Normalise whitespace: collapse multiple spaces, trim each item.
-    - Dedupe within each array only; cross-field overlaps are allowed.
-    - If a section is missing, use "" for text fields and [] for list fields.
-    - Do NOT include company promo/culture/perks/apply/links/emails/phone numbers.
-    - Prefer specific technologies over vague groupings when both appear.
-
+{FIELD_RULES}
     Output:
     - Return ONLY a single JSON object (no code fences, no commentary).
     - Keys and types must EXACTLY match this schema:
@@ -71,19 +282,14 @@ class SkillExtractor(AiClient) :
     - summary and job_title MUST be strings.
     - Never invent content; copy text exactly from the input span (after cleaning bullets/whitespace).
     """
-
-   
-    clean_article=self._generate(PROMPT, temperature=0)
-    res = json.loads(clean_article)
-    print(clean_article)
-    return res
+    return PROMPT
   
   def _filter_skills(self, skill_set:list[str]=[]):
     matched:list[str] = []
     missing:list[str] = []
     for skill in skill_set:
-        # lowercased compare for safety
-        if any(skill.lower() in mine.lower() or mine.lower() in skill.lower() for mine in self.__SKILLS):
+        # one automaton pass per candidate instead of a scan over every skill
+        if self.__index.find(skill):
             matched.append(skill)
         else:
             missing.append(skill)
@@ -93,48 +299,54 @@ class SkillExtractor(AiClient) :
         "missing": missing,
     }
 
-  def _filter_responsibilities(self, req:list[str], skills:list[str] | None = []):
+  def _prefilter_skills(self, description:str) -> list[str]:
+    """My skills mentioned in a raw job description, no LLM involved."""
+    return [self.__index.display[cid] for cid in self.__index.find(description)]
+
+  def _filter_responsibilities(self, req:list[str], skills:list[str] | None = None, missing:list[str] | None = None,
+                               rephrase:bool = False, top_n:int = 5):
+    """
+    Rank responsibilities against my skills with the local BM25 scorer.
+    Returns {"Responsibilities": [{"text", "score"}]}, score >= 5, best first.
+    With `rephrase`, only the `top_n` items go to the LLM to be reworded.
+    """
     if not req:
-      return
-    if not skills:
-       print("use pre-set Skills!")
-       skills = self.__SKILLS
+      return {"Responsibilities": []}
+    scorer = ResponsibilityScorer(skills) if skills else self.__scorer
+    ranked = scorer.score(req, missing=missing or [])
+    if rephrase and ranked["Responsibilities"]:
+      ranked["Responsibilities"][:top_n] = self._rephrase(ranked["Responsibilities"][:top_n])
+    return ranked
 
-    print(req)
-    print(skills)
-     
+  def _score_responsibilities(self, jobs:list[tuple[list[str], list[str]]]) -> list[dict[str, Any]]:
+    """(responsibilities, missing skills) per job -> one ranking per job, in one pass."""
+    return self.__scorer.score_batch(jobs)
+
+  def _rephrase(self, items:list[dict[str, Any]]) -> list[dict[str, Any]]:
+    self._require_blocking("_rephrase")
     PROMPT = f"""
-    You are a resume responsibility filter.
+    You are a resume writer.
 
     Input:
-    - Responsibilities: {req}
+    - Responsibilities: {json.dumps([item["text"] for item in items], ensure_ascii=False)}
     - My skills: {self.__SKILLS}
 
     Task:
-    - For each responsibility, check how well it matches my skills.
-    - If a responsibility can be fully supported, give it a high score.
-    - If it partially matches, give it a medium score.
-    - If it requires skills I don’t have, give it a low score and exclude it.
-    - Rephrase responsibilities if they partly match, so they fit my skills.
+    - Rephrase each responsibility as a resume-ready noun phrase that fits my skills.
+    - Keep the same order and the same number of items.
 
     Output:
-    - Return ONLY a single JSON object (no code fences, no commentary).
-    - Return only items with score >= 5.
-    - Keys and types must EXACTLY match this schema:
-    {{
-      "Responsibilities": [
-        {{
-          "text": "",
-          "score": [score]
-        }}
-      ]
-    }}
-    - "text" = resume-ready noun phrase.
-    - "score" = integer from 0 to 10 indicating how well the responsibility aligns with my skills.
+    - Return ONLY a single JSON object (no code fences, no commentary):
+    {{"Responsibilities": ["", ...]}}
     """
-
-    res=self._generate(prompt=PROMPT)
-    print(res)
+    try:
+      texts = loads_tolerant(self.llm._generate(prompt=PROMPT, temperature=0))[0]["Responsibilities"]
+    except Exception as e:
+      print(f"[rephrase] keeping original wording: {e}")
+      return items
+    if not isinstance(texts, list) or len(texts) != len(items):
+      return items
+    return [{"text": str(text), "score": item["score"]} for text, item in zip(texts, items)]
 
   def _generate_summary(self):
      return
@@ -0,0 +1,337 @@
+"""
+Validation and repair of the model's JSON, so a near miss costs no second generation.
+
+`loads_tolerant` accepts what the models actually produce around the JSON we
+asked for: code fences, text before or after the object, unquoted keys,
+single quotes, Python literals, trailing or missing commas, and an answer cut
+off mid-object. `coerce_response` then forces the six-field schema: aliases
+and casing of keys, strings vs arrays, bullets, whitespace and duplicates.
+Anything that is changed is reported as an issue; what cannot be recovered
+raises RepairError with the list.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+
+from helper.text.cleaner import BULLETS
+from metrics.instruments import LLM_REPAIRS
+
+
+TEXT_FIELDS = ("job_title", "summary")
+LIST_FIELDS = ("responsibilities", "requirements", "technical_skills", "qualifications")
+
+# Spellings seen for the six keys, after lower-casing and turning spaces/hyphens into "_"
+KEY_ALIASES = {
+  "title": "job_title", "jobtitle": "job_title", "role": "job_title",
+  "description": "summary", "overview": "summary",
+  "responsibility": "responsibilities", "duties": "responsibilities", "tasks": "responsibilities",
+  "requirement": "requirements", "experience": "requirements",
+  "skills": "technical_skills", "technical_skill": "technical_skills", "tech_skills": "technical_skills",
+  "technologies": "technical_skills",
+  "qualification": "qualifications", "certifications": "qualifications", "education": "qualifications",
+}
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)```", re.S)
+# A numbering marker only counts when followed by a space: "2.5+ years" and "3.x" are content
+_ITEM_PREFIX = re.compile(rf"^\s*(?:[{re.escape(BULLETS)}]+|\(?\d{{1,2}}[.)](?=\s)|\(?[a-z][.)](?=\s))\s*")
+_SPACES = re.compile(r"\s+")
+_LIST_SPLIT = re.compile(rf"\n+|\s+[{re.escape(BULLETS)}]\s+|\s*;\s*")
+_QUOTES = {'"': '"', "'": "'", "“": "”", "”": "”", "‘": "’", "’": "’"}
+# ends before a separator, or before the quote of a next value when the model dropped the comma
+_BARE = re.compile(r"[^\s\"'“”‘’,:{}\[\]][^\"“”,:{}\[\]\n]*?(?=\s*[:,}\]\n\"“]|\s*$)")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+
+
+class RepairError(ValueError):
+  """The output could not be turned into the schema. `issues` says what was wrong, `raw` is the text."""
+
+  def __init__(self, message:str, issues:Optional[List[str]]=None, raw:str=""):
+    self.issues = list(issues or [])
+    self.raw = raw
+    detail = f" ({'; '.join(self.issues)})" if self.issues else ""
+    super().__init__(f"{message}{detail}")
+
+
+def loads_tolerant(text:str) -> Tuple[Any, List[str]]:
+  """json.loads that repairs common model mistakes. Returns (value, issues)."""
+  if not isinstance(text, str):
+    raise RepairError(f"expected text, got {type(text).__name__}")
+  try:
+    return json.loads(text), []
+  except ValueError:
+    pass
+
+  issues: List[str] = []
+  body = text
+  fence = _FENCE.search(body)
+  if fence:
+    body = fence.group(1)
+    issues.append("code_fence")
+  start = min((i for i in (body.find("{"), body.find("[")) if i >= 0), default=-1)
+  if start < 0:
+    raise RepairError("no JSON object in the output", raw=text)
+  if body[:start].strip():
+    issues.append("leading_text")
+
+  fixed, more = _repair(body[start:])
+  issues += more
+  try:
+    value = json.loads(fixed, strict=False)
+  except ValueError as e:
+    raise RepairError(f"unrepairable JSON: {e}", issues, raw=text) from None
+  for issue in issues:
+    LLM_REPAIRS.inc(kind=issue)
+  return value, issues
+
+
+def _repair(s:str) -> Tuple[str, List[str]]:
+  """
+  One pass over `s` from its first bracket, rewriting it into strict JSON and
+  stopping after the value that bracket opens.
+  """
+  out: List[str] = []
+  issues: List[str] = []
+  stack: List[str] = []
+  last = ""  # last token outside strings: "{", "[", ",", ":", "key" or "value"
+  i, n = 0, len(s)
+
+  def note(issue:str) -> None:
+    if issue not in issues:
+      issues.append(issue)
+
+  def at_key() -> bool:
+    return bool(stack) and stack[-1] == "}" and last in ("{", ",")
+
+  def before_value() -> None:
+    if last == "key":
+      out.append(":")
+      note("missing_colon")
+    elif last == "value" and stack:
+      # two values in a row inside a container: the model dropped a comma
+      out.append(",")
+      note("missing_comma")
+
+  while i < n:
+    c = s[i]
+    if c in " \t\r\n":
+      out.append(c)
+      i += 1
+      continue
+
+    if c in _QUOTES:
+      is_key = at_key()
+      before_value()
+      if c != '"':
+        note("quotes")
+      close = _QUOTES[c]
+      j = i + 1
+      buf: List[str] = []
+      while j < n and (s[j] != close or _inner_quote(s, j)):
+        if s[j] == "\\" and j + 1 < n:
+          buf.append("'" if s[j + 1] == "'" else s[j:j + 2])
+          j += 2
+          continue
+        if s[j] == '"':
+          buf.append('\\"')
+          if c == '"':
+            note("inner_quote")
+        else:
+          buf.append(s[j])
+        j += 1
+      if j >= n:
+        note("truncated")
+      out.append('"' + "".join(buf) + '"')
+      i = j + 1
+      last = "key" if is_key else "value"
+      continue
+
+    if c in "{[":
+      before_value()
+      stack.append("}" if c == "{" else "]")
+      out.append(c)
+      last = c
+      i += 1
+      continue
+
+    if c in "}]":
+      if not stack:
+        break
+      if last == "key":
+        out.append(":null")
+        note("missing_value")
+      if last == ",":
+        while out and out[-1] in " \t\r\n":
+          out.pop()
+        out.pop()  # the trailing comma
+        note("trailing_comma")
+      closer = stack.pop()
+      if c != closer:
+        note("bracket_mismatch")
+      out.append(closer)
+      i += 1
+      last = "value"
+      if not stack:
+        break
+      continue
+
+    if c == ",":
+      if last in ("{", "[", ","):
+        note("stray_comma")
+      else:
+        if last == "key":
+          out.append(":null")
+          note("missing_value")
+        out.append(c)
+        last = c
+      i += 1
+      continue
+
+    if c == ":":
+      out.append(c)
+      last = c
+      i += 1
+      continue
+
+    # bare word: a key, a literal, a number or an unquoted string
+    m = _BARE.match(s, i)
+    if m is None:
+      note("junk")
+      i += 1
+      continue
+    word = m.group(0).strip()
+    is_key = at_key()
+    before_value()
+    if is_key:
+      out.append(json.dumps(word))
+      note("unquoted_key")
+      last = "key"
+    else:
+      if word in _LITERALS:
+        out.append(_LITERALS[word])
+        if word != _LITERALS[word]:
+          note("python_literal")
+      elif _NUMBER.fullmatch(word):
+        out.append(word)
+      else:
+        out.append(json.dumps(word))
+        note("unquoted_string")
+      last = "value"
+    i = m.end()
+
+  if i < n and s[i:].strip():
+    note("trailing_text")
+  if stack:
+    note("truncated")
+    while out and out[-1] in (" ", "\t", "\r", "\n", ",", ":"):
+      if out.pop() == ":":
+        out.append(":null")
+        break
+    if last == "key":
+      out.append(":null")
+    out.extend(reversed(stack))
+  return "".join(out), issues
+
+
+def _inner_quote(s:str, j:int) -> bool:
+  """A quote that does not end its string: JSON never follows a closing quote with anything but , : } ] or a line break."""
+  k = j + 1
+  while k < len(s) and s[k] in " \t\r":
+    k += 1
+  return k < len(s) and s[k] not in ",:}]\n"
+
+
+def clean_item(text:str) -> str:
+  """One list item: no bullet or numbering, whitespace collapsed."""
+  return _SPACES.sub(" ", _ITEM_PREFIX.sub("", text)).strip()
+
+
+def clean_list(value:Any) -> List[str]:
+  """Any model value -> de-duplicated list of clean strings, in order."""
+  if value is None:
+    items: List[Any] = []
+  elif isinstance(value, str):
+    items = _LIST_SPLIT.split(value)
+  elif isinstance(value, (list, tuple)):
+    items = []
+    for v in value:
+      items.extend(v if isinstance(v, (list, tuple)) else [v])
+  else:
+    items = [value]
+
+  seen = set()
+  out: List[str] = []
+  for item in items:
+    if isinstance(item, dict):
+      item = next((v for v in item.values() if isinstance(v, str)), "")
+    text = clean_item(str(item)) if item is not None else ""
+    key = text.casefold()
+    if text and key not in seen:
+      seen.add(key)
+      out.append(text)
+  return out
+
+
+def _field_name(key:Any) -> str:
+  norm = re.sub(r"[\s-]+", "_", str(key).strip().lower())
+  return KEY_ALIASES.get(norm, norm)
+
+
+def coerce_response(value:Any) -> Tuple[Dict[str, Any], List[str]]:
+  """
+  `value` (the parsed answer, with or without its {"response": ...} wrapper)
+  -> exactly the six fields with their types, plus the issues fixed on the way.
+  """
+  if isinstance(value, dict) and "response" in value and isinstance(value["response"], dict):
+    value = value["response"]
+  if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+    value = value[0]
+  if not isinstance(value, dict):
+    raise RepairError(f"expected an object, got {type(value).__name__}")
+
+  issues: List[str] = []
+  fields: Dict[str, Any] = {}
+  for key, v in value.items():
+    name = _field_name(key)
+    if name not in TEXT_FIELDS and name not in LIST_FIELDS:
+      issues.append(f"unknown_key:{key}")
+      continue
+    if name != key:
+      issues.append(f"renamed_key:{key}")
+    if name in fields:
+      fields[name] = [fields[name], v]  # both spellings were present: keep both
+    else:
+      fields[name] = v
+  if not fields:
+    raise RepairError("none of the six fields is present", issues)
+
+  response: Dict[str, Any] = {}
+  for name in TEXT_FIELDS:
+    v = fields.get(name)
+    if name not in fields:
+      issues.append(f"missing:{name}")
+    if isinstance(v, (list, tuple)):
+      issues.append(f"list_as_text:{name}")
+      v = " ".join(clean_list(v))
+    response[name] = _SPACES.sub(" ", str(v)).strip() if v is not None else ""
+  for name in LIST_FIELDS:
+    v = fields.get(name)
+    if name not in fields:
+      issues.append(f"missing:{name}")
+    elif not isinstance(v, list):
+      issues.append(f"text_as_list:{name}")
+    response[name] = clean_list(v)
+
+  for issue in issues:
+    LLM_REPAIRS.inc(kind=issue.split(":", 1)[0])
+  return response, issues
+
+
+def parse_response(text:str) -> Dict[str, Any]:
+  """Model output -> {"response": six fields}. Raises RepairError when it cannot be recovered."""
+  value, issues = loads_tolerant(text)
+  try:
+    response, _ = coerce_response(value)
+  except RepairError as e:
+    raise RepairError(str(e), issues + e.issues, raw=text) from None
+  return {"response": response}
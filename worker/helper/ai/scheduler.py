@@ -0,0 +1,320 @@
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+import heapq
+import itertools
+import threading
+import time
+
+import requests
+
+from config.settings import AI_MAX_INFLIGHT, AI_TOKENS_PER_S, AI_TOKEN_BURST, AI_HEALTH_INTERVAL
+from metrics.instruments import LLM_QUEUE_SECONDS, LLM_COALESCED, LLM_FAILOVERS
+
+T = TypeVar("T")
+
+# Lanes, most urgent first. Jobs carry theirs in the `x-priority` Kafka header.
+INTERACTIVE = 0  # submitted through the API by a user who is waiting
+NORMAL      = 1
+BULK        = 2  # imports and backfills
+PRIORITIES = {"interactive": INTERACTIVE, "normal": NORMAL, "bulk": BULK}
+LANE_NAMES = {v: k for k, v in PRIORITIES.items()}
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=NORMAL)
+
+
+def priority_of(name:Optional[str]) -> int:
+  return PRIORITIES.get((name or "").strip().lower(), NORMAL)
+
+
+@contextmanager
+def llm_priority(level:int) -> Iterator[None]:
+  """Generations started inside the block queue in `level`'s lane."""
+  token = _priority.set(level)
+  try:
+    yield
+  finally:
+    _priority.reset(token)
+
+
+class TokenBucket:
+  """
+  Token budget shared by every generation of this process: `rate` tokens per
+  second, up to `burst` banked. A request takes its estimated cost up front and
+  settles the difference once Ollama reports the real counts, so a long answer
+  delays the requests after it. rate <= 0 disables the limit.
+  """
+
+  def __init__(self, rate:float=AI_TOKENS_PER_S, burst:float=AI_TOKEN_BURST):
+    self.rate = rate
+    self.burst = max(burst, 1.0)
+    self._tokens = self.burst
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def _refill(self) -> None:
+    now = time.monotonic()
+    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+    self._updated = now
+
+  def take(self, cost:float) -> float:
+    """Block until `cost` tokens are available and take them. Returns seconds waited."""
+    if self.rate <= 0:
+      return 0.0
+    cost = min(cost, self.burst)  # one oversized prompt must still get through
+    waited = 0.0
+    while True:
+      with self._lock:
+        self._refill()
+        if self._tokens >= cost:
+          self._tokens -= cost
+          return waited
+        wait = (cost - self._tokens) / self.rate
+      time.sleep(wait)
+      waited += wait
+
+  def settle(self, extra:float) -> None:
+    """Charge (or refund) the difference between estimated and actual tokens; may go into debt."""
+    if self.rate <= 0:
+      return
+    with self._lock:
+      self._refill()
+      self._tokens = min(self.burst, self._tokens - extra)
+
+
+class SingleFlight:
+  """Identical requests in flight at the same time share one execution."""
+
+  def __init__(self):
+    self._calls: Dict[str, Future] = {}
+    self._lock = threading.Lock()
+
+  def do(self, key:str, fn:Callable[[], Any]) -> Any:
+    with self._lock:
+      fut = self._calls.get(key)
+      leader = fut is None
+      if leader:
+        fut = self._calls[key] = Future()
+    if not leader:
+      LLM_COALESCED.inc()
+      return fut.result()
+
+    try:
+      result = fn()
+    except BaseException as e:
+      fut.set_exception(e)
+      raise
+    else:
+      fut.set_result(result)
+      return result
+    finally:
+      with self._lock:
+        del self._calls[key]
+
+
+class Lanes:
+  """
+  At most `slots` generations at once. A freed slot goes to the most urgent lane,
+  first come first served within a lane, so bulk work never holds up a user.
+  """
+
+  def __init__(self, slots:int=AI_MAX_INFLIGHT):
+    self.slots = max(1, slots)
+    self.active = 0
+    self._waiting: List[Tuple[int, int]] = []
+    self._seq = itertools.count()
+    self._cond = threading.Condition()
+
+  @contextmanager
+  def slot(self, priority:int) -> Iterator[None]:
+    me = (priority, next(self._seq))
+    started = time.perf_counter()
+    with self._cond:
+      heapq.heappush(self._waiting, me)
+      while self.active >= self.slots or self._waiting[0] != me:
+        self._cond.wait()
+      heapq.heappop(self._waiting)
+      self.active += 1
+      self._cond.notify_all()
+    LLM_QUEUE_SECONDS.observe(time.perf_counter() - started, lane=LANE_NAMES.get(priority, str(priority)))
+    try:
+      yield
+    finally:
+      with self._cond:
+        self.active -= 1
+        self._cond.notify_all()
+
+
+class Endpoint:
+  __slots__ = ("host", "inflight", "healthy", "failures", "down_until")
+
+  def __init__(self, host:str):
+    self.host = host
+    self.inflight = 0
+    self.healthy = True
+    self.failures = 0
+    self.down_until = 0.0
+
+
+class EndpointPool:
+  """
+  Ollama hosts behind one client. Requests go to the healthy host with the fewest
+  generations in flight. A host that fails is skipped for a growing cool-down
+  (2s doubling to a minute), then tried again; the background health check
+  (GET /api/tags every `health_interval` s) brings it back sooner.
+  """
+
+  COOL_DOWN = 2.0
+  COOL_DOWN_MAX = 60.0
+
+  def __init__(self, hosts:List[str], session:Optional[requests.Session]=None,
+               health_interval:float=AI_HEALTH_INTERVAL):
+    if not hosts:
+      raise ValueError("at least one Ollama host is needed")
+    self.endpoints = [Endpoint(h.rstrip("/")) for h in hosts]
+    self._session = session or requests.Session()
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+    if health_interval > 0 and len(self.endpoints) > 1:
+      self._thread = threading.Thread(target=self._health_loop, args=(health_interval,),
+                                      name="llm-health", daemon=True)
+      self._thread.start()
+
+
+  def acquire(self, skip:Tuple[Endpoint, ...]=()) -> Optional[Endpoint]:
+    """Least-loaded usable endpoint not in `skip`, counted as in flight. None when all were skipped."""
+    now = time.monotonic()
+    with self._lock:
+      candidates = [e for e in self.endpoints if e not in skip]
+      if not candidates:
+        return None
+      usable = [e for e in candidates if e.healthy or e.down_until <= now]
+      # all down: try the one that comes back first rather than failing outright
+      pick = min(usable, key=lambda e: (e.inflight, e.failures)) if usable else min(candidates, key=lambda e: e.down_until)
+      pick.inflight += 1
+      return pick
+
+
+  def release(self, endpoint:Endpoint, ok:bool) -> None:
+    with self._lock:
+      endpoint.inflight -= 1
+      if ok:
+        endpoint.healthy, endpoint.failures = True, 0
+      else:
+        self._mark_down(endpoint)
+
+
+  def call(self, fn:Callable[[str], T]) -> T:
+    """
+    `fn(host)` on the least-loaded host, failing over to the next one on connection
+    errors and 5xx. Raises the last error once every host failed.
+    """
+    tried: Tuple[Endpoint, ...] = ()
+    last: Optional[Exception] = None
+    while True:
+      endpoint = self.acquire(skip=tried)
+      if endpoint is None:
+        assert last is not None
+        raise last  # every host failed
+      try:
+        result = fn(endpoint.host)
+      except Exception as e:
+        failover = failover_error(e)
+        self.release(endpoint, ok=not failover)
+        if not failover:
+          raise
+        last = e
+        tried += (endpoint,)
+        LLM_FAILOVERS.inc(host=endpoint.host)
+        print(f"[llm] {endpoint.host} failed ({type(e).__name__}); marked down")
+        continue
+      self.release(endpoint, ok=True)
+      return result
+
+
+  def _mark_down(self, endpoint:Endpoint) -> None:
+    endpoint.healthy = False
+    endpoint.failures += 1
+    endpoint.down_until = time.monotonic() + min(self.COOL_DOWN * 2 ** (endpoint.failures - 1), self.COOL_DOWN_MAX)
+
+
+  def check(self) -> bool:
+    """Probe every host once; True if at least one answers."""
+    any_up = False
+    for endpoint in self.endpoints:
+      try:
+        up = self._session.get(f"{endpoint.host}/api/tags", timeout=5).ok
+      except requests.RequestException:
+        up = False
+      with self._lock:
+        if up:
+          endpoint.healthy, endpoint.failures = True, 0
+        elif endpoint.healthy or endpoint.down_until <= time.monotonic():
+          self._mark_down(endpoint)
+      any_up = any_up or up
+    return any_up
+
+
+  def _health_loop(self, interval:float) -> None:
+    while not self._stop.wait(interval):
+      self.check()
+
+
+  def close(self) -> None:
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+
+
+def failover_error(e:Exception) -> bool:
+  """Worth another host: it is down or broken. Read timeouts are not; the generation may still be running."""
+  if isinstance(e, requests.ConnectionError) and not isinstance(e, requests.ReadTimeout):
+    return True
+  response = getattr(e, "response", None)
+  return isinstance(e, requests.HTTPError) and response is not None and response.status_code >= 500
+
+
+class LlmScheduler:
+  """
+  Every generation of an AiClient passes through here, in this order:
+  1. single-flight: an identical request already in flight is awaited, not repeated
+     (streamed requests excepted: a follower would miss the stream's callbacks);
+  2. lanes: a bounded number of generations at once, most urgent lane first
+     (see llm_priority);
+  3. token bucket: the process-wide token budget;
+  4. endpoint pool: least-loaded healthy host, failing over to the next one on
+     connection errors and 5xx.
+  """
+
+  def __init__(self, pool:EndpointPool, lanes:Optional[Lanes]=None, limiter:Optional[TokenBucket]=None):
+    self.pool = pool
+    self.lanes = lanes if lanes is not None else Lanes()
+    self.limiter = limiter if limiter is not None else TokenBucket()
+    self._flights = SingleFlight()
+
+
+  def run(self, key:Optional[str], cost:int, call:Callable[[str], Tuple[Any, Optional[int]]]) -> Any:
+    """
+    `call(host)` performs the request and returns (result, tokens actually used,
+    or None if unknown). `cost` is the estimate charged up front. Requests with
+    the same `key` in flight together share one execution; key=None never does.
+    """
+    if key is None:
+      return self._run(cost, call)
+    return self._flights.do(key, lambda: self._run(cost, call))
+
+
+  def _run(self, cost:int, call:Callable[[str], Tuple[Any, Optional[int]]]) -> Any:
+    with self.lanes.slot(_priority.get()):
+      self.limiter.take(cost)
+      result, used = self.pool.call(call)
+      if used is not None:
+        self.limiter.settle(used - cost)
+      return result
+
+
+  def close(self) -> None:
+    self.pool.close()
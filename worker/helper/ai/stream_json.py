@@ -0,0 +1,202 @@
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+
+
+Path = Tuple[Any, ...]
+
+
+class OffSchema(ValueError):
+  """The streamed output is not (or no longer) the JSON we asked for."""
+
+
+class _Frame:
+  __slots__ = ("kind", "start", "path", "key", "index", "expect")
+
+  def __init__(self, kind:str, start:int, path:Path):
+    self.kind = kind          # "obj" | "arr"
+    self.start = start
+    self.path = path
+    self.key: Any = None
+    self.index = 0
+    self.expect = "key" if kind == "obj" else "value"
+
+
+class IncrementalJsonParser:
+  """
+  Push parser for JSON arriving a few characters at a time.
+
+  `feed()` returns `(path, value)` for every value that completed in the chunk
+  and sits at most `max_depth` levels deep, e.g. `(("response", "job_title"), "Engineer")`.
+  It only tracks structure while scanning; a value is decoded with `json.loads`
+  once its closing character arrives.
+  """
+
+  def __init__(self, max_depth:int=2):
+    self.max_depth = max_depth
+    self.done = False
+    self._buf = ""
+    self._pos = 0
+    self._stack: List[_Frame] = []
+    self._in_string = False
+    self._escape = False
+    self._string_start = 0
+    self._string_is_key = False
+    self._scalar_start: Optional[int] = None
+    self._started = False
+
+
+  @property
+  def text(self) -> str:
+    return self._buf
+
+
+  def feed(self, chunk:str) -> List[Tuple[Path, Any]]:
+    self._buf += chunk
+    events: List[Tuple[Path, Any]] = []
+    buf = self._buf
+
+    while self._pos < len(buf):
+      i = self._pos
+      c = buf[i]
+      self._pos += 1
+
+      if self.done:
+        if not c.isspace():
+          raise OffSchema(f"trailing data after JSON: {buf[i:i + 20]!r}")
+        continue
+
+      if self._in_string:
+        if self._escape:
+          self._escape = False
+        elif c == "\\":
+          self._escape = True
+        elif c == '"':
+          self._in_string = False
+          if self._string_is_key:
+            frame = self._stack[-1]
+            frame.key = self._decode(self._string_start, i + 1)
+            frame.expect = "colon"
+          else:
+            self._complete(self._string_start, i + 1, events)
+        continue
+
+      if self._scalar_start is not None:
+        if c.isspace() or c in ",]}":
+          start, self._scalar_start = self._scalar_start, None
+          self._complete(start, i, events)
+        else:
+          continue
+
+      if c.isspace():
+        continue
+
+      if not self._started:
+        if c not in "{[":
+          raise OffSchema(f"output does not start with JSON: {buf[i:i + 20]!r}")
+        self._started = True
+
+      top = self._stack[-1] if self._stack else None
+
+      if c == '"':
+        self._in_string = True
+        self._string_start = i
+        self._string_is_key = top is not None and top.kind == "obj" and top.expect == "key"
+        if not self._string_is_key:
+          self._expect_value(top, c)
+      elif c in "{[":
+        self._expect_value(top, c)
+        self._stack.append(_Frame("obj" if c == "{" else "arr", i, self._child_path(top)))
+      elif c in "}]":
+        if top is None or (c == "}") != (top.kind == "obj"):
+          raise OffSchema(f"unbalanced {c!r}")
+        self._stack.pop()
+        self._complete(top.start, i + 1, events)
+      elif c == ":":
+        if top is None or top.kind != "obj" or top.expect != "colon":
+          raise OffSchema("unexpected ':'")
+        top.expect = "value"
+      elif c == ",":
+        if top is None or top.expect != "comma":
+          raise OffSchema("unexpected ','")
+        if top.kind == "obj":
+          top.expect = "key"
+        else:
+          top.index += 1
+          top.expect = "value"
+      else:
+        self._expect_value(top, c)
+        self._scalar_start = i
+
+    return events
+
+
+  def _expect_value(self, top:Optional[_Frame], c:str) -> None:
+    if top is not None and top.expect != "value":
+      raise OffSchema(f"unexpected {c!r} while expecting {top.expect}")
+
+
+  @staticmethod
+  def _child_path(top:Optional[_Frame]) -> Path:
+    if top is None:
+      return ()
+    return top.path + ((top.key,) if top.kind == "obj" else (top.index,))
+
+
+  def _complete(self, start:int, end:int, events:List[Tuple[Path, Any]]) -> None:
+    top = self._stack[-1] if self._stack else None
+    path = self._child_path(top)
+    if top is None:
+      self.done = True
+    else:
+      top.expect = "comma"
+    if len(path) <= self.max_depth:
+      events.append((path, self._decode(start, end)))
+
+
+  def _decode(self, start:int, end:int) -> Any:
+    try:
+      return json.loads(self._buf[start:end])
+    except ValueError as e:
+      raise OffSchema(f"invalid JSON value: {e}") from e
+
+
+class SchemaWatcher:
+  """
+  Checks streamed fields of `{root: {field: value}}` against an expected schema.
+
+  `observe()` raises OffSchema on an unknown key or a wrong type, calls `on_field`
+  as each field completes, and returns True once every field has arrived.
+  """
+
+  def __init__(self, root:str, fields:Dict[str, type], on_field:Optional[Callable[[str, Any], None]]=None):
+    self.root = root
+    self.fields = fields
+    self.on_field = on_field
+    self.values: Dict[str, Any] = {}
+
+
+  def observe(self, path:Path, value:Any) -> bool:
+    if not path:
+      return self.satisfied()
+    if path[0] != self.root:
+      raise OffSchema(f"unexpected top-level key {path[0]!r}")
+    if len(path) == 2:
+      key = path[1]
+      expected = self.fields.get(key)
+      if expected is None:
+        raise OffSchema(f"unexpected field {key!r}")
+      if not isinstance(value, expected):
+        raise OffSchema(f"{key!r} should be {expected.__name__}, got {type(value).__name__}")
+      self.values[key] = value
+      if self.on_field is not None:
+        self.on_field(key, value)
+    return self.satisfied()
+
+
+  def satisfied(self) -> bool:
+    return len(self.values) == len(self.fields)
+
+
+  def as_json(self) -> str:
+    return json.dumps({self.root: self.values}, ensure_ascii=False)
@@ -0,0 +1,91 @@
+
+from hashlib import blake2b
+from typing import List, Optional, Protocol
+import re
+
+import numpy as np
+import requests
+
+from config.settings import AI_HOST, EMBED_MODEL
+from helper.ai.scheduler import EndpointPool
+
+
+class Embedder(Protocol):
+  """Anything that turns texts into one float32 row each."""
+
+  name: str
+
+  def embed(self, texts:List[str]) -> np.ndarray:
+    ...
+
+
+def normalize_rows(vectors:np.ndarray) -> np.ndarray:
+  """Unit-length rows, so a dot product is the cosine similarity."""
+  vectors = np.asarray(vectors, dtype=np.float32)
+  norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+  norms[norms == 0] = 1
+  return vectors / norms
+
+
+class OllamaEmbedder:
+  """
+  Embeddings from a local Ollama model through /api/embed, one request per batch of texts.
+  `host` may list several comma-separated hosts, like AI_HOST; requests go to the
+  least-loaded one and fail over to the next.
+  """
+
+  def __init__(self, model:str=EMBED_MODEL, host:str=AI_HOST, timeout:int=120,
+               session:Optional[requests.Session]=None):
+    self.name = f"ollama:{model}"
+    self.model = model
+    self.timeout = timeout
+    self._session = session or requests.Session()
+    # A down host is retried after its cool-down; the LLM client's health check covers the rest
+    self.pool = EndpointPool([h.strip() for h in host.split(",") if h.strip()], session=self._session,
+                             health_interval=0)
+
+  def embed(self, texts:List[str]) -> np.ndarray:
+    if not texts:
+      return np.zeros((0, 0), dtype=np.float32)
+    return normalize_rows(np.array(self.pool.call(lambda host: self._post(host, texts)), dtype=np.float32))
+
+  def _post(self, host:str, texts:List[str]) -> List[List[float]]:
+    response = self._session.post(f"{host}/api/embed", json={"model": self.model, "input": texts}, timeout=self.timeout)
+    response.raise_for_status()
+    return response.json()["embeddings"]
+
+
+_WORD = re.compile(r"[a-z0-9+#.]+")
+
+
+class HashingEmbedder:
+  """
+  Model-free fallback: hashed bag of words and word bigrams.
+
+  Much weaker than a real embedding model, but deterministic and instant.
+  Useful offline, in the benchmark, or when no embedding model is pulled.
+  """
+
+  def __init__(self, dim:int=512):
+    self.name = f"hashing:{dim}"
+    self.dim = dim
+
+  def _bucket(self, token:str) -> int:
+    return int.from_bytes(blake2b(token.encode("utf-8"), digest_size=4).digest(), "little") % self.dim
+
+  def embed(self, texts:List[str]) -> np.ndarray:
+    out = np.zeros((len(texts), self.dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+      words = _WORD.findall(text.lower())
+      for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        out[row, self._bucket(token)] += 1
+    return normalize_rows(np.log1p(out))
+
+
+def make_embedder(kind:str) -> Embedder:
+  """EMBED_BACKEND values: "ollama" or "hashing"."""
+  if kind == "hashing":
+    return HashingEmbedder()
+  if kind == "ollama":
+    return OllamaEmbedder()
+  raise ValueError(f"unknown embedding backend: {kind}")
@@ -0,0 +1,190 @@
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import fcntl
+import json
+import os
+import threading
+
+import numpy as np
+
+from .embedder import Embedder, normalize_rows
+
+
+class VectorIndex:
+  """
+  Append-only float32 matrix on disk, memory-mapped for brute-force search.
+
+  Three files share `path` as prefix:
+  - `.f32`  rows of `dim` float32, unit length, appended in order;
+  - `.ids`  one id per line, line i names row i;
+  - `.json` dim and the embedder that produced the rows (vector spaces never mix).
+  Re-adding an id appends a new row and hides the old one. Appends take an
+  exclusive flock, so every worker process can write to the same index; readers
+  pick up new rows on their next query. Row data is written before its id line,
+  so a reader never sees an id without its vector; rows (or a partial id line)
+  left behind by a writer that died in between are cut off by the next append.
+  """
+
+  def __init__(self, path:str, embedder_name:str):
+    self.path = path
+    self.embedder_name = embedder_name
+    self.dim: Optional[int] = None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    self._lock = threading.Lock()
+    self._ids: List[str] = []
+    self._latest: Dict[str, int] = {}
+    self._ids_read = 0  # bytes of the .ids file already parsed
+    self._matrix: Optional[np.ndarray] = None
+    self._live: Optional[np.ndarray] = None
+    self._load_meta()
+
+
+  def _load_meta(self) -> None:
+    try:
+      with open(self.path + ".json") as f:
+        meta = json.load(f)
+    except FileNotFoundError:
+      return
+    if meta.get("embedder") != self.embedder_name:
+      raise ValueError(f"{self.path} holds {meta.get('embedder')} vectors, not {self.embedder_name}")
+    self.dim = int(meta["dim"])
+
+
+  def add(self, ids:Sequence[str], vectors:np.ndarray) -> None:
+    vectors = normalize_rows(vectors)
+    if len(ids) != len(vectors):
+      raise ValueError("one vector per id")
+    if not len(ids):
+      return
+
+    with self._lock, open(self.path + ".ids", "a", encoding="utf-8") as id_file:
+      fcntl.flock(id_file, fcntl.LOCK_EX)
+      try:
+        self._load_meta()
+        if self.dim is None:
+          self.dim = int(vectors.shape[1])
+          with open(self.path + ".json", "w") as f:
+            json.dump({"dim": self.dim, "embedder": self.embedder_name}, f)
+        if vectors.shape[1] != self.dim:
+          raise ValueError(f"vectors have {vectors.shape[1]} dims, index has {self.dim}")
+
+        # Only rows with an id line are committed: drop whatever a failed append left after them
+        self._refresh()
+        os.ftruncate(id_file.fileno(), self._ids_read)
+        with open(self.path + ".f32", "ab") as f:
+          f.truncate(len(self._ids) * self.dim * 4)
+          f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+          f.flush()
+          os.fsync(f.fileno())
+        id_file.write("".join(f"{i}\n" for i in ids))
+        id_file.flush()
+      finally:
+        fcntl.flock(id_file, fcntl.LOCK_UN)
+
+
+  def _refresh(self) -> None:
+    """Map rows appended since the last call, by this or any other process."""
+    try:
+      with open(self.path + ".ids", "rb") as f:
+        f.seek(self._ids_read)
+        tail = f.read()
+    except FileNotFoundError:
+      return
+    complete = tail[:tail.rfind(b"\n") + 1]  # a line being written is picked up next time
+    if not complete and self._matrix is not None:
+      return
+
+    self._ids_read += len(complete)
+    for line in complete.decode("utf-8").splitlines():
+      self._latest[line] = len(self._ids)
+      self._ids.append(line)
+    if self.dim is None:
+      self._load_meta()
+    if not self._ids or self.dim is None:
+      return
+
+    self._matrix = np.memmap(self.path + ".f32", dtype=np.float32, mode="r", shape=(len(self._ids), self.dim))
+    live = np.zeros(len(self._ids), dtype=bool)
+    live[list(self._latest.values())] = True
+    self._live = live
+
+
+  def __len__(self) -> int:
+    with self._lock:
+      self._refresh()
+      return len(self._latest)
+
+
+  def vector(self, id:str) -> Optional[np.ndarray]:
+    with self._lock:
+      self._refresh()
+      row = self._latest.get(id)
+      return None if row is None or self._matrix is None else np.array(self._matrix[row])
+
+
+  def search(self, query:np.ndarray, k:int=10, exclude:Iterable[str]=()) -> List[Tuple[str, float]]:
+    """Top `k` (id, cosine similarity) for one query vector."""
+    with self._lock:
+      self._refresh()
+      if self._matrix is None or self._live is None:
+        return []
+      query = normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+      scores = self._matrix @ query
+      scores[~self._live] = -np.inf
+      for id in exclude:
+        row = self._latest.get(id)
+        if row is not None:
+          scores[row] = -np.inf
+
+      k = min(k, int(self._live.sum()))
+      if k <= 0:
+        return []
+      top = np.argpartition(-scores, k - 1)[:k]
+      top = top[np.argsort(-scores[top])]
+      return [(self._ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+class EmbeddingStore:
+  """
+  Embeddings of analysed jobs: one index of cleaned ads (id = job id) and one of
+  their responsibilities (id = "<job id>#<n>"), both from the same embedder.
+  """
+
+  def __init__(self, directory:str, embedder:Embedder):
+    self.embedder = embedder
+    self.ads = VectorIndex(os.path.join(directory, "ads"), embedder.name)
+    self.responsibilities = VectorIndex(os.path.join(directory, "responsibilities"), embedder.name)
+
+
+  def add_jobs(self, jobs:Sequence[Tuple[str, str, Sequence[str]]]) -> None:
+    """Embed (job id, cleaned ad, responsibilities) triples with a single embedder call."""
+    texts: List[str] = []
+    resp_ids: List[str] = []
+    for _, ad, _ in jobs:
+      texts.append(ad)
+    for jid, _, responsibilities in jobs:
+      for n, text in enumerate(responsibilities):
+        texts.append(text)
+        resp_ids.append(f"{jid}#{n}")
+    if not texts:
+      return
+
+    vectors = self.embedder.embed(texts)
+    self.ads.add([jid for jid, _, _ in jobs], vectors[:len(jobs)])
+    self.responsibilities.add(resp_ids, vectors[len(jobs):])
+
+
+  def similar_jobs(self, job_id:str, k:int=10) -> List[Tuple[str, float]]:
+    vec = self.ads.vector(job_id)
+    if vec is None:
+      return []
+    return self.ads.search(vec, k=k, exclude=[job_id])
+
+
+  def rank_jobs(self, profile:str, k:int=10) -> List[Tuple[str, float]]:
+    return self.ads.search(self.embedder.embed([profile])[0], k=k)
+
+
+  def rank_responsibilities(self, profile:str, k:int=10) -> List[Tuple[str, float]]:
+    return self.responsibilities.search(self.embedder.embed([profile])[0], k=k)
@@ -0,0 +1,47 @@
+"""
+Query the worker's embedding index.
+
+    python -m helper.embeddings.search similar <job id>
+    python -m helper.embeddings.search rank "Python, Kafka, React"   # jobs for a profile
+    python -m helper.embeddings.search rank --responsibilities       # default profile: the extractor's skills
+"""
+import argparse
+import time
+
+from config.settings import EMBED_BACKEND, EMBED_DIR
+from .embedder import make_embedder
+from .index import EmbeddingStore
+
+
+def main(argv=None):
+  ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  ap.add_argument("query", choices=["similar", "rank"])
+  ap.add_argument("target", nargs="?", help="job id for `similar`, profile text for `rank`")
+  ap.add_argument("-k", type=int, default=10)
+  ap.add_argument("--responsibilities", action="store_true", help="rank responsibilities instead of whole ads")
+  ap.add_argument("--dir", default=EMBED_DIR)
+  ap.add_argument("--backend", default=EMBED_BACKEND)
+  args = ap.parse_args(argv)
+
+  store = EmbeddingStore(args.dir, make_embedder(args.backend))
+  started = time.perf_counter()
+  if args.query == "similar":
+    if not args.target:
+      ap.error("similar needs a job id")
+    hits = store.similar_jobs(args.target, k=args.k)
+  else:
+    profile = args.target
+    if not profile:
+      from helper.ai.extract_keywords import SkillExtractor
+      profile = ", ".join(SkillExtractor().skills)
+    rank = store.rank_responsibilities if args.responsibilities else store.rank_jobs
+    hits = rank(profile, k=args.k)
+  elapsed = (time.perf_counter() - started) * 1000
+
+  for id, score in hits:
+    print(f"{score:.4f}  {id}")
+  print(f"[search] {len(hits)} hit(s) over {len(store.ads)} job(s) in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+  main()
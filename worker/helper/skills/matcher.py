@@ -0,0 +1,160 @@
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+import re
+
+
+# Tokens keep trailing +/# so C++ and C# survive; everything else splits words
+_TOKEN = re.compile(r"[a-z0-9]+[+#]*")
+
+# canonical id -> extra spellings. Canonical ids are the compact form of a name
+# (lowercased, punctuation and spaces dropped), so "Node.js" and "NodeJS" already
+# meet at "nodejs" without an entry here.
+SYNONYMS: Dict[str, List[str]] = {
+  "javascript": ["js", "ecmascript"],
+  "typescript": ["ts"],
+  "react": ["react.js", "reactjs"],
+  "nodejs": ["node"],
+  "express": ["express.js", "expressjs"],
+  "tailwind": ["tailwindcss", "tailwind css"],
+  "framermotion": ["framer motion"],
+  "mongodb": ["mongo"],
+  "postgresql": ["postgres"],
+  "restful": ["rest", "rest api", "rest apis", "restful api", "restful apis"],
+  "api": ["apis"],
+  "cicd": ["ci/cd", "ci cd", "continuous integration"],
+  "aws": ["amazon web services"],
+  "gcp": ["google cloud", "google cloud platform"],
+  "kubernetes": ["k8s"],
+}
+
+
+def tokenize(text:str) -> List[str]:
+  return _TOKEN.findall(text.lower())
+
+
+def compact(term:str) -> str:
+  return "".join(tokenize(term))
+
+
+_SPELLING_TO_ID = {compact(s): cid for cid, spellings in SYNONYMS.items() for s in spellings}
+
+
+def canonical_id(name:str) -> str:
+  """Canonical id of any skill name, in my list or not: "Node.js", "node" -> "nodejs"."""
+  key = compact(name)
+  return _SPELLING_TO_ID.get(key, key)
+
+
+class SkillIndex:
+  """
+  Skill vocabulary compiled once into a token-level Aho-Corasick automaton.
+
+  Every skill gets a canonical id; each alias is matched on whole tokens, both
+  as written ("node js") and squashed ("nodejs"). `find()` scans any text, from a
+  two-word candidate to a whole job description, in one pass and returns the
+  canonical ids it mentions, leftmost-longest and without overlaps.
+  """
+
+  def __init__(self, skills:Union[Iterable[str], Mapping[str, Iterable[str]]],
+               synonyms:Mapping[str, Iterable[str]]=SYNONYMS):
+    self.display: Dict[str, str] = {}
+    self._alias_to_id: Dict[str, str] = {}
+
+    spelling_to_id: Dict[str, str] = {}
+    for cid, spellings in synonyms.items():
+      for spelling in spellings:
+        spelling_to_id[compact(spelling)] = cid
+
+    aliases: Dict[str, set] = {}
+    extra = skills.items() if isinstance(skills, Mapping) else ((s, ()) for s in skills)
+    for name, more in extra:
+      key = compact(name)
+      if not key:
+        continue
+      cid = spelling_to_id.get(key, key)
+      self.display.setdefault(cid, name)
+      bucket = aliases.setdefault(cid, set())
+      bucket.update([name, cid, *more, *synonyms.get(cid, ())])
+
+    # token automaton: goto[state][token] -> state
+    self._goto: List[Dict[str, int]] = [{}]
+    self._fail: List[int] = [0]
+    self._out: List[List[Tuple[str, int]]] = [[]]
+
+    for cid, names in aliases.items():
+      for name in names:
+        tokens = tokenize(name)
+        if not tokens:
+          continue
+        self._alias_to_id[" ".join(tokens)] = cid
+        self._add(tokens, cid)
+        if len(tokens) > 1:
+          self._alias_to_id["".join(tokens)] = cid
+          self._add(["".join(tokens)], cid)
+
+    self._build_failure_links()
+
+
+  def _add(self, tokens:List[str], cid:str) -> None:
+    state = 0
+    for tok in tokens:
+      nxt = self._goto[state].get(tok)
+      if nxt is None:
+        nxt = len(self._goto)
+        self._goto[state][tok] = nxt
+        self._goto.append({})
+        self._fail.append(0)
+        self._out.append([])
+      state = nxt
+    if (cid, len(tokens)) not in self._out[state]:
+      self._out[state].append((cid, len(tokens)))
+
+
+  def _build_failure_links(self) -> None:
+    queue = deque(self._goto[0].values())
+    while queue:
+      state = queue.popleft()
+      for tok, nxt in self._goto[state].items():
+        queue.append(nxt)
+        f = self._fail[state]
+        while f and tok not in self._goto[f]:
+          f = self._fail[f]
+        target = self._goto[f].get(tok, 0)
+        self._fail[nxt] = target if target != nxt else 0
+        self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+
+  def __len__(self) -> int:
+    return len(self.display)
+
+
+  def canonical(self, term:str) -> Optional[str]:
+    """Exact alias lookup: 'Node.js', 'nodejs' and 'node' all give 'nodejs'."""
+    tokens = tokenize(term)
+    return self._alias_to_id.get(" ".join(tokens)) or self._alias_to_id.get("".join(tokens))
+
+
+  def scan(self, text:str) -> Iterator[Tuple[int, int, str]]:
+    """Yield every (first token, end token, canonical id) alias occurrence, overlaps included."""
+    state = 0
+    goto, fail, out = self._goto, self._fail, self._out
+    for i, tok in enumerate(tokenize(text)):
+      while state and tok not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(tok, 0)
+      for cid, length in out[state]:
+        yield i - length + 1, i + 1, cid
+
+
+  def find(self, text:str) -> List[str]:
+    """Canonical ids mentioned in `text`, in order of first appearance."""
+    hits = sorted(self.scan(text), key=lambda h: (h[0], h[0] - h[1]))
+    found: Dict[str, None] = {}
+    covered = 0
+    for start, end, cid in hits:
+      if start < covered:
+        continue
+      found.setdefault(cid, None)
+      covered = end
+    return list(found)
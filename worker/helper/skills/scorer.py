@@ -0,0 +1,114 @@
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse # type: ignore
+
+from .matcher import SYNONYMS, SkillIndex, tokenize
+
+
+SKILL = "skill:"  # vocabulary prefix of canonical skill ids, kept apart from plain words
+
+
+class ResponsibilityScorer:
+  """
+  BM25 ranking of a job's responsibilities against my skill list, no LLM involved.
+
+  Every item becomes a sparse row over plain words plus canonical skill ids, so
+  "Node.js" and "NodeJS" are one term. The query is +1 for each of my skills and
+  -`penalty` for each skill the job asks for that I lack. All jobs of a batch are
+  scored in one sparse pass, but every statistic is taken per job: the skill
+  automaton, the average item length, and no corpus IDF on skill terms (a skill
+  the job keeps repeating is what it wants most, not a weak signal). A job scores
+  the same alone or in any batch.
+
+  Scores are 0-10 integers, as the LLM used to return them. One matched skill
+  in an item of average length lands at 5, two at about 7.5, three at about 9.
+  Missing skills pull the score down.
+  """
+
+  def __init__(self, skills:Iterable[str], k1:float=1.2, b:float=0.75, penalty:float=1.0,
+               min_score:int=5, synonyms:Dict[str, List[str]]=SYNONYMS):
+    self.skills = list(skills)
+    self.k1 = k1
+    self.b = b
+    self.penalty = penalty
+    self.min_score = min_score
+    self.synonyms = synonyms
+    self.__mine = SkillIndex(self.skills, synonyms=synonyms)
+
+
+  def score(self, items:Sequence[str], missing:Sequence[str]=(),
+            min_score:Optional[int]=None) -> Dict[str, List[Dict[str, object]]]:
+    return self.score_batch([(items, missing)], min_score=min_score)[0]
+
+
+  def score_batch(self, jobs:Sequence[Tuple[Sequence[str], Sequence[str]]],
+                  min_score:Optional[int]=None) -> List[Dict[str, List[Dict[str, object]]]]:
+    """
+    `jobs` holds (responsibilities, missing skills) per job. Returns one
+    {"Responsibilities": [{"text", "score"}]} per job, best first, scores >= min_score.
+    """
+    min_score = self.min_score if min_score is None else min_score
+    if not any(items for items, _ in jobs):
+      return [{"Responsibilities": []} for _ in jobs]
+
+    mine = set(self.__mine.display)
+    # My skills plus this job's missing ones, so another job's skills never change the matches
+    indexes: Dict[Tuple[str, ...], SkillIndex] = {(): self.__mine}
+
+    vocab: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    owner: List[int] = []   # job of each row
+    texts: List[str] = []
+    q_rows: List[int] = []
+    q_cols: List[int] = []
+    q_vals: List[float] = []
+
+    for j, (items, missing) in enumerate(jobs):
+      key = tuple(sorted(set(missing)))
+      index = indexes.get(key)
+      if index is None:
+        index = indexes[key] = SkillIndex(self.skills + list(key), synonyms=self.synonyms)
+      for item in items:
+        for term in tokenize(item) + [SKILL + cid for cid in index.find(item)]:
+          rows.append(len(texts))
+          cols.append(vocab.setdefault(term, len(vocab)))
+        owner.append(j)
+        texts.append(item)
+
+      # Per-job query: +1 for my skills, -penalty for the job's skills I lack
+      lacking = {cid for m in missing for cid in index.find(m)} - mine
+      for cid, weight in [(c, 1.0) for c in mine] + [(c, -self.penalty) for c in lacking]:
+        col = vocab.get(SKILL + cid)
+        if col is not None:
+          q_rows.append(j)
+          q_cols.append(col)
+          q_vals.append(weight)
+
+    docs = len(texts)
+    tf = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(docs, len(vocab)))
+    tf.sum_duplicates()
+
+    # BM25 term-frequency saturation on the non-zeros, lengths normalised within each job
+    owner_arr = np.asarray(owner)
+    length = np.asarray(tf.sum(axis=1)).ravel()
+    avg = np.bincount(owner_arr, weights=length, minlength=len(jobs)) / np.maximum(np.bincount(owner_arr, minlength=len(jobs)), 1)
+    norm = self.k1 * (1 - self.b + self.b * length / np.maximum(avg[owner_arr], 1e-9))
+    row_of = np.repeat(np.arange(docs), np.diff(tf.indptr))
+    weights = tf.copy()
+    weights.data = tf.data * (self.k1 + 1) / (tf.data + norm[row_of])
+
+    query = sparse.csr_matrix((np.array(q_vals, dtype=np.float32), (q_rows, q_cols)), shape=(len(jobs), len(vocab)))
+    raw = np.asarray(weights.multiply(query[owner_arr]).sum(axis=1)).ravel()
+
+    # A single full-strength hit of a skill term is worth 1
+    scores = np.clip(np.rint(10 * (1 - np.exp2(-np.maximum(raw, 0)))), 0, 10).astype(int)
+
+    out: List[Dict[str, List[Dict[str, object]]]] = [{"Responsibilities": []} for _ in jobs]
+    order = np.lexsort((np.arange(docs), -scores))
+    for i in order:
+      if scores[i] >= min_score:
+        out[owner[i]]["Responsibilities"].append({"text": texts[i], "score": int(scores[i])})
+    return out
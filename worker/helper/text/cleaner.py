@@ -0,0 +1,117 @@
+
+from typing import List, NamedTuple, Optional, Tuple
+import re
+
+
+BULLETS = "•●○·▪◦‣∙*-–—"
+_BULLET = re.compile(rf"^\s*[{re.escape(BULLETS)}]\s*")
+_SPACES = re.compile(r"[ \t ]+")
+_LINK = re.compile(r"https?://|www\.|[\w.+-]+@[\w-]+\.[\w.]+")
+_APPLY_LINE = re.compile(r"\bapply (now|today|here)\b|\bclick apply\b", re.I)
+# Openings of a requirement, never of a heading: "Experience with Python packages", "5+ years of ..."
+_REQUIREMENT = re.compile(
+  r"^(\d+\+?\s*(years?|yrs)\b|(experience|knowledge|understanding|familiarity|proficiency|expertise|exposure|fluency)"
+  r"\s+(with|of|in|using)\b|(strong|solid|proven|excellent|deep|hands-on)\s)",
+  re.I,
+)
+
+# Headings that open a section we never send to the model.
+# Checked before KEEP, so "We think you'll love working here, we offer:" is still perks.
+DROP: List[Tuple[str, re.Pattern]] = [
+  ("employer_questions", re.compile(r"employer questions|application will include|screening questions", re.I)),
+  ("benefits", re.compile(r"\bbenefits?\b|perks|what we offer|we offer|you['’]?ll love|why you['’]?ll|compensation|salary|\bpackage\b", re.I)),
+  ("culture", re.compile(r"culture|our values|life at|what it['’]?s like|why (join|work)", re.I)),
+  ("apply", re.compile(r"how to apply|to apply|next steps|find out more", re.I)),
+  ("equal_opportunity", re.compile(r"equal opportunit|diversity|inclusion|eeo\b", re.I)),
+]
+
+# Headings that (re)open job content
+KEEP = re.compile(
+  r"role|responsibilit|duties|you will|what you['’]?ll (do|bring)|requirement|qualification|skills|experience"
+  r"|looking for|who you are|about the job|position|nice to have|bonus points|tech stack|you need",
+  re.I,
+)
+
+# Weak drops: only when no KEEP word is present ("About Topsort" vs "About the Role")
+COMPANY = re.compile(r"^about\b|who (we are|are we)|our (story|company|mission)|company overview", re.I)
+
+
+def estimate_tokens(text:str) -> int:
+  # ~4 characters per token for English text with llama-style tokenizers
+  return (len(text) + 3) // 4
+
+
+class CleanResult(NamedTuple):
+  text: str
+  dropped: List[Tuple[str, str]]      # (category, heading) of every section removed
+  tokens_before: int
+  tokens_after: int
+
+  @property
+  def tokens_saved(self) -> int:
+    return self.tokens_before - self.tokens_after
+
+
+class AdCleaner:
+  """
+  Rule-based segmenter run on a raw job ad before it goes into a prompt.
+
+  The ad is split at headings (short lines without sentence punctuation, or
+  lines ending in ':', that do not open like a requirement). Each heading is
+  classified; sections about the company, culture, benefits, applying and
+  employer questions are dropped, as are lines with links or emails. Unrecognised headings keep the current section's fate,
+  so an un-bulleted list item never revives a dropped section.
+  """
+
+  def __init__(self, max_heading_words:int=10):
+    self.max_heading_words = max_heading_words
+
+
+  def is_heading(self, line:str) -> bool:
+    if _BULLET.match(line) or _REQUIREMENT.match(line):
+      return False
+    words = line.split()
+    if not words:
+      return False
+    if line.endswith(":"):
+      return len(words) <= self.max_heading_words + 4
+    return len(words) <= self.max_heading_words and line[-1] not in ".!,;"
+
+
+  def classify(self, heading:str) -> Optional[str]:
+    """Category of a heading: a DROP category, "job", or None when unknown."""
+    for category, pattern in DROP:
+      if pattern.search(heading):
+        return category
+    if KEEP.search(heading):
+      return "job"
+    if COMPANY.search(heading):
+      return "company"
+    return None
+
+
+  def clean(self, article:str) -> CleanResult:
+    kept: List[str] = []
+    dropped: List[Tuple[str, str]] = []
+    keeping = True
+
+    for raw in article.splitlines():
+      line = _SPACES.sub(" ", raw).strip()
+      if not line:
+        continue
+
+      if self.is_heading(line):
+        category = self.classify(line)
+        if category == "job":
+          keeping = True
+        elif category is not None:
+          keeping = False
+          dropped.append((category, line))
+          continue
+
+      if not keeping or _LINK.search(line) or _APPLY_LINE.search(line):
+        continue
+      kept.append(line)
+
+    text = "\n".join(kept)
+    return CleanResult(text, dropped, estimate_tokens(article), estimate_tokens(text))
@@ -0,0 +1,69 @@
+
+from hashlib import blake2b, sha1
+from typing import List, NamedTuple, Optional
+import re
+
+
+BITS = 64
+BANDS = 4          # 4 x 16 bits: two signatures within 3 bits share at least one band
+SHINGLE = 3        # words per shingle
+MIN_WORDS = 20     # shorter texts are too generic to call duplicates
+
+_LINK = re.compile(r"https?://\S+|www\.\S+|[\w.+-]+@[\w-]+\.[\w.]+")
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text:str) -> List[str]:
+  """Lowercased words, without links, emails, punctuation or layout."""
+  return _NON_WORD.sub(" ", _LINK.sub(" ", text.lower())).split()
+
+
+def _hash64(token:str) -> int:
+  return int.from_bytes(blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words:List[str], shingle:int=SHINGLE) -> int:
+  """64-bit SimHash over word shingles: near-identical texts differ in a few bits."""
+  weights = [0] * BITS
+  for i in range(max(len(words) - shingle + 1, 1)):
+    h = _hash64(" ".join(words[i:i + shingle]))
+    for bit in range(BITS):
+      weights[bit] += 1 if h >> bit & 1 else -1
+  return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def bands(signature:int, n:int=BANDS) -> List[str]:
+  """LSH keys: the signature cut into `n` tagged slices, stored as a multikey index."""
+  width = BITS // n
+  mask = (1 << width) - 1
+  return [f"{i}:{signature >> (i * width) & mask:0{width // 4}x}" for i in range(n)]
+
+
+def hamming(a:int, b:int) -> int:
+  return bin(a ^ b).count("1")
+
+
+def _signed(v:int) -> int:
+  # Mongo stores int64, which is signed
+  return v - (1 << BITS) if v >= 1 << (BITS - 1) else v
+
+
+class Fingerprint(NamedTuple):
+  hash: str        # sha1 of the normalized text: exact reposts
+  simhash: int     # unsigned 64-bit SimHash: near-duplicates
+  bands: List[str]
+
+  @classmethod
+  def of(cls, text:str) -> Optional["Fingerprint"]:
+    words = normalize(text)
+    if len(words) < MIN_WORDS:
+      return None
+    sig = simhash(words)
+    return cls(sha1(" ".join(words).encode("utf-8")).hexdigest(), sig, bands(sig))
+
+  def distance(self, doc:dict) -> int:
+    """Bits between this fingerprint and one stored with `as_doc()`."""
+    return hamming(self.simhash, doc["simhash"] & ((1 << BITS) - 1))
+
+  def as_doc(self) -> dict:
+    return {"hash": self.hash, "simhash": _signed(self.simhash), "bands": self.bands}
@@ -1,29 +1,139 @@
 
-from kafka import KafkaConsumer # type: ignore
-import os, json
+from kafka import KafkaConsumer, KafkaProducer, ConsumerRebalanceListener, TopicPartition # type: ignore
+from kafka.structs import OffsetAndMetadata # type: ignore
+from kafka.errors import KafkaError # type: ignore
+import os
+
+from database.job_record import JobRecord, encode_value
+from .offsets import OffsetTracker
+from .retry import RetryRouter, DelayScheduler
 
 
 BROKERS    = os.getenv("KAFKA_BROKERS", "localhost:19092")
 GROUP_ID   = os.getenv("KAFKA_GROUP", "jobs-worker-1")
 TOPIC      = os.getenv("TOPIC", "job.created")
 
+# Commit offsets ourselves, only once a job is done (at-least-once)
+MANUAL_COMMIT      = os.getenv("KAFKA_MANUAL_COMMIT", "true").lower() in ["true", "1", "yes"]
+COMMIT_EVERY_N     = int(os.getenv("KAFKA_COMMIT_EVERY_N", "100"))
+COMMIT_INTERVAL_MS = int(os.getenv("KAFKA_COMMIT_INTERVAL_MS", "5000"))
+
+
+def _offset_meta(offset:int):
+  # kafka-python >= 2.1 added leader_epoch to OffsetAndMetadata
+  if len(OffsetAndMetadata._fields) == 3:
+    return OffsetAndMetadata(offset, "", -1)
+  return OffsetAndMetadata(offset, "")
+
+
+class _CommitOnRevoke(ConsumerRebalanceListener):
+  def __init__(self, owner:"KafkaClient"):
+    self.owner = owner
+
+  def on_partitions_revoked(self, revoked):
+    # Flush finished work before another member takes the partitions over
+    self.owner.commit(force=True)
+    self.owner.tracker.forget(revoked)
+    self.owner.scheduler.forget(revoked)
+
+  def on_partitions_assigned(self, assigned):
+    return
+
+
 class KafkaClient:
-  def __init__(self):
+  def __init__(self, manual_commit:bool=MANUAL_COMMIT, commit_every:int=COMMIT_EVERY_N,
+               commit_interval_ms:int=COMMIT_INTERVAL_MS):
+    self.manual_commit = manual_commit
+    self.tracker = OffsetTracker(every_n=commit_every, interval_ms=commit_interval_ms)
+
     self.client = KafkaConsumer(
-    TOPIC,
     bootstrap_servers= BROKERS,
     group_id=GROUP_ID,
     auto_offset_reset= "earliest",
-    enable_auto_commit= True,
-    value_deserializer=lambda m: json.loads(m.decode('utf-8'))
+    enable_auto_commit= not manual_commit,
+    # Validated JobRecord, or InvalidRecord for main to dead-letter; never raises
+    value_deserializer=JobRecord.decode
     )
+    self.producer = None  # created on the first failed job
+    self.retry = RetryRouter(self)
+    self.scheduler = DelayScheduler(self.client)
+
+
+  def ready(self) -> bool:
+    return self.client.bootstrap_connected()
+
+
+  def subscribe(self) -> None:
+    """Join the consumer group. Done last, once the worker can actually process jobs."""
+    # Retry tiers are consumed by the same group; the scheduler delays their records
+    self.client.subscribe([TOPIC] + self.retry.topics, listener=_CommitOnRevoke(self) if self.manual_commit else None)
 
 
   def run(self):
     return self.client
-  
+
+
+  def track(self, msg) -> None:
+    """Register a polled record as in flight. Call on the poll thread before handing it off."""
+    if self.manual_commit:
+      self.tracker.track(TopicPartition(msg.topic, msg.partition), msg.offset)
+
+
+  def ack(self, msg) -> None:
+    """Mark a record as done (persisted). Safe to call from worker threads."""
+    if self.manual_commit:
+      self.tracker.ack(TopicPartition(msg.topic, msg.partition), msg.offset)
+
+
+  def commit(self, force:bool=False) -> None:
+    """Commit the highest finished contiguous offset of every partition that is due. Poll thread only."""
+    if not self.manual_commit:
+      return
+
+    offsets = self.tracker.due(force=force)
+    if not offsets:
+      return
+    try:
+      self.client.commit(offsets={tp: _offset_meta(nxt) for tp, nxt in offsets.items()})
+      self.tracker.mark_committed(offsets)
+    except KafkaError as e:
+      # Records stay uncommitted and will be redelivered; nothing is lost
+      print(f"[kafka] offset commit failed: {e}")
+
+
+  def produce(self, topic:str, value, key=None, headers=None, timeout:float=30) -> None:
+    """Send one job record and wait until the brokers have it."""
+    if self.producer is None:
+      self.producer = KafkaProducer(
+        bootstrap_servers=BROKERS,
+        acks="all",
+        value_serializer=encode_value,
+      )
+    self.producer.send(topic, value=value, key=key, headers=headers or []).get(timeout=timeout)
+
+
+  def lag(self) -> dict:
+    """{TopicPartition: records behind the high watermark}, for the partitions whose position is known."""
+    out = {}
+    for tp in self.client.assignment():
+      high = self.client.highwater(tp)
+      if high is None:
+        continue  # no fetch response for it yet
+      try:
+        out[tp] = max(0, high - self.client.position(tp))
+      except KafkaError:
+        continue
+    return out
+
+
+  def close(self) -> None:
+    self.commit(force=True)
+    self.client.close(autocommit=not self.manual_commit)
+    if self.producer is not None:
+      self.producer.close()
+
+
   def set_status(self, jobId:str, status:str ="In progress"):
-    
-    return
 
+    return
 
@@ -0,0 +1,95 @@
+
+from typing import Dict, Hashable, Iterable, Optional, Set
+import threading
+import time
+
+
+class OffsetTracker:
+  """
+  Remembers which polled records are still being worked on, per partition.
+
+  Records finish out of order when the pool runs them concurrently, so the only
+  safe offset to commit is the lowest one still in flight (or one past the highest
+  record seen once nothing is in flight). Everything below it is done.
+
+  Commits are batched: a partition is only reported as due once `every_n` records
+  finished since its last commit, or `interval_ms` passed.
+  """
+
+  def __init__(self, every_n:int=100, interval_ms:int=5000):
+    self.every_n = every_n
+    self.interval_ms = interval_ms
+
+    self._lock = threading.Lock()
+    self._inflight: Dict[Hashable, Set[int]] = {}
+    self._highest: Dict[Hashable, int] = {}
+    self._committed: Dict[Hashable, int] = {}
+    self._acked_since_commit: Dict[Hashable, int] = {}
+    self._last_commit: Dict[Hashable, float] = {}
+
+
+  def track(self, tp:Hashable, offset:int) -> None:
+    with self._lock:
+      self._inflight.setdefault(tp, set()).add(offset)
+      if offset > self._highest.get(tp, -1):
+        self._highest[tp] = offset
+      self._last_commit.setdefault(tp, time.monotonic())
+
+
+  def ack(self, tp:Hashable, offset:int) -> None:
+    with self._lock:
+      inflight = self._inflight.get(tp)
+      # Partition revoked meanwhile: the new owner will reprocess it
+      if inflight is None or offset not in inflight:
+        return
+      inflight.discard(offset)
+      self._acked_since_commit[tp] = self._acked_since_commit.get(tp, 0) + 1
+
+
+  def _committable(self, tp:Hashable) -> Optional[int]:
+    inflight = self._inflight.get(tp)
+    if inflight:
+      nxt = min(inflight)
+    elif tp in self._highest:
+      nxt = self._highest[tp] + 1
+    else:
+      return None
+    if nxt <= self._committed.get(tp, -1):
+      return None
+    return nxt
+
+
+  def due(self, force:bool=False) -> Dict[Hashable, int]:
+    """Return {tp: next offset to consume} for partitions whose commit is due."""
+    now = time.monotonic()
+    out: Dict[Hashable, int] = {}
+    with self._lock:
+      for tp in self._inflight:
+        nxt = self._committable(tp)
+        if nxt is None:
+          continue
+        elapsed_ms = (now - self._last_commit.get(tp, now)) * 1000
+        if force or self._acked_since_commit.get(tp, 0) >= self.every_n or elapsed_ms >= self.interval_ms:
+          out[tp] = nxt
+    return out
+
+
+  def mark_committed(self, offsets:Dict[Hashable, int]) -> None:
+    now = time.monotonic()
+    with self._lock:
+      for tp, nxt in offsets.items():
+        if nxt > self._committed.get(tp, -1):
+          self._committed[tp] = nxt
+        self._acked_since_commit[tp] = 0
+        self._last_commit[tp] = now
+
+
+  def forget(self, tps:Iterable[Hashable]) -> None:
+    """Drop state for partitions this consumer no longer owns."""
+    with self._lock:
+      for tp in tps:
+        self._inflight.pop(tp, None)
+        self._highest.pop(tp, None)
+        self._committed.pop(tp, None)
+        self._acked_since_commit.pop(tp, None)
+        self._last_commit.pop(tp, None)
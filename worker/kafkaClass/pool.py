@@ -0,0 +1,112 @@
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+import threading
+import time
+
+
+class JobPool:
+  """
+  Bounded thread pool fed by the Kafka poll loop.
+
+  - At most `concurrency` handlers run at once.
+  - Records sharing a key (the job URL) run one after another, in submit order.
+  - `full()` turns True once `max_pending` records are queued or running, so the
+    poll loop can pause its partitions until the pool catches up.
+
+  The pool never touches the KafkaConsumer itself: the consumer is not thread safe,
+  so pausing/resuming stays on the poll thread.
+  """
+
+  def __init__(self, handler:Callable[[Any], Any], concurrency:int=4, max_pending:Optional[int]=None,
+               on_done:Optional[Callable[[Any, Optional[BaseException]], None]]=None):
+    if concurrency < 1:
+      raise ValueError("concurrency must be >= 1")
+
+    self.concurrency = concurrency
+    self.max_pending = max_pending if max_pending is not None else concurrency * 2
+    self._handler = handler
+    self._on_done = on_done
+
+    self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+    self._lock = threading.Lock()
+    self._idle = threading.Condition(self._lock)
+    # key -> records waiting behind the one currently running for that key
+    self._queues: Dict[Hashable, Deque[Any]] = {}
+    self._pending = 0
+    self._closed = False
+
+
+  def submit(self, key:Hashable, item:Any) -> None:
+    with self._lock:
+      if self._closed:
+        raise RuntimeError("JobPool is closed")
+
+      self._pending += 1
+      waiting = self._queues.get(key)
+      if waiting is not None:
+        # Same key already in flight: keep ordering by queueing behind it
+        waiting.append(item)
+        return
+      self._queues[key] = deque()
+
+    self._executor.submit(self._run, key, item)
+
+
+  def _run(self, key:Hashable, item:Any) -> None:
+    while True:
+      error: Optional[BaseException] = None
+      try:
+        self._handler(item)
+      except BaseException as e:
+        error = e
+
+      if self._on_done is not None:
+        try:
+          self._on_done(item, error)
+        except Exception as e:
+          print(f"[pool] on_done failed: {e}")
+      elif error is not None:
+        print(f"[pool] job failed: {error}")
+
+      with self._lock:
+        self._pending -= 1
+        waiting = self._queues[key]
+        if waiting:
+          # Keep the worker thread and run the next record for this key
+          item = waiting.popleft()
+        else:
+          del self._queues[key]
+          self._idle.notify_all()
+          return
+
+
+  @property
+  def pending(self) -> int:
+    with self._lock:
+      return self._pending
+
+
+  def full(self) -> bool:
+    with self._lock:
+      return self._pending >= self.max_pending
+
+
+  def drain(self, timeout:Optional[float]=None) -> bool:
+    """Stop accepting work and wait for everything queued to finish. Returns False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._lock:
+      self._closed = True
+      while self._pending:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+          return False
+        self._idle.wait(remaining)
+    return True
+
+
+  def shutdown(self, wait:bool=True) -> None:
+    with self._lock:
+      self._closed = True
+    self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,92 @@
+"""
+Re-drive dead-lettered jobs.
+
+Reads the dead-letter topic with its own consumer group, produces every record
+back to the main topic (or --to), then commits, so each dead letter is replayed
+once per group. Attempts start again from zero unless --keep-attempts is given.
+
+    python -m kafkaClass.replay --dry-run        # what is in the DLQ, by error
+    python -m kafkaClass.replay --limit 500
+"""
+from collections import Counter
+from typing import Dict
+import argparse
+import time
+
+from kafka import KafkaConsumer, KafkaProducer, TopicPartition # type: ignore
+
+from config.settings import KAFKA_BROKERS, KAFKA_TOPIC, DLQ_TOPIC
+from .client import _offset_meta
+from .retry import H_ATTEMPT, H_ERROR, H_NOT_BEFORE, encode_headers, read_headers
+
+
+def parse_args(argv=None):
+  ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  ap.add_argument("--from-topic", default=DLQ_TOPIC)
+  ap.add_argument("--to", default=KAFKA_TOPIC, help="topic to replay into")
+  ap.add_argument("--group", default="jobs-dlq-replay", help="consumer group that remembers what was replayed")
+  ap.add_argument("--limit", type=int, default=0, help="stop after this many records (0 = all)")
+  ap.add_argument("--keep-attempts", action="store_true", help="keep the attempt count instead of starting over")
+  ap.add_argument("--dry-run", action="store_true", help="only count records by error; produce and commit nothing")
+  ap.add_argument("--idle-ms", type=int, default=3000, help="stop once the topic is quiet for this long")
+  return ap.parse_args(argv)
+
+
+def replay(args) -> Counter:
+  consumer = KafkaConsumer(
+    args.from_topic,
+    bootstrap_servers=KAFKA_BROKERS,
+    group_id=args.group,
+    auto_offset_reset="earliest",
+    enable_auto_commit=False,
+  )
+  producer = None if args.dry_run else KafkaProducer(bootstrap_servers=KAFKA_BROKERS, acks="all", linger_ms=20)
+
+  errors: Counter = Counter()
+  done = 0
+  started = time.monotonic()
+  try:
+    while not args.limit or done < args.limit:
+      records = consumer.poll(timeout_ms=args.idle_ms, max_records=500)
+      if not records:
+        break
+
+      positions: Dict[TopicPartition, int] = {}
+      for tp, msgs in records.items():
+        for msg in msgs:
+          if args.limit and done >= args.limit:
+            break
+          headers = read_headers(msg)
+          errors[headers.get(H_ERROR, "unknown").split(":", 1)[0]] += 1
+          if producer is not None:
+            headers.pop(H_NOT_BEFORE, None)
+            if not args.keep_attempts:
+              headers.pop(H_ATTEMPT, None)
+            producer.send(args.to, value=msg.value, key=msg.key, headers=encode_headers(headers))
+          positions[tp] = msg.offset + 1
+          done += 1
+
+      if producer is not None:
+        # Commit only what the brokers already have
+        producer.flush()
+        consumer.commit(offsets={tp: _offset_meta(nxt) for tp, nxt in positions.items()})
+      rate = done / max(time.monotonic() - started, 1e-9)
+      print(f"[replay] {done} record(s), {rate:.0f}/s")
+  finally:
+    if producer is not None:
+      producer.close()
+    consumer.close(autocommit=False)
+  return errors
+
+
+def main(argv=None):
+  args = parse_args(argv)
+  errors = replay(args)
+  verb = "found" if args.dry_run else f"replayed to {args.to}"
+  print(f"✅ {sum(errors.values())} dead letter(s) {verb}")
+  for error, n in errors.most_common():
+    print(f"  {n:>7}  {error}")
+
+
+if __name__ == "__main__":
+  main()
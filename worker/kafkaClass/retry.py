@@ -0,0 +1,177 @@
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import heapq
+import itertools
+import threading
+import time
+
+from config.settings import RETRY_TOPICS, DLQ_TOPIC
+
+
+# Record headers carried by retried and dead-lettered jobs
+H_ATTEMPT    = "x-attempt"       # failed attempts so far
+H_ERROR      = "x-error"         # last error, truncated
+H_NOT_BEFORE = "x-not-before"    # epoch ms; the record is not processed earlier
+H_ORIGIN     = "x-origin-topic"  # topic the job first came from
+H_FAILED_AT  = "x-failed-at"     # epoch ms of the last failure
+# Set by the producer and kept through retries: interactive | normal | bulk
+H_PRIORITY   = "x-priority"
+
+MAX_ERROR_LEN = 1000
+
+
+class RetryTier(NamedTuple):
+  topic: str
+  delay: float  # seconds
+
+
+def parse_tiers(spec:str=RETRY_TOPICS) -> List[RetryTier]:
+  """"job.retry.1m:60,job.retry.10m:600" -> [RetryTier("job.retry.1m", 60.0), ...]"""
+  tiers = []
+  for part in spec.split(","):
+    if part.strip():
+      topic, _, delay = part.strip().rpartition(":")
+      tiers.append(RetryTier(topic, float(delay)))
+  return tiers
+
+
+def read_headers(msg) -> Dict[str, str]:
+  headers = getattr(msg, "headers", None) or ()
+  return {k: (v.decode("utf-8", "replace") if isinstance(v, (bytes, bytearray)) else str(v)) for k, v in headers}
+
+
+def encode_headers(headers:Dict[str, Any]) -> List[Tuple[str, bytes]]:
+  return [(k, str(v).encode("utf-8")) for k, v in headers.items()]
+
+
+def attempts(msg) -> int:
+  try:
+    return int(read_headers(msg).get(H_ATTEMPT, 0))
+  except ValueError:
+    return 0
+
+
+def not_before(msg) -> float:
+  """Epoch seconds before which `msg` must not run; 0 for fresh records."""
+  try:
+    return int(read_headers(msg).get(H_NOT_BEFORE, 0)) / 1000
+  except ValueError:
+    return 0.0
+
+
+class RetryDecision(NamedTuple):
+  topic: str
+  attempt: int
+  retry_at: Optional[float]  # epoch seconds; None once dead-lettered
+
+  @property
+  def dead(self) -> bool:
+    return self.retry_at is None
+
+
+class RetryRouter:
+  """
+  Sends a failed job to the next retry tier, or to the dead-letter topic once
+  every tier was tried. The record keeps its key and value; the attempt count,
+  error and earliest run time travel in headers.
+
+  `producer` needs `produce(topic, value, key, headers)` that returns once the
+  record is durable, so the original offset can be acked right after.
+  """
+
+  def __init__(self, producer:Any, tiers:Optional[List[RetryTier]]=None, dlq_topic:str=DLQ_TOPIC):
+    self.producer = producer
+    self.tiers = tiers if tiers is not None else parse_tiers()
+    self.dlq_topic = dlq_topic
+
+  @property
+  def topics(self) -> List[str]:
+    return [t.topic for t in self.tiers]
+
+  def route(self, msg, error:BaseException, retryable:bool=True) -> RetryDecision:
+    """`retryable=False` skips the tiers: a message that cannot be decoded never will be."""
+    attempt = attempts(msg) + 1
+    now = time.time()
+    headers = read_headers(msg)
+    headers.setdefault(H_ORIGIN, msg.topic)
+    headers.update({
+      H_ATTEMPT: attempt,
+      H_ERROR: f"{type(error).__name__}: {error}"[:MAX_ERROR_LEN],
+      H_FAILED_AT: int(now * 1000),
+    })
+
+    if retryable and attempt <= len(self.tiers):
+      tier = self.tiers[attempt - 1]
+      retry_at = now + tier.delay
+      headers[H_NOT_BEFORE] = int(retry_at * 1000)
+      decision = RetryDecision(tier.topic, attempt, retry_at)
+    else:
+      headers.pop(H_NOT_BEFORE, None)
+      decision = RetryDecision(self.dlq_topic, attempt, None)
+
+    self.producer.produce(decision.topic, msg.value, key=msg.key, headers=encode_headers(headers))
+    return decision
+
+
+class DelayScheduler:
+  """
+  Holds retry records until their not-before time without blocking the poll loop.
+
+  A record that is not due yet goes into a heap and its partition is paused, so
+  the consumer keeps polling (heartbeats, other partitions) but fetches nothing
+  more from it. Every record of a tier has the same delay, so records behind it
+  are due later anyway. `due()` hands back what is ready and resumes partitions
+  that hold nothing any more. Held records stay in flight in the offset
+  tracker, so their offsets are not committed.
+  """
+
+  def __init__(self, consumer:Any):
+    self.consumer = consumer
+    self._heap: List[Tuple[float, int, Any, Any]] = []
+    self._held: Dict[Any, int] = {}
+    self._seq = itertools.count()
+    self._lock = threading.Lock()
+
+  def hold(self, tp, msg) -> bool:
+    """True if `msg` was held for later; False if it can run now."""
+    at = not_before(msg)
+    with self._lock:
+      if at <= time.time() and not self._held.get(tp):
+        return False
+      heapq.heappush(self._heap, (at, next(self._seq), tp, msg))
+      self._held[tp] = self._held.get(tp, 0) + 1
+    self.consumer.pause(tp)
+    return True
+
+  def due(self) -> List[Any]:
+    now = time.time()
+    ready, freed = [], []
+    with self._lock:
+      while self._heap and self._heap[0][0] <= now:
+        _, _, tp, msg = heapq.heappop(self._heap)
+        ready.append(msg)
+        self._held[tp] -= 1
+        if not self._held[tp]:
+          del self._held[tp]
+          freed.append(tp)
+    if freed:
+      self.consumer.resume(*freed)
+    return ready
+
+  def held_partitions(self) -> Set[Any]:
+    with self._lock:
+      return set(self._held)
+
+  def next_due_in(self) -> Optional[float]:
+    """Seconds until the earliest held record is due, None when nothing is held."""
+    with self._lock:
+      return max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+
+  def forget(self, tps:Iterable[Any]) -> None:
+    """Drop held records of revoked partitions; their new owner reads them again."""
+    tps = set(tps)
+    with self._lock:
+      self._heap = [item for item in self._heap if item[2] not in tps]
+      heapq.heapify(self._heap)
+      for tp in tps:
+        self._held.pop(tp, None)
@@ -1,18 +1,92 @@
-import signal, time
+import signal
+import time
+_BOOT = time.perf_counter()
 
 # Import KafkaClient
 from kafkaClass.client import KafkaClient
+from kafkaClass.pool import JobPool
+from kafkaClass.retry import H_PRIORITY, read_headers
 
 # Import MongoClient
 from database.mongo import MongoDB 
+from database.job_record import InvalidRecord
 # Import Redis
 from database.redis_publisher import RedisPublisher
+# Import analysis pipeline
+from function.job_analyser import JobAnalyser
+from helper.ai.scheduler import INTERACTIVE, NORMAL, priority_of
 
+# Import near-duplicate fingerprinting
+from helper.text.cleaner import AdCleaner
+from helper.text.fingerprint import Fingerprint
+# Import metrics
+from metrics.instruments import POLL_BATCH, CONSUMER_LAG, JOBS_INFLIGHT, JOB_SECONDS, JOBS, DUPLICATES, RETRIES
+from metrics.server import MetricsServer
+from metrics.tracing import JobTrace
 
-mongoClient = MongoDB()
-redisClient = RedisPublisher()
+from config.settings import WORKER_CONCURRENCY, WORKER_MAX_PENDING, DRAIN_TIMEOUT, METRICS_PORT, TRACE_JOBS
+from config.settings import DEDUP_ENABLED, DEDUP_MAX_DISTANCE
+import startup
 
-consumer = KafkaClient().run()
+_IMPORTED = time.perf_counter()
+LAG_INTERVAL = 5.0  # seconds between consumer lag samples
+
+
+# Backends, built by setup(); the benchmark passes local stand-ins instead
+mongoClient = None
+mongoWriter = None
+rollupWriter = None
+redisClient = None
+analyser = None
+kafka = None
+consumer = None
+metricsServer = None
+
+
+def setup(kafka_client=None, mongo=None, redis_publisher=None, job_analyser=None, metrics_port=METRICS_PORT):
+    """
+    Connect the worker's backends, all at once and each with bounded retry, then
+    join the consumer group once Mongo, Kafka and the LLM are ready.
+    Anything passed in is used as is; metrics_port=0 serves no metrics.
+    Returns False if the worker was stopped before it became ready.
+    """
+    global mongoClient, mongoWriter, rollupWriter, redisClient, analyser, kafka, consumer, metricsServer
+    clock = startup.ColdStart(started=_BOOT)
+    clock.record("imports", _IMPORTED - _BOOT)
+    if metrics_port and metricsServer is None:
+        metricsServer = MetricsServer(metrics_port).start()
+
+    builders = {}
+    if mongo is None:
+        builders["mongo"] = MongoDB
+    if redis_publisher is None:
+        builders["redis"] = lambda: RedisPublisher(required=True)
+    if kafka_client is None:
+        builders["kafka"] = KafkaClient
+    if job_analyser is None:
+        builders["analyser"] = JobAnalyser
+    # Without Redis the worker still processes jobs, it just reports no progress
+    built = startup.connect_all(builders, clock, fallbacks={"redis": lambda: RedisPublisher()})
+
+    mongoClient = mongo if mongo is not None else built["mongo"]
+    mongoWriter = mongoClient.bulk_writer()
+    rollupWriter = mongoClient.rollup_writer()
+    redisClient = redis_publisher if redis_publisher is not None else built["redis"]
+    analyser = job_analyser if job_analyser is not None else built["analyser"]
+    kafka = kafka_client if kafka_client is not None else built["kafka"]
+    consumer = kafka.run()
+
+    missing = mongoClient.missing_indexes()
+    if missing:
+        print(f"⚠️ missing indexes {', '.join(missing)}: run `python -m database.migrations`")
+
+    ready = startup.wait_ready({"mongo": mongoClient.ping, "kafka": kafka.ready, "llm": analyser.ready}, clock,
+                               should_stop=lambda: stop)
+    if not ready:
+        return False
+    kafka.subscribe()
+    print(clock.report())
+    return True
 
 
 # Global flag to tell our main loop whether to keep running
@@ -29,44 +103,209 @@ signal.signal(signal.SIGINT, _stop)
 signal.signal(signal.SIGTERM, _stop)
 
 
+_cleaner = AdCleaner()
+
+def _fingerprint(job):
+    """Fingerprint of the ad's content, without the recruiter/company boilerplate that differs between reposts."""
+    cleaned = _cleaner.clean(job.jobDescription).text or job.jobDescription
+    return Fingerprint.of(f"{job.jobTitle}\n{cleaned}")
+
+
+def _find_original(jid, fp):
+    """An analysed near-duplicate of this job, or None. Lookup problems only cost the shortcut."""
+    if fp is None:
+        return None
+    try:
+        return mongoClient.find_duplicate(fp, max_distance=DEDUP_MAX_DISTANCE, exclude=jid)
+    except Exception as e:
+        print(f"[dedupe] lookup failed for {jid}: {e}")
+        return None
+
+
+def _field_publisher(jid):
+    """on_field callback: publish the analysis so far each time the model completes one of its six fields."""
+    partial = {}
+
+    def on_field(name, value):
+        partial[name] = value
+        redisClient.publish_progress(jid, "In progress", progress=30 + 10 * len(partial), stage=f"field:{name}",
+                                     result=dict(partial))
+    return on_field
+
+
+def handle_job(job, priority=NORMAL):
+    """Run one JobRecord end to end. Called from a pool thread, never from the poll loop."""
+    jid = job.id
+    trace = JobTrace(jid)
+    outcome = "complete"
+
+    # Progress goes to the `job:<id>` hash the API reads, plus the job's events channel
+    redisClient.publish_progress(jid, "In progress", progress=10, stage="received")
+    try:
+        # Save job and initialise its status; both land in the same bulk write
+        saved = mongoWriter.save_job(job)
+        mongoWriter.set_status(jid)
+        # Reposts of an analysed ad reuse its analysis and skip the LLM
+        with trace.span("dedupe"):
+            fp = _fingerprint(job) if DEDUP_ENABLED else None
+            original = _find_original(jid, fp)
+        if original is not None:
+            analysis = original["analysis"]
+            fields = {"analysis": analysis, "status": "Complete", "duplicateOf": original["id"]}
+            DUPLICATES.inc(kind="exact" if original["distance"] == 0 else "near")
+        else:
+            # Extraction; batched with other jobs from the same poll, or streamed field by field
+            # when a user is waiting on it
+            redisClient.publish_progress(jid, "In progress", progress=30, stage="extracting")
+            on_field = _field_publisher(jid) if priority == INTERACTIVE else None
+            with trace.span("extract"):
+                analysis = analyser.analyse(job, priority, on_field=on_field)
+            fields = {"analysis": analysis, "status": "Complete"}
+        if fp is not None:
+            fields["fingerprint"] = fp.as_doc()
+        done = mongoWriter.update(jid, fields)
+        # Block until persisted so the offset is only committed afterwards
+        with trace.span("persist"):
+            saved.result()
+            done.result()
+        if original is None:
+            # reposts are not new demand
+            rollupWriter.add(job, analysis)
+        redisClient.publish_progress(jid, "Complete", progress=100, stage="done", result=analysis)
+    except Exception as e:
+        outcome = "failed"
+        print(f"[worker] job {jid} failed: {e}")
+        raise
+    finally:
+        JOB_SECONDS.observe(trace.elapsed, outcome=outcome)
+        JOBS.inc(outcome=outcome)
+        if TRACE_JOBS:
+            # diagnostics only: rides along with the next bulk write, nobody waits for it
+            mongoWriter.update(jid, {"trace": trace.as_dict()}, upsert=False)
+
+
+def _retry_or_fail(msg, error):
+    """Park a failed job on the next retry topic, or dead-letter it once the tiers are used up."""
+    jid = msg.value.id
+    # Raises if the record cannot be produced: then it is not acked and comes back after a restart
+    decision = kafka.retry.route(msg, error, retryable=not isinstance(msg.value, InvalidRecord))
+    RETRIES.inc(topic=decision.topic)
+    if decision.dead:
+        print(f"[worker] job {jid or msg.key} dead-lettered to {decision.topic} after {decision.attempt} attempt(s)")
+        if jid is None:
+            return  # the payload names no job to mark as failed
+        redisClient.publish_progress(jid, "failed", stage="failed", result={"error": str(error), "attempts": decision.attempt})
+        status = "failed"
+    else:
+        redisClient.publish_progress(jid, "Retrying", stage="retry",
+                                     result={"error": str(error), "attempt": decision.attempt, "retryAt": decision.retry_at})
+        status = "Retrying"
+    # upsert=False: a job that was never saved gets no url-less stub (the url index is unique)
+    mongoWriter.update(jid, {"status": status, "error": str(error), "attempts": decision.attempt}, upsert=False).result()
+
+
+def _handle_record(msg):
+    if isinstance(msg.value, InvalidRecord):
+        # rejected at the edge: straight to the dead-letter topic, no retries
+        JOBS.inc(outcome="invalid")
+        _retry_or_fail(msg, ValueError(msg.value.error))
+        return
+    try:
+        # API submissions jump ahead of bulk imports for the LLM
+        handle_job(msg.value, priority_of(read_headers(msg).get(H_PRIORITY)))
+    except Exception as e:
+        _retry_or_fail(msg, e)
+
+
+def _job_key(msg):
+    """Ordering key: jobs for the same URL never run concurrently."""
+    job = msg.value
+    if isinstance(job, InvalidRecord):
+        return msg.key or job.id or f"{msg.topic}:{msg.partition}"
+    return job.url
+
+
+def _on_done(msg, err):
+    """A record becomes committable only once handle_job persisted it."""
+    if err is None:
+        kafka.ack(msg)
+    else:
+        # left in flight: its partition stops committing here and the record is redelivered after restart
+        print(f"[worker] not acking offset {msg.offset}: {err}")
+
+
 def process():
+    pool = JobPool(_handle_record,
+                   concurrency=WORKER_CONCURRENCY, max_pending=WORKER_MAX_PENDING,
+                   on_done=_on_done)
+    paused = False
+    next_lag = 0.0
     try:
         while not stop:
+            # Backpressure: stop fetching while the pool is full, keep polling for heartbeats
+            if pool.full():
+                # re-pause every loop: a rebalance can hand us fresh, unpaused partitions
+                consumer.pause(*consumer.assignment())
+                paused = True
+            elif paused:
+                # partitions holding delayed retries stay paused until those are due
+                consumer.resume(*(consumer.paused() - kafka.scheduler.held_partitions()))
+                paused = False
+
+            # wake up in time for the next delayed retry
+            wait = kafka.scheduler.next_due_in()
+            timeout_ms = 1000 if wait is None else int(min(wait, 1.0) * 1000)
             # poll returns a dict: {TopicPartition: [messages]}
-            records = consumer.poll(timeout_ms=1000)
-            if not records:
-                continue
+            records = consumer.poll(timeout_ms=timeout_ms)
+            # commit finished work in batches, on the poll thread
+            kafka.commit()
+
+            POLL_BATCH.observe(sum(len(msgs) for msgs in records.values()))
+            JOBS_INFLIGHT.set(pool.pending)
+            if time.monotonic() >= next_lag:
+                next_lag = time.monotonic() + LAG_INTERVAL
+                for tp, lag in kafka.lag().items():
+                    CONSUMER_LAG.set(lag, topic=tp.topic, partition=tp.partition)
 
-            # loop through message queue to process
-            for _tp, msgs in records.items():
+            # hand every message to the pool; it keeps per-URL ordering.
+            # Retries that are not due yet wait in the scheduler instead.
+            for tp, msgs in records.items():
                 for msg in msgs:
-                    # extract data from message
-                    job = msg.value
-                    jid = job["id"]
-
-                    # set_status(jid, status="processing", progress=10)
-                    try:
-                        # Save job to database
-                        mongoClient.save_job(job)
-                        # Initialise status for job progress
-                        mongoClient.set_status(jid)
-                        """ 
-                            Work start here
-                        """
-                        print("Work in progress!")
-                        time.sleep(15) # For testing only
-                        mongoClient.set_status(jid, "Complete")
-                    except Exception as e:
-                        mongoClient.set_status(jid, status="failed")
+                    kafka.track(msg)
+                    if not kafka.scheduler.hold(tp, msg):
+                        pool.submit(_job_key(msg), msg)
+            for msg in kafka.scheduler.due():
+                pool.submit(_job_key(msg), msg)
     except KeyboardInterrupt:
         print("👋 Stopping worker…")
     except Exception as e:
         print(f"Errors: {e}")
     finally:
-        consumer.close()
+        # Graceful drain: fetch nothing new, let in-flight jobs finish
+        try:
+            consumer.pause(*consumer.assignment())
+        except Exception:
+            pass
+        if not pool.drain(timeout=DRAIN_TIMEOUT):
+            print(f"⚠️ {pool.pending} job(s) still running after {DRAIN_TIMEOUT}s drain")
+        pool.shutdown(wait=False)
+        _close()
+
+
+def _close():
+    analyser.close()
+    mongoWriter.close()
+    rollupWriter.close()
+    redisClient.close()
+    kafka.close()
+    if metricsServer is not None:
+        metricsServer.stop()
 
-def main():
-    process()
+def main(metrics_port=METRICS_PORT):
+    if setup(metrics_port=metrics_port):
+        process()
+    else:
+        _close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,30 @@
+
+from .registry import REGISTRY
+
+
+# Kafka
+POLL_BATCH = REGISTRY.histogram("worker_poll_batch_size", "Records returned by one consumer poll",
+                                buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500))
+CONSUMER_LAG = REGISTRY.gauge("worker_consumer_lag", "High watermark minus consumer position, per partition")
+JOBS_INFLIGHT = REGISTRY.gauge("worker_jobs_inflight", "Jobs submitted to the pool and not finished yet")
+
+# Jobs
+JOB_SECONDS = REGISTRY.histogram("worker_job_seconds", "End-to-end time of handle_job")
+JOBS = REGISTRY.counter("worker_jobs_total", "Jobs handled, by outcome")
+RETRIES = REGISTRY.counter("worker_job_retries_total", "Failed jobs sent to a retry topic or the dead-letter topic")
+DUPLICATES = REGISTRY.counter("worker_duplicates_total", "Jobs that reused a near-duplicate's analysis instead of the LLM")
+
+# Mongo
+MONGO_WRITE_SECONDS = REGISTRY.histogram("mongo_write_seconds", "Latency of one Mongo write round trip")
+MONGO_WRITE_OPS = REGISTRY.counter("mongo_write_ops_total", "Update operations sent to Mongo")
+
+# LLM
+LLM_SECONDS = REGISTRY.histogram("llm_request_seconds", "Latency of one generation request to Ollama")
+LLM_PROMPT_TOKENS = REGISTRY.counter("llm_prompt_tokens_total", "Prompt tokens evaluated (Ollama prompt_eval_count)")
+LLM_COMPLETION_TOKENS = REGISTRY.counter("llm_completion_tokens_total", "Tokens generated (Ollama eval_count)")
+LLM_CACHE = REGISTRY.counter("llm_cache_lookups_total", "Response cache lookups, by result")
+LLM_QUEUE_SECONDS = REGISTRY.histogram("llm_queue_seconds", "Wait for a generation slot, by priority lane")
+LLM_COALESCED = REGISTRY.counter("llm_coalesced_total", "Generations served by an identical request already in flight")
+LLM_REPAIRS = REGISTRY.counter("llm_output_repairs_total", "Fixes applied to model output instead of re-prompting, by kind")
+LLM_FAILOVERS = REGISTRY.counter("llm_failovers_total", "Generations moved to another Ollama host after a failure")
+PROMPT_TOKENS_SAVED = REGISTRY.counter("cleaner_tokens_saved_total", "Estimated prompt tokens removed by AdCleaner")
@@ -0,0 +1,145 @@
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import threading
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# seconds; from a cache hit up to the 300s LLM timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(labels:Dict[str, object]) -> LabelKey:
+  return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key:LabelKey, extra:Optional[Tuple[str, str]]=None) -> str:
+  pairs = list(key) + ([extra] if extra else [])
+  if not pairs:
+    return ""
+  body = ",".join(f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+  return "{" + body + "}"
+
+
+def _fmt_value(v:float) -> str:
+  if v == math.inf:
+    return "+Inf"
+  return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+  kind = ""
+
+  def __init__(self, name:str, help:str):
+    self.name = name
+    self.help = help
+    self._lock = threading.Lock()
+
+  def expose(self) -> List[str]:
+    return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+  def _samples(self) -> List[str]:
+    raise NotImplementedError
+
+
+class Counter(_Metric):
+  kind = "counter"
+
+  def __init__(self, name:str, help:str):
+    super().__init__(name, help)
+    self._values: Dict[LabelKey, float] = {}
+
+  def inc(self, amount:float=1, **labels) -> None:
+    key = _key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+  def value(self, **labels) -> float:
+    with self._lock:
+      return self._values.get(_key(labels), 0)
+
+  def _samples(self) -> List[str]:
+    with self._lock:
+      return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+  kind = "gauge"
+
+  def set(self, value:float, **labels) -> None:
+    with self._lock:
+      self._values[_key(labels)] = value
+
+
+class Histogram(_Metric):
+  kind = "histogram"
+
+  def __init__(self, name:str, help:str, buckets:Iterable[float]=DEFAULT_BUCKETS):
+    super().__init__(name, help)
+    self.buckets = tuple(sorted(buckets))
+    # label key -> (per-bucket counts incl. +Inf, sum, count)
+    self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+  def observe(self, value:float, **labels) -> None:
+    key = _key(labels)
+    idx = bisect_left(self.buckets, value)
+    with self._lock:
+      counts, total, n = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+      counts[idx] += 1
+      self._values[key] = (counts, total + value, n + 1)
+
+  def count(self, **labels) -> int:
+    with self._lock:
+      entry = self._values.get(_key(labels))
+      return entry[2] if entry else 0
+
+  def _samples(self) -> List[str]:
+    out: List[str] = []
+    with self._lock:
+      items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+    for key, (counts, total, n) in items:
+      running = 0
+      for bound, c in zip(self.buckets + (math.inf,), counts):
+        running += c
+        out.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {running}")
+      out.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+      out.append(f"{self.name}_count{_fmt_labels(key)} {n}")
+    return out
+
+
+class Registry:
+  """Holds every metric of the process and renders the Prometheus text format."""
+
+  def __init__(self):
+    self._metrics: Dict[str, _Metric] = {}
+    self._lock = threading.Lock()
+
+  def _register(self, metric:_Metric) -> _Metric:
+    with self._lock:
+      existing = self._metrics.get(metric.name)
+      if existing is not None:
+        return existing
+      self._metrics[metric.name] = metric
+      return metric
+
+  def counter(self, name:str, help:str) -> Counter:
+    return self._register(Counter(name, help))  # type: ignore[return-value]
+
+  def gauge(self, name:str, help:str) -> Gauge:
+    return self._register(Gauge(name, help))  # type: ignore[return-value]
+
+  def histogram(self, name:str, help:str, buckets:Iterable[float]=DEFAULT_BUCKETS) -> Histogram:
+    return self._register(Histogram(name, help, buckets))  # type: ignore[return-value]
+
+  def expose(self) -> str:
+    with self._lock:
+      metrics = list(self._metrics.values())
+    lines: List[str] = []
+    for m in metrics:
+      lines.extend(m.expose())
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,55 @@
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import threading
+
+from .registry import REGISTRY, Registry
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+  """Serves `registry` in the Prometheus text format on GET /metrics, from a daemon thread."""
+
+  def __init__(self, port:int, host:str="0.0.0.0", registry:Registry=REGISTRY):
+    self.host = host
+    self.port = port
+    self.registry = registry
+    self._server: Optional[ThreadingHTTPServer] = None
+
+
+  def _handler(self):
+    registry = self.registry
+
+    class Handler(BaseHTTPRequestHandler):
+      def log_message(self, *_):
+        return
+
+      def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+          return self.send_error(404)
+        body = registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    return Handler
+
+
+  def start(self) -> "MetricsServer":
+    self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+    self._server.daemon_threads = True
+    self.port = self._server.server_address[1]
+    threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{self.host}:{self.port}/metrics")
+    return self
+
+
+  def stop(self) -> None:
+    if self._server is not None:
+      self._server.shutdown()
+      self._server.server_close()
+      self._server = None
@@ -0,0 +1,45 @@
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import time
+
+
+class JobTrace:
+  """
+  Span timeline of one job: where its end-to-end time went.
+
+  Spans are relative to the trace start, in milliseconds, and can be stored on
+  the job document (`as_dict()`) to look at a slow job after the fact.
+  """
+
+  def __init__(self, job_id:str):
+    self.job_id = job_id
+    self._t0 = time.perf_counter()
+    self.spans: List[Dict[str, Any]] = []
+
+  @contextmanager
+  def span(self, name:str) -> Iterator[None]:
+    start = time.perf_counter()
+    error: Optional[str] = None
+    try:
+      yield
+    except Exception as e:
+      error = type(e).__name__
+      raise
+    finally:
+      entry: Dict[str, Any] = {
+        "name": name,
+        "start_ms": round((start - self._t0) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+      }
+      if error:
+        entry["error"] = error
+      self.spans.append(entry)
+
+  @property
+  def elapsed(self) -> float:
+    """Seconds since the trace started."""
+    return time.perf_counter() - self._t0
+
+  def as_dict(self) -> Dict[str, Any]:
+    return {"total_ms": round(self.elapsed * 1000, 3), "spans": list(self.spans)}
@@ -0,0 +1,97 @@
+"""
+Worker cold start: connect the backends concurrently, wait until they are ready,
+and report where the time went.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import time
+
+from config.settings import STARTUP_RETRIES, STARTUP_BACKOFF
+
+READY_LOG_EVERY = 10.0  # seconds between "still waiting" lines
+
+
+class ColdStart:
+    """Stopwatch of one worker start: one entry per step, printed as a single breakdown line."""
+
+    def __init__(self, started:Optional[float]=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.steps: Dict[str, float] = {}
+        self.attempts: Dict[str, int] = {}
+
+    def record(self, name:str, seconds:float, attempts:int=1) -> None:
+        self.steps[name] = seconds
+        self.attempts[name] = attempts
+
+    def report(self) -> str:
+        parts = [f"{name} {secs:.2f}s" + (f" ({self.attempts[name]} tries)" if self.attempts[name] > 1 else "")
+                 for name, secs in self.steps.items()]
+        return f"🧊 cold start {time.perf_counter() - self.started:.2f}s: " + ", ".join(parts)
+
+
+def with_retry(name:str, build:Callable[[], Any], attempts:int=STARTUP_RETRIES,
+               backoff:float=STARTUP_BACKOFF) -> tuple:
+    """Call `build` until it returns, at most `attempts` times. Returns (result, tries)."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return build(), attempt
+        except Exception as e:
+            if attempt == attempts:
+                raise RuntimeError(f"{name}: gave up after {attempts} attempts: {e}") from e
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"[startup] {name} not reachable ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def connect_all(builders:Dict[str, Callable[[], Any]], clock:ColdStart,
+                fallbacks:Optional[Dict[str, Callable[[], Any]]]=None) -> Dict[str, Any]:
+    """
+    Run every builder at once, each with bounded retry. A backend that still fails
+    uses its fallback when it has one (degraded mode), otherwise startup fails.
+    """
+    fallbacks = fallbacks or {}
+    if not builders:
+        return {}
+
+    def timed(name:str, build:Callable[[], Any]):
+        start = time.perf_counter()
+        try:
+            result, tries = with_retry(name, build)
+        except Exception as e:
+            if name not in fallbacks:
+                raise
+            print(f"[startup] {e}; continuing without it")
+            result, tries = fallbacks[name](), STARTUP_RETRIES
+        clock.record(name, time.perf_counter() - start, tries)
+        return result
+
+    with ThreadPoolExecutor(max_workers=len(builders), thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(timed, name, build) for name, build in builders.items()}
+        return {name: fut.result() for name, fut in futures.items()}
+
+
+def wait_ready(checks:Dict[str, Callable[[], bool]], clock:ColdStart, should_stop:Callable[[], bool],
+               interval:float=1.0) -> bool:
+    """Poll `checks` until all pass. Returns False if `should_stop` fired first."""
+    start = time.perf_counter()
+    next_log = start + READY_LOG_EVERY
+    pending = dict(checks)
+    while pending:
+        pending = {name: check for name, check in pending.items() if not _safe(check)}
+        if not pending:
+            break
+        if should_stop():
+            return False
+        if time.perf_counter() >= next_log:
+            print(f"[startup] waiting for {', '.join(pending)} ({time.perf_counter() - start:.0f}s)")
+            next_log += READY_LOG_EVERY
+        time.sleep(interval)
+    clock.record("ready", time.perf_counter() - start)
+    return True
+
+
+def _safe(check:Callable[[], bool]) -> bool:
+    try:
+        return bool(check())
+    except Exception:
+        return False
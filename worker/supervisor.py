@@ -0,0 +1,161 @@
+"""
+Multi-process entry point: runs N copies of main.main(), one per child process.
+
+Every child has its own KafkaConsumer in the same group, so Kafka spreads the
+topic's partitions over them and the CPU-bound steps (cleaning, skill matching,
+parsing) run on several cores instead of behind one GIL.
+
+    python supervisor.py            # N = min(partitions, CPUs)
+    python supervisor.py -n 4
+
+Crashed children are restarted with exponential backoff. SIGTERM / SIGINT are
+forwarded so every child drains its in-flight jobs before the supervisor exits.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+# Imported before forking so children share the loaded modules
+import main
+from config.settings import (KAFKA_BROKERS, KAFKA_TOPIC, METRICS_PORT, DRAIN_TIMEOUT,
+                             WORKER_PROCESSES, RESTART_BACKOFF, RESTART_BACKOFF_MAX)
+
+HEALTHY_AFTER = 60.0  # a child that ran this long resets its crash backoff
+
+
+def partition_count(topic:str=KAFKA_TOPIC) -> int:
+    """Partitions of `topic`, or 0 when the broker cannot tell us."""
+    try:
+        from kafka import KafkaConsumer # type: ignore
+        probe = KafkaConsumer(bootstrap_servers=KAFKA_BROKERS, request_timeout_ms=10000)
+        try:
+            return len(probe.partitions_for_topic(topic) or ())
+        finally:
+            probe.close()
+    except Exception as e:
+        print(f"[supervisor] could not read partitions of {topic}: {e}")
+        return 0
+
+
+def default_processes() -> int:
+    """More consumers than partitions would sit idle; more than cores would fight over them."""
+    cpus = os.cpu_count() or 1
+    partitions = partition_count()
+    return max(1, min(partitions, cpus) if partitions else cpus)
+
+
+class Supervisor:
+    def __init__(self, processes:int, drain_timeout:float=DRAIN_TIMEOUT,
+                 backoff:float=RESTART_BACKOFF, backoff_max:float=RESTART_BACKOFF_MAX):
+        self.processes = processes
+        self.drain_timeout = drain_timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        self.stopping = False
+        self.__children = {}    # pid -> slot
+        self.__started = {}     # slot -> monotonic start time
+        self.__crashes = {}     # slot -> consecutive crashes
+        self.__restart_at = {}  # slot -> monotonic time of the next start
+
+
+    def _spawn(self, slot:int) -> None:
+        sys.stdout.flush()  # or the child inherits and re-prints our buffered output
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                # the child drains on its own signals, like a standalone worker
+                signal.signal(signal.SIGINT, main._stop)
+                signal.signal(signal.SIGTERM, main._stop)
+                main.main(metrics_port=METRICS_PORT + slot if METRICS_PORT else 0)
+            except BaseException as e:
+                print(f"[supervisor] worker {slot} crashed: {e}")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+
+        self.__children[pid] = slot
+        self.__started[slot] = time.monotonic()
+        print(f"🚀 worker {slot} started (pid {pid})")
+
+
+    def _stop(self, *_) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        print("👋 Stopping workers…")
+        for pid in self.__children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+    def _reap(self) -> None:
+        while self.__children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.__children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            ran = time.monotonic() - self.__started[slot]
+            crashes = 0 if ran >= HEALTHY_AFTER else self.__crashes.get(slot, 0) + 1
+            self.__crashes[slot] = crashes
+            delay = min(self.backoff * (2 ** max(crashes - 1, 0)), self.backoff_max) if crashes else 0
+            print(f"⚠️ worker {slot} (pid {pid}) exited with {code} after {ran:.0f}s, restarting in {delay:.1f}s")
+            self.__restart_at[slot] = time.monotonic() + delay
+
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        for slot in range(self.processes):
+            self._spawn(slot)
+
+        while not self.stopping:
+            self._reap()
+            now = time.monotonic()
+            for slot, at in list(self.__restart_at.items()):
+                if at <= now and not self.stopping:
+                    del self.__restart_at[slot]
+                    self._spawn(slot)
+            time.sleep(0.5)
+
+        # Children drain their pools; give them the same budget plus some slack
+        deadline = time.monotonic() + self.drain_timeout + 15
+        while self.__children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in list(self.__children):
+            print(f"⚠️ worker pid {pid} did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+
+def cli():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--processes", type=int, default=WORKER_PROCESSES,
+                    help="worker processes (default: WORKER_PROCESSES, or min(partitions, CPUs))")
+    args = ap.parse_args()
+
+    processes = args.processes if args.processes > 0 else default_processes()
+    print(f"[supervisor] running {processes} worker process(es)")
+    Supervisor(processes).run()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The worker runs from its own directory (`python main.py`), so its packages are top-level imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,24 @@
+import warnings
+
+import pytest
+
+from helper.ai.async_client import AsyncAiClient
+from helper.ai.cache import ResponseCache
+from helper.ai.extract_keywords import SkillExtractor
+
+
+@pytest.fixture
+def extractor():
+  return SkillExtractor(cache=ResponseCache(), llm=AsyncAiClient(host="http://127.0.0.1:9"))
+
+
+def test_blocking_paths_reject_an_async_backend_without_leaking_a_coroutine(extractor):
+  with warnings.catch_warnings():
+    warnings.simplefilter("error")  # "coroutine ... was never awaited" would fail the test
+    with pytest.raises(TypeError, match="async backend"):
+      extractor._process_batch({"a": "Ad A\nWrite Python.", "b": "Ad B\nWrite Python."})
+    with pytest.raises(TypeError, match="async backend"):
+      extractor._filter_responsibilities(["Write Python services"], rephrase=True)
+    with pytest.raises(TypeError, match="async backend"):
+      extractor._process_article("Ad A\nWrite Python.")
+  assert not extractor.can_stream
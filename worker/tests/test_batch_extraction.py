@@ -0,0 +1,50 @@
+import json
+
+from helper.ai.cache import ResponseCache
+from helper.ai.extract_keywords import SkillExtractor
+
+
+def full(title):
+  return {"job_title": title, "summary": f"{title} summary.", "responsibilities": [f"Build {title}"],
+          "requirements": [], "technical_skills": ["Python"], "qualifications": []}
+
+
+class ScriptedLlm:
+  """Answers batch prompts with `batch_answer` and single-ad prompts with a complete response."""
+
+  def __init__(self, batch_answer):
+    self.batch_answer = batch_answer
+    self.prompts = []
+
+  def _generate(self, prompt, **options):
+    self.prompts.append(prompt)
+    if '<ad id="' in prompt:
+      return self.batch_answer
+    title = "A" if "Ad number A" in prompt else "B"
+    return json.dumps({"response": full(title)})
+
+
+def test_truncated_batch_entry_is_retried_alone():
+  complete = json.dumps({"results": [{"id": "a", "response": full("A")}]})
+  # cut off inside entry "b", as when the generation hits its token limit
+  truncated = complete[:-2] + ', {"id": "b", "response": {"job_title": "B", "summary": "Build th'
+  llm = ScriptedLlm(truncated)
+  extractor = SkillExtractor(cache=ResponseCache(), llm=llm)
+
+  results, errors = extractor._process_batch({"a": "Ad number A\nWrite Python.", "b": "Ad number B\nWrite Python."})
+
+  assert errors == {}
+  assert results["a"]["response"] == full("A")
+  assert results["b"]["response"] == full("B")
+  assert len(llm.prompts) == 2  # the batch, then "b" on its own
+
+
+def test_entry_missing_a_field_is_retried_alone():
+  partial = {k: v for k, v in full("B").items() if k != "qualifications"}
+  llm = ScriptedLlm(json.dumps({"results": [{"id": "a", "response": full("A")}, {"id": "b", "response": partial}]}))
+  extractor = SkillExtractor(cache=ResponseCache(), llm=llm)
+
+  results, _ = extractor._process_batch({"a": "Ad number A\nWrite Python.", "b": "Ad number B\nWrite Python."})
+
+  assert results["b"]["response"] == full("B")
+  assert len(llm.prompts) == 2
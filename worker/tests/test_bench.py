@@ -0,0 +1,22 @@
+import json
+
+import main
+from bench import run as bench
+
+
+def test_benchmark_replays_every_job_through_the_worker(monkeypatch, tmp_path):
+  # the harness rewires main's globals; put them back afterwards
+  for name in ("handle_job", "WORKER_CONCURRENCY", "WORKER_MAX_PENDING", "stop"):
+    monkeypatch.setattr(main, name, getattr(main, name))
+  out = tmp_path / "report.json"
+
+  bench.main_cli(["--jobs", "24", "--duplicates", "0.25", "--concurrency", "4", "--latency-ms", "0",
+                  "--tokens-per-s", "1e6", "--prefill-tokens-per-s", "1e6", "--timeout", "60", "--out", str(out)])
+
+  report = json.loads(out.read_text())
+  assert report["acked"] == report["completed"] == 24
+  assert report["failed"] == 0
+  assert report["deduplicated"] > 0
+  assert 0 < report["llm"]["requests"] < 24
+  assert report["stages"]["job.end_to_end"]["count"] == 24
+  assert report["kafka"]["commits"] > 0
@@ -0,0 +1,75 @@
+import io
+import json
+
+import mongomock # type: ignore
+import pytest
+
+import bulk_import
+from bulk_import import Checkpoint, MongoSink, known_urls
+
+
+def ad(n):
+  return {"url": f"https://jobs.example/{n}", "jobTitle": f"Engineer {n}", "jobDescription": "Write Python services."}
+
+
+@pytest.fixture
+def source(tmp_path):
+  rows = [ad(1), ad(2), ad(1), ad(3), ad(4), ad(5)]
+  lines = [json.dumps(r) for r in rows]
+  lines.insert(3, "{not json")
+  path = tmp_path / "ads.jsonl"
+  path.write_text("\n".join(lines) + "\n")
+  return str(path)
+
+
+class FailingSink(MongoSink):
+  """Lands its second write, then crashes before the checkpoint is saved."""
+
+  def __init__(self, coll):
+    super().__init__(coll)
+    self.writes = 0
+
+  def write(self, records):
+    self.writes += 1
+    written = super().write(records)
+    if self.writes == 2:
+      raise RuntimeError("killed")
+    return written
+
+
+def test_import_skips_duplicates_and_invalid_rows_and_checkpoints(source):
+  coll = mongomock.MongoClient().db.jobs
+  checkpoint = Checkpoint(source + ".checkpoint.json", source)
+  rejects = io.StringIO()
+
+  stats = bulk_import.run(source, MongoSink(coll), set(), checkpoint, "jsonl", batch=2, rejects=rejects, out=io.StringIO())
+
+  assert stats == {"read": 7, "written": 5, "duplicate": 1, "invalid": 1}
+  assert sorted(known_urls(coll)) == [ad(n)["url"] for n in range(1, 6)]
+  assert {doc["status"] for doc in coll.find()} == {"Imported"}
+  assert json.loads(rejects.getvalue())["raw"] == "{not json"
+  saved = Checkpoint(checkpoint.path, source).load()
+  assert (saved.consumed, saved.stats, saved.done) == (7, stats, True)
+
+
+def test_resume_continues_after_the_last_durable_batch(source):
+  coll = mongomock.MongoClient().db.jobs
+  path = source + ".checkpoint.json"
+  with pytest.raises(RuntimeError):
+    bulk_import.run(source, FailingSink(coll), set(), Checkpoint(path, source), "jsonl", batch=2, out=io.StringIO())
+  checkpoint = Checkpoint(path, source).load()
+  assert (checkpoint.consumed, checkpoint.done) == (4, False)
+
+  # the crashed batch landed before the crash, so the URL check skips it on resume
+  stats = bulk_import.run(source, MongoSink(coll), known_urls(coll), checkpoint, "jsonl", batch=2, out=io.StringIO())
+
+  assert (stats["read"], stats["duplicate"], stats["invalid"]) == (7, 3, 1)
+  assert sorted(known_urls(coll)) == [ad(n)["url"] for n in range(1, 6)]
+  assert coll.count_documents({}) == 5
+
+
+def test_checkpoint_refuses_another_source(source, tmp_path):
+  path = str(tmp_path / "shared.checkpoint.json")
+  Checkpoint(path, source).save()
+  with pytest.raises(SystemExit):
+    Checkpoint(path, str(tmp_path / "other.jsonl")).load()
@@ -0,0 +1,46 @@
+import mongomock # type: ignore
+
+from database.bulk_writer import BulkMongoWriter
+from database.job_record import JobRecord
+
+
+class CountingCollection:
+  """A mongomock collection that remembers the size of every bulk_write."""
+
+  def __init__(self):
+    self.coll = mongomock.MongoClient().db.jobs
+    self.batches = []
+
+  def bulk_write(self, ops, ordered=True):
+    self.batches.append(len(ops))
+    return self.coll.bulk_write(ops, ordered=ordered)
+
+  def __getattr__(self, name):
+    return getattr(self.coll, name)
+
+
+def job(n):
+  return JobRecord(id=f"job-{n}", url=f"https://jobs.example/{n}", jobTitle="Engineer", jobDescription="Python")
+
+
+def test_writes_for_one_job_are_merged_into_one_operation():
+  coll = CountingCollection()
+  writer = BulkMongoWriter(coll, flush_interval_ms=60_000)
+  futures = [writer.save_job(job(1)), writer.set_status("job-1"), writer.set_status("job-1", "Complete"),
+             writer.save_job(job(2))]
+  writer.close()
+
+  assert coll.batches == [2]
+  assert [f.result(timeout=1)["upserted"] for f in futures] == [True, True, True, True]
+  doc = coll.find_one({"id": "job-1"})
+  assert doc["status"] == "Complete" and doc["url"] == job(1).url and "processedAt" in doc
+
+
+def test_a_full_buffer_flushes_before_the_interval():
+  coll = CountingCollection()
+  writer = BulkMongoWriter(coll, max_ops=3, flush_interval_ms=60_000)
+  futures = [writer.save_job(job(n)) for n in range(3)]
+
+  assert [f.result(timeout=5)["ok"] for f in futures] == [True] * 3
+  assert coll.batches == [3]
+  writer.close()
@@ -0,0 +1,59 @@
+import fakeredis
+
+from bench.fake_ollama import FakeOllama
+from helper.ai.cache import ResponseCache
+from helper.ai.client import AiClient
+
+PROMPT = "Input (raw job ad):\nBackend Engineer\n- Python\n    Extraction scope:"
+
+
+class BrokenRedis:
+  def get(self, key):
+    raise ConnectionError("down")
+
+  def set(self, key, value, ex=None):
+    raise ConnectionError("down")
+
+
+def payload(**options):
+  return {"model": "mistral", "prompt": PROMPT, "format": "json", "stream": False, "options": {"temperature": 0, **options}}
+
+
+def test_key_covers_model_prompt_and_options_but_not_streaming():
+  assert ResponseCache.key(payload()) == ResponseCache.key({**payload(), "stream": True})
+  assert ResponseCache.key(payload()) != ResponseCache.key(payload(temperature=0.5))
+  assert ResponseCache.key(payload()) != ResponseCache.key({**payload(), "model": "llama3"})
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+  cache = ResponseCache(max_entries=2)
+  cache.put("a", "1")
+  cache.put("b", "2")
+  cache.get("a")
+  cache.put("c", "3")
+  assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+def test_redis_tier_is_shared_and_its_failures_are_misses():
+  redis = fakeredis.FakeRedis()
+  ResponseCache(redis_client=redis, ttl=60).put("k", "value")
+  other = ResponseCache(redis_client=redis)
+  assert other.get("k") == "value"
+  assert other.stats()["redis_hits"] == 1 and 0 < redis.ttl("llm:k") <= 60
+
+  broken = ResponseCache(redis_client=BrokenRedis())
+  broken.put("k", "value")
+  assert broken.get("k") == "value" and broken.get("missing") is None
+
+
+def test_client_answers_a_repeated_prompt_from_the_cache():
+  ollama = FakeOllama(latency_ms=0, tokens_per_s=1e6, prefill_tokens_per_s=1e6)
+  client = AiClient(host=ollama.start(), cache=ResponseCache())
+  try:
+    first = client._generate(PROMPT, temperature=0)
+    assert client._generate(PROMPT, temperature=0) == first
+    client._generate(PROMPT, temperature=0.5)
+  finally:
+    client.close()
+    ollama.stop()
+  assert ollama.requests == 2
@@ -0,0 +1,28 @@
+from helper.text.cleaner import AdCleaner
+
+AD = """Backend Engineer
+Requirements
+Experience with Python packages
+Knowledge of diversity sampling in A/B tests
+5+ years building salary and payroll systems
+Strong benefit-of-the-doubt code reviews
+Tech stack
+Python, Kafka
+Benefits
+Free lunch
+Salary package:
+Competitive
+Nice to have
+Go"""
+
+
+def test_requirement_lines_are_not_mistaken_for_perks_headings():
+  result = AdCleaner().clean(AD)
+
+  assert result.text.splitlines() == [
+    "Backend Engineer", "Requirements", "Experience with Python packages",
+    "Knowledge of diversity sampling in A/B tests", "5+ years building salary and payroll systems",
+    "Strong benefit-of-the-doubt code reviews", "Tech stack", "Python, Kafka", "Nice to have", "Go",
+  ]
+  assert result.dropped == [("benefits", "Benefits"), ("benefits", "Salary package:")]
+  assert result.tokens_saved > 0
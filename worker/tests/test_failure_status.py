@@ -0,0 +1,57 @@
+import mongomock # type: ignore
+import pytest
+
+import main
+from bench.memory_kafka import MemoryKafkaClient, Record
+from database.bulk_writer import BulkMongoWriter, BulkWriteFailed
+from database.job_record import JobRecord
+
+
+class NullPublisher:
+  def publish_progress(self, *args, **kwargs):
+    return True
+
+
+@pytest.fixture
+def jobs():
+  coll = mongomock.MongoClient().db.jobs
+  coll.create_index("url", unique=True)
+  coll.create_index("id", unique=True)
+  writer = BulkMongoWriter(coll)
+  yield coll, writer
+  writer.close()
+
+
+def test_dead_lettered_jobs_that_were_never_saved_leave_no_stub(jobs, monkeypatch):
+  coll, writer = jobs
+  monkeypatch.setattr(main, "mongoWriter", writer)
+  monkeypatch.setattr(main, "redisClient", NullPublisher())
+  monkeypatch.setattr(main, "kafka", MemoryKafkaClient([]))
+
+  for jid in ("bad-1", "bad-2"):
+    raw = b'{"id": "%s", "url": 42}' % jid.encode()
+    main._handle_record(Record("job.created", 0, 0, None, JobRecord.decode(raw)))
+
+  assert coll.count_documents({}) == 0
+  assert len(main.kafka.dead_letters) == 2
+
+
+def test_failed_status_still_lands_on_a_saved_job(jobs, monkeypatch):
+  coll, writer = jobs
+  monkeypatch.setattr(main, "mongoWriter", writer)
+  monkeypatch.setattr(main, "redisClient", NullPublisher())
+  monkeypatch.setattr(main, "kafka", MemoryKafkaClient([]))
+  job = JobRecord(id="job-1", url="https://jobs.example/1", jobTitle="Engineer", jobDescription="Python")
+  writer.save_job(job).result()
+
+  main._retry_or_fail(Record("job.created", 0, 0, None, job), RuntimeError("llm down"))
+
+  assert coll.find_one({"id": "job-1"})["status"] == "Retrying"
+
+
+def test_duplicate_key_with_nothing_to_update_is_a_failure(jobs):
+  coll, writer = jobs
+  writer.update("a", {"status": "failed"}).result()
+  with pytest.raises(BulkWriteFailed):
+    writer.update("b", {"status": "failed"}).result()  # url-less stub collides with a's
+  assert [d["id"] for d in coll.find()] == ["a"]
@@ -0,0 +1,63 @@
+import mongomock # type: ignore
+import pytest
+
+from bench.corpus import generate
+from config.settings import MONGO_DB, MONGO_COLL
+from database.mongo import MongoDB
+from helper.text.fingerprint import BITS, Fingerprint
+
+ADS = [f"{job['jobTitle']}\n{job['jobDescription']}" for job in generate(5, seed=3)]
+
+
+def edited(text, word="Rust"):
+  words = text.split()
+  words[len(words) // 2] = word
+  return " ".join(words)
+
+
+def test_reposts_with_other_layout_and_links_hash_the_same():
+  ad = ADS[0]
+  repost = ad.upper().replace("\n", "  ") + " Apply at https://jobs.example/1"
+  assert Fingerprint.of(ad + " Apply at www.careers.example").hash == Fingerprint.of(repost).hash
+  assert Fingerprint.of("Python developer, apply now") is None
+
+
+def test_a_small_edit_stays_within_a_few_bits_and_shares_a_band():
+  original, repost, other = Fingerprint.of(ADS[0]), Fingerprint.of(edited(ADS[0])), Fingerprint.of(ADS[4])
+  assert original.hash != repost.hash
+  assert original.distance(repost.as_doc()) <= 3 and set(original.bands) & set(repost.bands)
+  assert original.distance(other.as_doc()) > 3
+
+
+def test_stored_simhash_fits_int64_and_round_trips():
+  for ad in ADS:
+    fp = Fingerprint.of(ad)
+    stored = fp.as_doc()["simhash"]
+    assert -(1 << (BITS - 1)) <= stored < 1 << (BITS - 1)
+    assert fp.distance({"simhash": stored}) == 0
+
+
+@pytest.fixture
+def store():
+  client = mongomock.MongoClient()
+  return MongoDB(client=client), client.get_database(MONGO_DB).get_collection(MONGO_COLL)
+
+
+def test_find_duplicate_returns_the_first_analysed_copy(store):
+  mongo, coll = store
+  fp = Fingerprint.of(ADS[0])
+  coll.insert_many([
+    {"id": "first", "status": "Complete", "analysis": {"a": 1}, "fingerprint": fp.as_doc()},
+    {"id": "copy", "status": "Complete", "analysis": {"a": 1}, "duplicateOf": "first",
+     "fingerprint": Fingerprint.of(edited(ADS[0], "Go")).as_doc()},
+    {"id": "running", "status": "In progress", "fingerprint": Fingerprint.of(ADS[1]).as_doc()},
+  ])
+
+  repost = Fingerprint.of(edited(ADS[0]))
+  found = mongo.find_duplicate(repost)
+  assert found["id"] == "first" and found["analysis"] == {"a": 1} and 0 < found["distance"] <= 3
+  assert mongo.find_duplicate(fp) == {"id": "first", "analysis": {"a": 1}, "distance": 0}
+  assert mongo.find_duplicate(fp, exclude="first")["id"] == "first"  # reached through its copy
+  assert mongo.find_duplicate(repost, max_distance=0) is None
+  assert mongo.find_duplicate(Fingerprint.of(ADS[1])) is None  # not analysed yet
+  assert mongo.find_duplicate(Fingerprint.of(ADS[4])) is None
@@ -0,0 +1,47 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from helper.ai.async_client import AsyncAiClient
+from helper.ai.client import AiClient
+from helper.embeddings.embedder import OllamaEmbedder
+
+DOWN = "http://127.0.0.1:9"  # nothing listens on the discard port
+
+
+@pytest.fixture
+def ollama():
+  fake = FakeOllama(latency_ms=0, tokens_per_s=1e6, prefill_tokens_per_s=1e6)
+  yield fake.start()
+  fake.stop()
+
+
+def test_embedder_splits_hosts_and_fails_over(ollama):
+  embedder = OllamaEmbedder(host=f"{DOWN},{ollama}/")
+  vectors = embedder.embed(["Python developer", "React developer"])
+  assert vectors.shape == (2, 64)
+  assert np.allclose(np.linalg.norm(vectors, axis=1), 1)
+  down = next(e for e in embedder.pool.endpoints if e.host == DOWN)
+  assert not down.healthy
+
+
+def test_client_fails_over(ollama):
+  client = AiClient(host=f"{DOWN},{ollama}", retries=0)
+  assert '"response"' in client._generate("Input (raw job ad):\nPython developer\n    Extraction scope:")
+  assert [e.host for e in client.scheduler.pool.endpoints if not e.healthy] == [DOWN]
+  client.close()
+
+
+def test_async_client_fails_over(ollama):
+  client = AsyncAiClient(host=f"{DOWN},{ollama}", retries=0)
+
+  async def run():
+    try:
+      return await client._generate("Input (raw job ad):\nPython developer\n    Extraction scope:")
+    finally:
+      await client.close()
+
+  assert '"response"' in asyncio.run(run())
+  assert [e.host for e in client.pool.endpoints if not e.healthy] == [DOWN]
@@ -0,0 +1,87 @@
+import json
+import time
+
+from database.job_record import JobRecord
+from function.job_analyser import JobAnalyser
+from helper.ai.cache import ResponseCache
+from helper.ai.extract_keywords import SkillExtractor
+from helper.ai.scheduler import INTERACTIVE, NORMAL
+
+
+def response(title):
+  return {"job_title": title, "summary": "", "responsibilities": [f"Build {title} in Python"],
+          "requirements": [], "technical_skills": ["Python"], "qualifications": []}
+
+
+class BatchLlm:
+  """Answers every ad of a batch except "c", which then has to be retried alone."""
+
+  def _generate(self, prompt, **options):
+    if '<ad id="' in prompt:
+      return json.dumps({"results": [{"id": jid, "response": response(jid)} for jid in ("a", "b")]})
+    return json.dumps({"response": response("c")})
+
+
+class RecordingStore:
+  def __init__(self):
+    self.jobs = []
+
+  def add_jobs(self, jobs):
+    self.jobs.extend(jobs)
+
+
+def test_ads_are_cleaned_once_for_prompt_and_embedding():
+  extractor = SkillExtractor(cache=ResponseCache(), llm=BatchLlm())
+  calls = []
+  clean = extractor._clean
+  extractor._clean = lambda article: calls.append(article) or clean(article)
+  store = RecordingStore()
+  analyser = JobAnalyser(extractor=extractor, embeddings=store, linger_ms=200)
+
+  jobs = [JobRecord(id=jid, url=f"https://jobs.example/{jid}", jobTitle=f"Engineer {jid}",
+                    jobDescription="Write Python services.\nBenefits\nFree lunch, gym and a ping-pong table.")
+          for jid in ("a", "b", "c")]
+  futures = [analyser.submit(job) for job in jobs]
+  results = [f.result(timeout=10) for f in futures]
+  analyser.close()
+
+  assert [r["response"]["job_title"] for r in results] == ["a", "b", "c"]
+  assert sorted(calls) == sorted(f"{job.jobTitle}\n{job.jobDescription}" for job in jobs)
+  assert {jid: ad for jid, ad, _ in store.jobs} == {job.id: clean(f"{job.jobTitle}\n{job.jobDescription}") for job in jobs}
+
+
+class StreamingLlm:
+  """Answers one ad at a time, streaming when asked; records which prompts were streamed."""
+
+  def __init__(self):
+    self.calls = []
+
+  def _generate(self, prompt, **options):
+    self.calls.append(("plain", '<ad id="' in prompt))
+    return json.dumps({"response": response("plain")})
+
+  def _generate_stream(self, prompt, watcher=None, **options):
+    self.calls.append(("stream", '<ad id="' in prompt))
+    for name, value in response("streamed").items():
+      watcher.observe(("response", name), value)
+    return json.dumps({"response": response("streamed")})
+
+
+def test_interactive_job_ends_a_lingering_batch_and_streams():
+  llm = StreamingLlm()
+  analyser = JobAnalyser(extractor=SkillExtractor(cache=ResponseCache(), llm=llm), linger_ms=3000, parallel=2)
+  job = lambda jid: JobRecord(id=jid, url=f"https://jobs.example/{jid}", jobTitle=jid,
+                              jobDescription="Write Python services.")
+  fields = []
+  started = time.monotonic()
+  normal = analyser.submit(job("normal"), NORMAL)
+  time.sleep(0.1)
+  interactive = analyser.submit(job("interactive"), INTERACTIVE, on_field=lambda name, _: fields.append(name))
+
+  assert interactive.result(timeout=2)["response"]["job_title"] == "streamed"
+  assert time.monotonic() - started < 2
+  assert normal.result(timeout=5)["response"]["job_title"] == "plain"
+  analyser.close()
+
+  assert fields == list(response("streamed"))
+  assert sorted(llm.calls) == [("plain", False), ("stream", False)]
@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from database.job_record import InvalidRecord, JobRecord, encode_value
+
+MESSAGE = {
+  "id": "job-1", "url": "https://jobs.example/1", "jobTitle": "Backend Engineer", "jobDescription": "Python",
+  "companyName": "Acme", "salaryStart": 50000.0, "salaryEnd": 70000,
+  "openDate": "2025-03-01", "closeDate": "2025-03-31T12:00:00+02:00",
+}
+
+
+def test_decode_validates_and_normalises():
+  record = JobRecord.decode(json.dumps(MESSAGE).encode())
+
+  assert isinstance(record, JobRecord)
+  assert record.salaryStart == 50000 and isinstance(record.salaryStart, int)
+  assert record.openDate == datetime(2025, 3, 1, tzinfo=timezone.utc)
+  assert record.closeDate == datetime(2025, 3, 31, 10, tzinfo=timezone.utc)
+  assert record.recruiterName is None and record.get("recruiterName", "-") == "-" and record["url"] == MESSAGE["url"]
+
+
+def test_to_json_round_trips():
+  record = JobRecord.decode(json.dumps(MESSAGE).encode())
+  assert JobRecord.decode(record.to_json()) == record
+  assert encode_value(record) == record.to_json()
+  assert set(record.to_bson()) == set(JobRecord.__slots__)
+
+
+@pytest.mark.parametrize("raw,error,jid", [
+  (b"{not json", "not JSON", None),
+  (b"[1, 2]", "expected an object", None),
+  (json.dumps({**MESSAGE, "jobTitle": " "}).encode(), "jobTitle", "job-1"),
+  (json.dumps({**MESSAGE, "salaryStart": True}).encode(), "salaryStart", "job-1"),
+  (json.dumps({**MESSAGE, "salaryStart": 90000}).encode(), "salaryEnd must be larger", "job-1"),
+  (json.dumps({**MESSAGE, "openDate": "March"}).encode(), "openDate", "job-1"),
+  (json.dumps({**MESSAGE, "id": 7}).encode(), "id", None),
+])
+def test_bad_messages_become_invalid_records_that_keep_their_bytes(raw, error, jid):
+  record = JobRecord.decode(raw)
+
+  assert isinstance(record, InvalidRecord)
+  assert error in record.error and record.id == jid
+  assert encode_value(record) == raw
@@ -0,0 +1,26 @@
+from helper.skills.matcher import SkillIndex, canonical_id
+
+SKILLS = ["JavaScript", "Node.js", "React", "C++", "C#", "REST APIs", "Framer Motion", "Java"]
+
+
+def test_spellings_meet_at_one_canonical_id():
+  index = SkillIndex(SKILLS)
+  assert canonical_id("Node.js") == canonical_id("NodeJS") == canonical_id("node") == "nodejs"
+  assert index.canonical("reactjs") == "react"
+  assert index.canonical("framer motion") == index.canonical("FramerMotion") == "framermotion"
+  assert index.canonical("Go") is None
+
+
+def test_find_is_leftmost_longest_on_whole_tokens():
+  index = SkillIndex(SKILLS)
+  text = "We use JS, Node and React.js; C++ or C# for tools, a RESTful API, and JavaScript again"
+  assert index.find(text) == ["javascript", "nodejs", "react", "c++", "c#", "restful"]
+  # "Java" must not match inside "JavaScript", nor "React" inside "Reactive"
+  assert index.find("JavaScript and Reactive streams") == ["javascript"]
+
+
+def test_extra_aliases_and_display_names():
+  index = SkillIndex({"Kubernetes": ["kube"], "Python": []})
+  assert index.find("kube and k8s clusters, scripted in python") == ["kubernetes", "python"]
+  assert index.display == {"kubernetes": "Kubernetes", "python": "Python"}
+  assert len(index) == 2
@@ -0,0 +1,53 @@
+import urllib.request
+
+import pytest
+
+from metrics.registry import Registry
+from metrics.server import MetricsServer
+from metrics.tracing import JobTrace
+
+
+def test_registry_renders_the_prometheus_text_format():
+  registry = Registry()
+  jobs = registry.counter("jobs_total", "Jobs handled")
+  jobs.inc(outcome="complete")
+  jobs.inc(2, outcome="failed")
+  assert registry.counter("jobs_total", "registered twice") is jobs
+  seconds = registry.histogram("job_seconds", "Job time", buckets=(0.1, 1))
+  seconds.observe(0.05)
+  seconds.observe(0.5)
+  seconds.observe(5)
+  registry.gauge("pending", "Pending jobs").set(3, stage='say "hi"')
+
+  lines = registry.expose().splitlines()
+  assert "# TYPE jobs_total counter" in lines
+  assert 'jobs_total{outcome="complete"} 1' in lines and 'jobs_total{outcome="failed"} 2' in lines
+  assert ['job_seconds_bucket{le="0.1"} 1', 'job_seconds_bucket{le="1"} 2', 'job_seconds_bucket{le="+Inf"} 3',
+          "job_seconds_sum 5.55", "job_seconds_count 3"] == [l for l in lines if l.startswith("job_seconds_")]
+  assert 'pending{stage="say \\"hi\\""} 3' in lines
+
+
+def test_metrics_server_serves_the_registry():
+  registry = Registry()
+  registry.counter("up_total", "Up").inc()
+  server = MetricsServer(0, host="127.0.0.1", registry=registry).start()
+  try:
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+      assert "up_total 1" in response.read().decode()
+  finally:
+    server.stop()
+
+
+def test_trace_records_each_span_and_its_error():
+  trace = JobTrace("job-1")
+  with trace.span("dedupe"):
+    pass
+  with pytest.raises(TimeoutError):
+    with trace.span("extract"):
+      raise TimeoutError()
+
+  data = trace.as_dict()
+  assert [s["name"] for s in data["spans"]] == ["dedupe", "extract"]
+  assert "error" not in data["spans"][0] and data["spans"][1]["error"] == "TimeoutError"
+  assert data["spans"][1]["start_ms"] >= data["spans"][0]["start_ms"]
+  assert data["total_ms"] >= data["spans"][1]["start_ms"] + data["spans"][1]["duration_ms"]
@@ -0,0 +1,61 @@
+import mongomock # type: ignore
+from pymongo.errors import OperationFailure
+
+from database.migrations import HotQuery, INDEXES, check_plans, migrate, missing_indexes, plan_of
+
+
+def test_migrate_creates_what_is_missing_and_reports_what_fails():
+  db = mongomock.MongoClient().db
+  db.jobs.insert_many([{"id": "dup", "url": "https://jobs.example/1"}, {"id": "dup", "url": "https://jobs.example/2"}])
+
+  created, failed = migrate(db)
+
+  assert list(failed) == ["jobs.id_1"]  # duplicate ids under the unique index
+  assert len(created) == len(INDEXES) - 1
+  assert "job_search" in db.jobs.index_information()
+  assert [spec.name for spec in missing_indexes(db)] == ["id_1"]
+  db.jobs.delete_one({"url": "https://jobs.example/2"})
+  assert migrate(db) == (["jobs.id_1"], {})
+  assert migrate(db) == ([], {}) and missing_indexes(db) == []
+
+
+# explain() output of a 7.x server (SBE nests the plan one level deeper) and of an older one
+PLANS = {
+  "by_id": {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "FETCH", "inputStage": {
+    "stage": "IXSCAN", "indexName": "id_1"}}}}},
+  "sorted": {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}},
+}
+
+
+class ExplainOnly:
+  """A db whose cursors only explain: the plan is picked by the filter's first key."""
+
+  def get_collection(self, name):
+    return self
+
+  def find(self, filter):
+    if "$text" in filter:
+      raise OperationFailure("text index required for $text query")
+    self.plan = PLANS[next(iter(filter))]
+    return self
+
+  def limit(self, n):
+    return self
+
+  def sort(self, spec):
+    return self
+
+  def explain(self):
+    return self.plan
+
+
+def test_check_plans_flags_collection_scans_and_failing_queries():
+  db = ExplainOnly()
+  fast = HotQuery("by id", "jobs", {"by_id": 1})
+  slow = HotQuery("sorted", "jobs", {"sorted": 1}, [("processedAt", -1)])
+  text = HotQuery("search", "jobs", {"$text": {"$search": "python"}})
+
+  assert plan_of(db, fast) == ("FETCH > IXSCAN", ["id_1"])
+  flagged = check_plans(db, [fast, slow, text])
+  assert [(query.name, plan) for query, plan, _ in flagged[:1]] == [("sorted", "SORT > COLLSCAN")]
+  assert flagged[1][0] is text and flagged[1][1].startswith("error: text index required")
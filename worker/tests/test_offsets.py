@@ -0,0 +1,31 @@
+from kafkaClass.offsets import OffsetTracker
+
+TP = ("job.created", 0)
+
+
+def test_commits_stop_below_the_lowest_record_still_in_flight():
+  tracker = OffsetTracker(every_n=2, interval_ms=60_000)
+  for offset in (10, 11, 12):
+    tracker.track(TP, offset)
+
+  tracker.ack(TP, 11)
+  tracker.ack(TP, 12)
+  # 10 is still running: 11 and 12 are done but may not be committed past it
+  assert tracker.due() == {TP: 10}
+  tracker.mark_committed({TP: 10})
+  assert tracker.due(force=True) == {}
+
+  tracker.ack(TP, 10)
+  assert tracker.due() == {}  # one ack since the last commit, every_n is 2
+  assert tracker.due(force=True) == {TP: 13}
+
+
+def test_commit_is_due_after_the_interval_and_revoked_partitions_are_forgotten():
+  tracker = OffsetTracker(every_n=100, interval_ms=0)
+  tracker.track(TP, 5)
+  tracker.ack(TP, 5)
+  assert tracker.due() == {TP: 6}
+
+  tracker.forget([TP])
+  tracker.ack(TP, 5)  # late ack from before the rebalance
+  assert tracker.due(force=True) == {}
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from kafkaClass.pool import JobPool
+
+
+def test_same_key_runs_in_order_while_other_keys_run_alongside():
+  running, peak, order, overlaps = set(), [0], [], []
+  lock = threading.Lock()
+
+  def handle(item):
+    key, n = item
+    with lock:
+      if key in running:
+        overlaps.append(key)  # an assert here would only reach the pool's error log
+      running.add(key)
+      peak[0] = max(peak[0], len(running))
+    time.sleep(0.02)
+    with lock:
+      running.discard(key)
+      order.append(item)
+
+  pool = JobPool(handle, concurrency=3, max_pending=100)
+  for n in range(4):
+    for key in ("a", "b", "c"):
+      pool.submit(key, (key, n))
+  assert pool.drain(timeout=5)
+  pool.shutdown()
+
+  assert overlaps == []
+  for key in ("a", "b", "c"):
+    assert [n for k, n in order if k == key] == [0, 1, 2, 3]
+  assert peak[0] == 3
+
+
+def test_full_and_on_done_report_every_record_and_its_error():
+  release = threading.Event()
+  done = []
+
+  def handle(item):
+    release.wait(5)
+    if item == "bad":
+      raise ValueError(item)
+
+  pool = JobPool(handle, concurrency=1, max_pending=2, on_done=lambda item, error: done.append((item, repr(error))))
+  pool.submit("k1", "good")
+  assert not pool.full()
+  pool.submit("k2", "bad")
+  assert pool.full() and pool.pending == 2
+  release.set()
+  assert pool.drain(timeout=5)
+  pool.shutdown()
+
+  assert done == [("good", "None"), ("bad", "ValueError('bad')")]
+  with pytest.raises(RuntimeError):
+    pool.submit("k3", "late")
@@ -0,0 +1,47 @@
+import json
+
+import fakeredis
+
+from database.redis_publisher import STATUS_CHANNEL, STATUS_TTL, RedisPublisher, events_channel
+
+
+def messages(pubsub):
+  out = []
+  while (message := pubsub.get_message(timeout=0.1)) is not None:
+    if message["type"] == "message":
+      out.append((message["channel"], json.loads(message["data"])))
+  return out
+
+
+def test_transitions_are_coalesced_into_the_hash_and_each_one_is_published():
+  client = fakeredis.FakeRedis(decode_responses=True)
+  pubsub = client.pubsub()
+  pubsub.subscribe(events_channel("job-1"), STATUS_CHANNEL)
+  publisher = RedisPublisher(flush_interval_ms=60_000, client=client)
+
+  publisher.publish_progress("job-1", "In progress", progress=10, stage="received")
+  publisher.publish_progress("job-2", "In progress", progress=10, stage="received")
+  publisher.publish_progress("job-1", "Complete", progress=100, stage="done", result={"skills": ["Python"]})
+  assert client.hgetall("job:job-1") == {}  # nothing is written before the flush
+  publisher.close()
+
+  stored = client.hgetall("job:job-1")
+  assert (stored["status"], stored["progress"], stored["stage"]) == ("Complete", "100", "done")
+  assert json.loads(stored["result"]) == {"skills": ["Python"]}
+  assert 0 < client.ttl("job:job-1") <= STATUS_TTL
+
+  published = messages(pubsub)
+  per_job = [m["stage"] for channel, m in published if channel == events_channel("job-1")]
+  everything = [(m["id"], m["stage"]) for channel, m in published if channel == STATUS_CHANNEL]
+  assert per_job == ["received", "done"]
+  assert everything == [("job-1", "received"), ("job-2", "received"), ("job-1", "done")]
+
+
+def test_without_redis_publishing_is_a_no_op():
+  class Down:
+    def ping(self):
+      raise ConnectionError("down")
+
+  publisher = RedisPublisher(client=Down())
+  assert publisher.publish_progress("job-1", "Complete") is False
+  publisher.close()
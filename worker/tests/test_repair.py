@@ -0,0 +1,62 @@
+import pytest
+
+from helper.ai.repair import RepairError, clean_item, clean_list, coerce_response, loads_tolerant, parse_response
+
+
+@pytest.mark.parametrize("text", ["2.5+ years of experience with Python", "3.x Python", "1.5 FTE", "9)x"])
+def test_numbers_that_are_content_are_kept(text):
+  assert clean_item(text) == text
+
+
+@pytest.mark.parametrize("text, expected", [
+  ("1. Write code", "Write code"), ("(2) Ship it", "Ship it"), ("10) Ten", "Ten"),
+  ("•  Use   Docker", "Use Docker"), ("a) Review PRs", "Review PRs"),
+])
+def test_list_markers_are_stripped(text, expected):
+  assert clean_item(text) == expected
+
+
+def test_valid_json_is_not_reported_as_repaired():
+  assert loads_tolerant('{"a": [1, 2]}') == ({"a": [1, 2]}, [])
+
+
+@pytest.mark.parametrize("text, value, issue", [
+  ('```json\n{"a": 1}\n```', {"a": 1}, "code_fence"),
+  ('Here you go: {"a": 1}', {"a": 1}, "leading_text"),
+  ('{a: 1}', {"a": 1}, "unquoted_key"),
+  ("{'a': 'x'}", {"a": "x"}, "quotes"),
+  ('{"a": [1, 2,],}', {"a": [1, 2]}, "trailing_comma"),
+  ('{"a": 1 "b": 2}', {"a": 1, "b": 2}, "missing_comma"),
+  ('{"a": True, "b": None}', {"a": True, "b": None}, "python_literal"),
+  ('{"a": "say "hi" now"}', {"a": 'say "hi" now'}, "inner_quote"),
+  ('{"a": ["x", "y', {"a": ["x", "y"]}, "truncated"),
+  ('{"a": 1} trailing words', {"a": 1}, "trailing_text"),
+])
+def test_loads_tolerant_repairs(text, value, issue):
+  parsed, issues = loads_tolerant(text)
+  assert parsed == value
+  assert issue in issues
+
+
+def test_unrecoverable_output_raises():
+  with pytest.raises(RepairError):
+    loads_tolerant("I cannot help with that.")
+  with pytest.raises(RepairError):
+    parse_response('{"colour": "blue"}')
+
+
+def test_coerce_response_fixes_the_schema():
+  response, issues = coerce_response({"response": {
+    "Title": "Engineer", "Responsibilities": "- Build APIs\n- Build APIs\n- Review code",
+    "skills": ["Python", ["Docker"]], "requirements": [], "summary": ["Builds", "things"],
+  }})
+  assert response == {
+    "job_title": "Engineer", "summary": "Builds things",
+    "responsibilities": ["Build APIs", "Review code"], "requirements": [],
+    "technical_skills": ["Python", "Docker"], "qualifications": [],
+  }
+  assert "missing:qualifications" in issues and "text_as_list:responsibilities" in issues
+
+
+def test_clean_list_dedupes_case_insensitively():
+  assert clean_list(["Python", "python ", "1. Go"]) == ["Python", "Go"]
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import mongomock # type: ignore
+
+from config.settings import MONGO_COLL, MONGO_ROLLUP_COLL
+from database.rollups import RollupWriter, backfill, buckets
+
+
+def job(jid, company="Topsort", skills=("Python", "Node.js"), **extra):
+  doc = {"id": jid, "url": f"https://jobs.example/{jid}", "companyName": company, "salaryStart": 100000,
+         "salaryEnd": 110000, "openDate": datetime(2025, 3, 1, tzinfo=timezone.utc), "status": "Complete",
+         "analysis": {"skills": {"matched": list(skills), "missing": ["NodeJS"]}}}
+  doc.update(extra)
+  return doc
+
+
+def test_buckets_of_a_job():
+  assert [b[0] for b in buckets(job("a"))] == ["day:2025-03-01", "company:topsort", "salary:100k-120k"]
+  assert buckets(job("b", company=None, salaryStart=None, salaryEnd=None))[-1][0] == "salary:unknown"
+
+
+def test_writer_counts_each_job_once():
+  db = mongomock.MongoClient().db
+  jobs, rollups = db[MONGO_COLL], db[MONGO_ROLLUP_COLL]
+  jobs.insert_many([job("a"), job("b", company="Acme")])
+  writer = RollupWriter(jobs, rollups, flush_interval_ms=60000)
+  for doc in jobs.find():
+    writer.add(doc, doc["analysis"])
+  writer.flush()
+  writer.add(jobs.find_one({"id": "a"}), job("a")["analysis"])  # redelivered record
+  writer.close()
+
+  day = rollups.find_one({"_id": "day:2025-03-01"})
+  assert day["jobs"] == 2
+  assert day["skills"] == {"python": 2, "nodejs": 2}  # Node.js and NodeJS are one skill
+  assert rollups.find_one({"_id": "company:topsort"})["jobs"] == 1
+  assert jobs.count_documents({"rolledUp": True}) == 2
+
+
+def test_backfill_rebuilds_counts_and_keeps_the_indexes():
+  db = mongomock.MongoClient().db
+  jobs, rollups = db[MONGO_COLL], db[MONGO_ROLLUP_COLL]
+  jobs.insert_many([job("a"), job("b"), job("c", duplicateOf="a"), job("d", status="failed")])
+  rollups.insert_one({"_id": "day:1999-01-01", "dim": "day", "key": "1999-01-01", "jobs": 99})
+
+  assert backfill(db) == 2
+
+  assert rollups.find_one({"_id": "day:1999-01-01"}) is None
+  assert rollups.find_one({"_id": "day:2025-03-01"})["jobs"] == 2
+  assert "dim_1_key_1" in rollups.index_information()
+  assert jobs.count_documents({"rolledUp": True}) == 2
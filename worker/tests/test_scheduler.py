@@ -0,0 +1,64 @@
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bench.fake_ollama import FakeOllama
+from config import settings
+from helper.ai.cache import ResponseCache
+from helper.ai.client import AiClient
+from helper.ai.extract_keywords import ARTICLE_SCHEMA
+from helper.ai.stream_json import SchemaWatcher
+
+PROMPT = "Input (raw job ad):\nBackend Engineer\n- 3 years of Python experience\n    Extraction scope:"
+
+
+def test_single_flight_shares_keyed_calls_only():
+  client = AiClient(host="http://127.0.0.1:9")
+  release, calls = threading.Event(), []
+
+  def call(host):
+    calls.append(host)
+    release.wait(5)
+    return "ok", 1
+
+  with ThreadPoolExecutor(4) as pool:
+    shared = [pool.submit(client.scheduler.run, "same", 1, call) for _ in range(2)]
+    alone = [pool.submit(client.scheduler.run, None, 1, call) for _ in range(2)]
+    for _ in range(100):
+      if len(calls) == 3:
+        break
+      release.wait(0.01)
+    release.set()
+    assert [f.result() for f in shared + alone] == ["ok"] * 4
+  assert len(calls) == 3
+  client.close()
+
+
+def test_streamed_call_is_not_folded_into_a_plain_one():
+  ollama = FakeOllama(latency_ms=200, tokens_per_s=1e5, prefill_tokens_per_s=1e6)
+  client = AiClient(host=ollama.start(), cache=ResponseCache())
+  fields = []
+  watcher = SchemaWatcher("response", ARTICLE_SCHEMA, on_field=lambda name, _: fields.append(name))
+  try:
+    with ThreadPoolExecutor(2) as pool:
+      plain = pool.submit(client._generate, PROMPT, temperature=0)
+      streamed = pool.submit(client._generate_stream, PROMPT, temperature=0, watcher=watcher)
+      plain.result(), streamed.result()
+  finally:
+    client.close()
+    ollama.stop()
+  assert sorted(fields) == sorted(ARTICLE_SCHEMA)
+  assert ollama.requests == 2
+
+
+@pytest.mark.parametrize("hosts,expected", [("http://a:11434", 1), ("http://a:11434,http://b:11434, http://c:11434", 3)])
+def test_batch_parallel_defaults_to_one_batch_per_host(monkeypatch, hosts, expected):
+  monkeypatch.delenv("AI_BATCH_PARALLEL", raising=False)
+  monkeypatch.setenv("OLLAMA_HOSTS", hosts)
+  try:
+    assert importlib.reload(settings).AI_BATCH_PARALLEL == expected
+  finally:
+    monkeypatch.undo()
+    importlib.reload(settings)
@@ -0,0 +1,21 @@
+from helper.skills.scorer import ResponsibilityScorer
+
+
+SKILLS = ["Python", "Docker", "React", "NodeJS"]
+
+JOB = (["Write Python services", "Ship Docker images", "Talk to customers"], ["Kubernetes"])
+PYTHON_HEAVY = (["Python Python Python tooling", "Own Python data pipelines in Python"], ["Go", "Rust"])
+OTHER = (["Build React screens", "Maintain Node.js APIs", "Write Python glue for React"], ["React Native"])
+
+
+def test_job_scores_the_same_alone_and_in_a_batch():
+  scorer = ResponsibilityScorer(SKILLS)
+  alone = scorer.score(*JOB)
+  for batch in ([JOB, PYTHON_HEAVY], [PYTHON_HEAVY, JOB, OTHER], [OTHER, JOB]):
+    assert scorer.score_batch(batch)[batch.index(JOB)] == alone
+
+
+def test_one_matched_skill_is_kept():
+  ranked = ResponsibilityScorer(SKILLS).score(*JOB)["Responsibilities"]
+  assert {"text": "Write Python services", "score": 5} in ranked
+  assert all(item["text"] != "Talk to customers" for item in ranked)
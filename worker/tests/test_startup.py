@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+import startup
+from startup import ColdStart, connect_all, wait_ready
+
+
+class Flaky:
+  """Fails `failures` times, then returns `value`."""
+
+  def __init__(self, failures, value="ok"):
+    self.failures = failures
+    self.value = value
+    self.calls = 0
+
+  def __call__(self):
+    self.calls += 1
+    if self.calls <= self.failures:
+      raise ConnectionError("refused")
+    return self.value
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+  slept = []
+  monkeypatch.setattr(startup.time, "sleep", slept.append)
+  return slept
+
+
+def test_backends_connect_concurrently():
+  barrier = threading.Barrier(3, timeout=5)
+  clock = ColdStart()
+
+  def builder(name):
+    def build():
+      barrier.wait()  # each builder waits for the other two: this only returns if they run at once
+      return name
+    return build
+
+  names = ("mongo", "redis", "kafka")
+  assert connect_all({name: builder(name) for name in names}, clock) == {name: name for name in names}
+  assert set(clock.steps) == {"mongo", "redis", "kafka"}
+
+
+def test_retries_with_backoff_then_falls_back_or_fails(sleeps):
+  clock = ColdStart()
+  redis = Flaky(failures=2)
+  assert connect_all({"redis": redis}, clock) == {"redis": "ok"}
+  assert clock.attempts["redis"] == 3 and sleeps == [1.0, 2.0]
+  assert "redis" in clock.report() and "(3 tries)" in clock.report()
+
+  down = Flaky(failures=99)
+  assert connect_all({"redis": down}, clock, fallbacks={"redis": lambda: None}) == {"redis": None}
+  assert down.calls == startup.STARTUP_RETRIES
+  with pytest.raises(RuntimeError, match="mongo: gave up"):
+    connect_all({"mongo": Flaky(failures=99)}, clock)
+
+
+def test_wait_ready_polls_until_every_check_passes_or_stop():
+  clock = ColdStart()
+  ollama = Flaky(failures=2, value=True)
+  assert wait_ready({"ollama": ollama, "mongo": lambda: True}, clock, should_stop=lambda: False, interval=0)
+  assert ollama.calls == 3 and "ready" in clock.steps
+
+  assert not wait_ready({"ollama": lambda: False}, clock, should_stop=lambda: True, interval=0)
@@ -0,0 +1,77 @@
+import threading
+
+import mongomock # type: ignore
+
+import main
+from config.settings import AI_BATCH_LINGER_MS
+from bench.fake_ollama import FakeOllama
+from bench.memory_kafka import MemoryKafkaClient
+from database.job_record import JobRecord
+from database.mongo import MongoDB
+from function.job_analyser import JobAnalyser
+from helper.ai.cache import ResponseCache
+from helper.ai.extract_keywords import ARTICLE_SCHEMA, SkillExtractor
+from helper.ai.scheduler import INTERACTIVE, NORMAL
+
+
+class RecordingPublisher:
+  def __init__(self):
+    self.events = []
+
+  def publish_progress(self, jid, status, progress=None, stage=None, result=None):
+    self.events.append({"id": jid, "status": status, "progress": progress, "stage": stage, "result": result})
+    return True
+
+  def close(self):
+    return
+
+
+JOB = JobRecord(id="job-1", url="https://jobs.example/1", jobTitle="Backend Engineer",
+                jobDescription="About the role\nWe build APIs.\nResponsibilities\n- Write Python services\n"
+                               "Requirements\n- 3 years of experience\nSkills\n- Python\n- Docker")
+
+
+def run(priority, during_batch=False):
+  ollama = FakeOllama(latency_ms=0, tokens_per_s=1e5, prefill_tokens_per_s=1e6)
+  extractor = SkillExtractor(host=ollama.start(), cache=ResponseCache())
+  publisher = RecordingPublisher()
+  main.setup(kafka_client=MemoryKafkaClient([]), mongo=MongoDB(client=mongomock.MongoClient()),
+             redis_publisher=publisher, job_analyser=JobAnalyser(extractor=extractor, linger_ms=3000 if during_batch else AI_BATCH_LINGER_MS), metrics_port=0)
+  try:
+    if during_batch:
+      # a normal job opens a batch that lingers for company
+      other = JobRecord(id="job-0", url="https://jobs.example/0", jobTitle="Data Engineer",
+                        jobDescription="Requirements\n- 2 years of experience\nSkills\n- Kafka")
+      batch = threading.Thread(target=main.handle_job, args=(other, NORMAL))
+      batch.start()
+      threading.Event().wait(0.1)
+    main.handle_job(JOB, priority)
+    if during_batch:
+      batch.join()
+  finally:
+    main._close()
+    ollama.stop()
+  return publisher.events
+
+
+def test_interactive_job_publishes_each_field_as_it_streams():
+  events = run(INTERACTIVE)
+
+  fields = [e for e in events if (e["stage"] or "").startswith("field:")]
+  assert sorted(e["stage"][len("field:"):] for e in fields) == sorted(ARTICLE_SCHEMA)
+  assert [len(e["result"]) for e in fields] == list(range(1, len(ARTICLE_SCHEMA) + 1))
+  assert [e["progress"] for e in fields] == sorted(e["progress"] for e in fields)
+  assert events[-1]["status"] == "Complete"
+  assert events[-1]["result"]["response"] == fields[-1]["result"]
+
+
+def test_interactive_job_arriving_during_a_normal_batch_still_streams():
+  events = [e for e in run(INTERACTIVE, during_batch=True) if e["id"] == JOB.id]
+
+  fields = [e["stage"][len("field:"):] for e in events if (e["stage"] or "").startswith("field:")]
+  assert sorted(fields) == sorted(ARTICLE_SCHEMA)
+  assert events[-1]["status"] == "Complete"
+
+
+def test_other_jobs_are_not_streamed():
+  assert not [e for e in run(NORMAL) if (e["stage"] or "").startswith("field:")]
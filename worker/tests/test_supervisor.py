@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+
+WORKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The supervisor forks and installs signal handlers, so it runs in its own interpreter
+SCRIPT = r"""
+import os, signal, sys, threading, time
+import main, supervisor
+
+log = sys.argv[1]
+
+def fake_main(metrics_port=0):
+  with open(log, "a") as f:
+    f.write(f"start {metrics_port}\n")
+  if CRASH:
+    raise RuntimeError("boom")
+  while not main.stop:
+    time.sleep(0.01)
+  with open(log, "a") as f:
+    f.write(f"drained {metrics_port}\n")
+
+main.main = fake_main
+supervisor.METRICS_PORT = 9000
+threading.Timer(RUN_FOR, os.kill, (os.getpid(), signal.SIGTERM)).start()
+supervisor.Supervisor(PROCESSES, drain_timeout=1, backoff=0.1, backoff_max=0.2).run()
+"""
+
+
+def supervise(tmp_path, crash, processes, run_for):
+  log = tmp_path / "children.log"
+  script = SCRIPT.replace("CRASH", str(crash)).replace("PROCESSES", str(processes)).replace("RUN_FOR", str(run_for))
+  done = subprocess.run([sys.executable, "-c", script, str(log)], cwd=WORKER_DIR,
+                        capture_output=True, text=True, timeout=60)
+  assert done.returncode == 0, done.stderr
+  return done.stdout, log.read_text().splitlines()
+
+
+def test_children_get_their_own_metrics_port_and_drain_on_sigterm(tmp_path):
+  _, log = supervise(tmp_path, crash=False, processes=2, run_for=1.0)
+  assert sorted(log) == ["drained 9000", "drained 9001", "start 9000", "start 9001"]
+
+
+def test_crashed_children_restart_with_capped_exponential_backoff(tmp_path):
+  out, log = supervise(tmp_path, crash=True, processes=1, run_for=4.5)
+  delays = [float(d) for d in re.findall(r"restarting in ([\d.]+)s", out)]
+  assert delays[:3] == [0.1, 0.2, 0.2]
+  # the supervisor polls every 0.5 s, so a restart scheduled just before SIGTERM may never start
+  assert len(delays) <= len(log) <= len(delays) + 1 and set(log) == {"start 9000"}
@@ -0,0 +1,28 @@
+import numpy as np
+
+from helper.embeddings.embedder import normalize_rows
+from helper.embeddings.index import VectorIndex
+
+
+def rows(*seeds):
+  return normalize_rows(np.stack([np.random.default_rng(s).standard_normal(8) for s in seeds]))
+
+
+def test_append_after_a_crash_keeps_ids_and_rows_aligned(tmp_path):
+  path = str(tmp_path / "ads")
+  VectorIndex(path, "test").add(["a", "b"], rows(1, 2))
+
+  # What a writer killed between its two writes leaves: a fsynced row without its id, then a torn id line
+  with open(path + ".f32", "ab") as f:
+    f.write(rows(3).tobytes())
+  with open(path + ".ids", "a") as f:
+    f.write("los")
+
+  VectorIndex(path, "test").add(["c"], rows(4))
+
+  index = VectorIndex(path, "test")
+  assert len(index) == 3
+  for id, seed in (("a", 1), ("b", 2), ("c", 4)):
+    assert np.allclose(index.vector(id), rows(seed)[0], atol=1e-6)
+  assert index.vector("los") is None and index.vector("losc") is None
+  assert index.search(rows(4)[0], k=1)[0][0] == "c"